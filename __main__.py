@@ -1,6 +1,8 @@
 import json
+import datasets
 import wikipedia_scrapping as ws
 import graphics as gr
+import profiling
 
 # Small category
 # urls = {
@@ -20,6 +22,42 @@ import graphics as gr
 #     with open(f"data_{lang}.json", "w", encoding="utf-8") as file:
 #         json.dump(data, file, ensure_ascii=False, indent=2)
 
+# Save the data compactly and compressed (read back by database.load as well)
+# for lang, url in urls.items():
+#     datasets.write_dataset(f"data_{lang}.json.gz", ws.scrape_category(url))
+
+# Stream the data into jsonl files while crawling (one category per line)
+# for lang, url in urls.items():
+#     ws.scrape_category(url, output_path=f"data_{lang}.jsonl.gz")
+
+# Store the data in sqlite databases, queried in place by the database module
+# for lang, url in urls.items():
+#     ws.scrape_category(url, output_path=f"data_{lang}.sqlite")
+
+# Write the crawl telemetry (request phases, retries, parsing) in the Prometheus format
+# for lang, url in urls.items():
+#     ws.scrape_category(url, metrics_path=f"metrics_{lang}.prom")
+
+# List the pages that kept failing after the retries instead of aborting the crawl
+# for lang, url in urls.items():
+#     ws.scrape_category(url, dead_letter_path=f"dead_letters_{lang}.jsonl")
+
+# Update the json files incrementally (only edited articles are fetched again)
+# for lang, url in urls.items():
+#     with open(f"data_{lang}.json", "r", encoding="utf-8") as file:
+#         previous = json.load(file)
+#     data = ws.scrape_category(url, previous=previous)
+#     with open(f"data_{lang}.json", "w", encoding="utf-8") as file:
+#         json.dump(data, file, ensure_ascii=False, indent=2)
+
+# Render every chart to image files instead of showing them (headless servers, CI)
+# gr.render_all("charts", formats=("png", "svg"))
+
+# Profile the stages of a crawl or of the charts (CPU profiles and allocations)
+# ws.scrape_category(urls["en"], output_path="data_en.jsonl", profile_dir="profile_en")
+# with profiling.profile("profile_charts"):
+#     gr.render_all("charts")
+
 # CHART1 - BAR CHART - Quantity of Subcategories and Articles
 gr.plot_quantity_of_subcategories_and_articles()
 
@@ -51,4 +89,4 @@ gr.plot_sections_distribution_per_article()
 gr.plot_word_count_distribution_per_article()
 
 # CHART 11 - BOXPLOT - Word Count Distribution per Articles in both languages and Quick Win
-gr.plot_word_count_distribution_and_quick_win()
\ No newline at end of file
+gr.plot_word_count_distribution_and_quick_win()
@@ -0,0 +1,143 @@
+"""
+This module derives every input of the charts from the columnar tables of a dataset
+(see `columnar`), in a single vectorized pass per language, and compares the pages
+of a language with another one through their coverage bitmaps (see
+`language_coverage`).
+
+The tables are turned into flat frames (one row per category membership and one row
+per distinct article) and the counts, totals and distributions are computed with
+groupby, unique and percentile operations instead of loops over the records.
+
+Functions:
+    aggregate(tables: ColumnarDataset) -> LanguageAggregates:
+
+    compare(coverage: Coverage, language: str, aggregates: LanguageAggregates, other: str) -> LanguageComparison:
+
+    summarize(values: Sequence[float]) -> Dict[str, float]:
+"""
+
+from dataclasses import dataclass
+from typing import Dict, Sequence
+
+import numpy as np
+import pandas as pd
+
+from columnar import ColumnarDataset
+from language_coverage import Coverage
+
+
+@dataclass
+class LanguageAggregates:
+    """
+    Chart inputs of one language on its own.
+
+    `categories` has the `categories` and `articles_count` of every category and
+    `unique_articles` the `article`, `sections_count` and `total_word_count` of every
+    distinct article.
+    """
+
+    total_categories: int
+    total_articles: int
+    total_sections: int
+    total_unique_articles: int
+    categories: pd.DataFrame
+    unique_articles: pd.DataFrame
+
+
+@dataclass
+class LanguageComparison:
+    """
+    Chart inputs of one language compared with another one.
+
+    `articles_both` / `articles_only` have the `url` and `word_count` of the
+    distinct articles that do / do not exist in the other language.
+    """
+
+    total_categories_both: int
+    total_categories_only: int
+    articles_both: pd.DataFrame
+    articles_only: pd.DataFrame
+
+
+def aggregate(tables: ColumnarDataset) -> LanguageAggregates:
+    """
+    Computes the chart inputs of the dataset in `tables` that do not depend on the
+    other language.
+    """
+    memberships = pd.DataFrame(
+        {
+            "category": np.repeat(
+                np.arange(len(tables.category_ids)),
+                tables.category_article_counts(),
+            ),
+            "article": tables.memberships,
+        }
+    )
+    articles = pd.DataFrame(
+        {
+            "article": tables.article_ids,
+            "sections_count": tables.article_sections_counts,
+            "total_word_count": tables.article_word_counts,
+        }
+    )
+
+    articles_count = (
+        memberships.groupby("category")
+        .size()
+        .reindex(range(len(tables.category_ids)), fill_value=0)
+    )
+    categories = pd.DataFrame(
+        {
+            "categories": tables.category_names,
+            "articles_count": articles_count.to_numpy(),
+        }
+    )
+
+    # Articles are stored once, in the order they first appear
+    unique_articles = articles.iloc[memberships["article"].unique()]
+
+    return LanguageAggregates(
+        total_categories=len(categories),
+        total_articles=len(memberships),
+        total_sections=int(
+            articles["sections_count"].to_numpy()[memberships["article"]].sum()
+        ),
+        total_unique_articles=len(unique_articles),
+        categories=categories,
+        unique_articles=unique_articles.reset_index(drop=True),
+    )
+
+
+def compare(
+    coverage: Coverage, language: str, aggregates: LanguageAggregates, other: str
+) -> LanguageComparison:
+    """
+    Compares the dataset of `language` in `coverage` (with its `aggregates`) with the
+    `other` one. A page exists in the other language when its URL is one of the
+    language links of the other dataset.
+    """
+    tables = coverage.tables[language]
+    categories_both = coverage.select(language, "categories", present=[other])
+    unique_articles = aggregates.unique_articles
+    # The bitmaps follow the rows of the tables, the unique articles their order of
+    # first membership
+    rows = pd.Index(tables.article_ids).get_indexer(unique_articles["article"])
+    articles_both = coverage.select(language, "articles", present=[other])[rows]
+    word_counts = unique_articles.rename(
+        columns={"article": "url", "total_word_count": "word_count"}
+    )[["url", "word_count"]]
+
+    return LanguageComparison(
+        total_categories_both=int(categories_both.sum()),
+        total_categories_only=int((~categories_both).sum()),
+        articles_both=word_counts[articles_both].reset_index(drop=True),
+        articles_only=word_counts[~articles_both].reset_index(drop=True),
+    )
+
+
+def summarize(values: Sequence[float]) -> Dict[str, float]:
+    """
+    Returns the mean and the median of a distribution.
+    """
+    values = np.asarray(values, dtype=float)
+    return {"mean": float(values.mean()), "median": float(np.percentile(values, 50))}
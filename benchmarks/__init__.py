@@ -0,0 +1,3 @@
+"""
+Benchmarks of the scraper and the analysis, run from the repository root.
+"""
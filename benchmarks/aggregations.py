@@ -0,0 +1,224 @@
+"""
+Benchmarks the aggregation pipeline of the charts on a synthetic dataset.
+
+Two languages with the given number of distinct articles are generated directly as
+columnar tables (50 articles per category, 10% of the articles listed in a second
+category, half of the articles and categories linked to the other language). The
+time of `aggregations.aggregate`, `language_coverage.Coverage` and
+`aggregations.compare` for both languages is reported. With `--check`, a smaller
+dataset is also aggregated with the record loops the charts used before, and the
+numbers are checked to be identical.
+
+Usage:
+    python -m benchmarks.aggregations [--articles N] [--check N] [--repeat N]
+"""
+
+import argparse
+import statistics
+import time
+from typing import Any, Dict, List, Tuple
+
+import numpy as np
+
+from aggregations import aggregate, compare, summarize
+from columnar import ColumnarDataset
+from language_coverage import Coverage
+
+# Constants
+ARTICLES_PER_CATEGORY = 50
+DUPLICATED_FRACTION = 0.1
+LINKED_FRACTION = 0.5
+MAX_SECTIONS = 12
+MAX_SECTION_WORDS = 500
+
+
+def _urls(language: str, kind: str, count: int) -> np.ndarray:
+    return np.array(
+        [f"https://{language}.wikipedia.org/wiki/{kind}_{i}" for i in range(count)],
+        dtype=object,
+    )
+
+
+def _offsets(lengths: np.ndarray) -> np.ndarray:
+    return np.concatenate(([0], np.cumsum(lengths))).astype(np.int64)
+
+
+def generate(articles: int, seed: int = 0) -> Tuple[ColumnarDataset, ColumnarDataset]:
+    """
+    Generates the tables of two languages whose pages with the same number are
+    linked to each other (for the linked ones).
+    """
+    rng = np.random.default_rng(seed)
+    categories = max(articles // ARTICLES_PER_CATEGORY, 1)
+    linked_articles = rng.random(articles) < LINKED_FRACTION
+    linked_categories = rng.random(categories) < LINKED_FRACTION
+
+    datasets = []
+    for language, other in (("xx", "yy"), ("yy", "xx")):
+        # Every article is in one category, and some also in a second one
+        duplicated = rng.choice(
+            articles, int(articles * DUPLICATED_FRACTION), replace=False
+        )
+        member_articles = np.concatenate((np.arange(articles), duplicated))
+        member_categories = rng.integers(0, categories, len(member_articles))
+        order = np.argsort(member_categories, kind="stable")
+        member_articles = member_articles[order]
+        # Number the articles in the order they first appear, as the loader does
+        _, first = np.unique(member_articles, return_index=True)
+        rows = np.empty(articles, dtype=np.int64)
+        rows[member_articles[np.sort(first)]] = np.arange(articles)
+        memberships = rows[member_articles]
+        numbers = np.argsort(rows)  # article number of every row
+
+        sections = rng.integers(0, MAX_SECTIONS + 1, articles)
+        total_sections = int(sections.sum())
+        linked_rows = linked_articles[numbers]
+        category_links = np.flatnonzero(linked_categories)
+
+        datasets.append(
+            ColumnarDataset(
+                category_ids=_urls(language, "Category:C", categories),
+                category_names=_urls(language, "C", categories),
+                category_parents=np.full(categories, -1, dtype=np.int64),
+                category_articles=_offsets(
+                    np.bincount(member_categories, minlength=categories)
+                ),
+                memberships=memberships,
+                article_ids=_urls(language, "A", articles)[numbers],
+                article_names=np.full(articles, "A", dtype=object),
+                article_revision_ids=np.full(articles, -1, dtype=np.int64),
+                article_sections=_offsets(sections),
+                section_names=np.full(total_sections, "Section", dtype=object),
+                section_word_counts=rng.integers(0, MAX_SECTION_WORDS, total_sections),
+                languages=np.concatenate(
+                    (
+                        _urls(other, "Category:C", categories)[category_links],
+                        _urls(other, "A", articles)[numbers[linked_rows]],
+                    )
+                ),
+                category_languages=_offsets(linked_categories.astype(np.int64)),
+                category_language_codes=np.arange(len(category_links)),
+                article_languages=_offsets(linked_rows.astype(np.int64)),
+                article_language_codes=len(category_links)
+                + np.arange(int(linked_rows.sum())),
+            )
+        )
+
+    return datasets[0], datasets[1]
+
+
+def _reference(
+    categories: List[Dict[str, Any]], other: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    """
+    Computes the chart inputs with the record loops the charts used before.
+    """
+    index = set()
+    for category in other:
+        index.update(category["languages"])
+        for article in category["articles"]:
+            index.update(article["languages"])
+
+    unique = {}
+    for category in categories:
+        for article in category["articles"]:
+            unique.setdefault(article["id"], article)
+    word_counts = {
+        article_id: sum(section["word_count"] for section in article["sections"])
+        for article_id, article in unique.items()
+    }
+    both = [word_counts[url] for url in unique if url in index]
+
+    return {
+        "total_categories": len(categories),
+        "total_articles": sum(len(c["articles"]) for c in categories),
+        "total_sections": sum(
+            len(a["sections"]) for c in categories for a in c["articles"]
+        ),
+        "total_unique_articles": len(unique),
+        "total_categories_both": sum(c["id"] in index for c in categories),
+        "articles_count": [len(c["articles"]) for c in categories],
+        "sections_count": [len(a["sections"]) for a in unique.values()],
+        "total_word_count": list(word_counts.values()),
+        "both": sorted(both),
+        "only": sorted(word_counts[url] for url in unique if url not in index),
+        "summary": {"mean": statistics.mean(both), "median": statistics.median(both)},
+    }
+
+
+def _pipeline(tables: ColumnarDataset, other: ColumnarDataset) -> Dict[str, Any]:
+    aggregates = aggregate(tables)
+    coverage = Coverage({"tables": tables, "other": other})
+    comparison = compare(coverage, "tables", aggregates, "other")
+    return {
+        "total_categories": aggregates.total_categories,
+        "total_articles": aggregates.total_articles,
+        "total_sections": aggregates.total_sections,
+        "total_unique_articles": aggregates.total_unique_articles,
+        "total_categories_both": comparison.total_categories_both,
+        "articles_count": aggregates.categories["articles_count"].tolist(),
+        "sections_count": aggregates.unique_articles["sections_count"].tolist(),
+        "total_word_count": aggregates.unique_articles["total_word_count"].tolist(),
+        "both": sorted(comparison.articles_both["word_count"].tolist()),
+        "only": sorted(comparison.articles_only["word_count"].tolist()),
+        "summary": summarize(comparison.articles_both["word_count"]),
+    }
+
+
+def check(articles: int) -> bool:
+    """
+    Tells whether the pipeline gives the numbers of the record loops.
+    """
+    first, second = generate(articles)
+    records = (first.read_categories(), second.read_categories())
+    return _pipeline(first, second) == _reference(*records) and _pipeline(
+        second, first
+    ) == _reference(*reversed(records))
+
+
+def run(articles: int, repeat: int = 3) -> Dict[str, Any]:
+    """
+    Benchmarks the pipeline on both languages. Returns the best time out of `repeat`.
+    """
+    start = time.perf_counter()
+    first, second = generate(articles)
+    generated = time.perf_counter() - start
+
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        aggregates = aggregate(first), aggregate(second)
+        coverage = Coverage({"first": first, "second": second})
+        compare(coverage, "first", aggregates[0], "second")
+        compare(coverage, "second", aggregates[1], "first")
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+
+    return {
+        "articles": articles,
+        "generate_seconds": round(generated, 4),
+        "seconds": round(best, 4),
+        "articles_per_second": round(2 * articles / best, 2) if best else None,
+    }
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    argument_parser.add_argument("--articles", type=int, default=1_000_000)
+    argument_parser.add_argument("--check", type=int, default=None)
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    arguments = argument_parser.parse_args()
+
+    if arguments.check:
+        print(f"identical={check(arguments.check)} ({arguments.check} articles)")
+
+    result = run(arguments.articles, arguments.repeat)
+    print(
+        f"{result['articles']} articles per language"
+        f" {result['seconds']:>8}s {result['articles_per_second']:>12} articles/s"
+        f" (generated in {result['generate_seconds']}s)"
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,305 @@
+"""
+Page corpora for the offline benchmarks: saved category and article pages served
+by the stub Wikipedia server instead of the live site.
+
+A corpus is a directory with a `manifest.json` (the path of the root category) and
+one `.html` file per page under `pages/`, named after the quoted URL path. It is
+either recorded from Wikipedia or synthesized from a scraped dataset, with the
+markup of the Wikipedia skin around the content the extractors read and the same
+categories, articles and section word counts.
+
+A small corpus (the first two categories of `data_en.json`) is committed under
+`benchmarks/fixtures/corpus` and is the default of the benchmarks; it can be
+replaced in place by a recording.
+
+Usage:
+    python -m benchmarks.corpus record CATEGORY_URL DIRECTORY [--max-categories N]
+    python -m benchmarks.corpus synthesize DATA_FILE DIRECTORY [--max-categories N]
+"""
+
+import argparse
+import html
+import json
+import os
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import quote, unquote, urlparse
+
+import http_client
+import wikipedia_scrapping as ws
+from datasets import read_dataset
+
+# Constants
+MANIFEST = "manifest.json"
+DEFAULT_DIRECTORY = os.path.join(os.path.dirname(__file__), "fixtures", "corpus")
+SIDEBAR_LINKS = (
+    "Main_page",
+    "Contents",
+    "Current_events",
+    "Random_article",
+    "About_Wikipedia",
+    "Contact_us",
+    "Help:Contents",
+    "Help:Introduction",
+    "Community_portal",
+    "Recent_changes",
+    "Special:Upload",
+    "Special:SpecialPages",
+)
+
+
+def _page_file(directory: str, path: str) -> str:
+    return os.path.join(directory, "pages", quote(unquote(path), safe="") + ".html")
+
+
+def _path(url: str) -> str:
+    return unquote(urlparse(url).path)
+
+
+def _href(url: str) -> str:
+    return quote(_path(url))
+
+
+def save_page(directory: str, path: str, page: str):
+    """
+    Saves the HTML of the page at the given URL path.
+    """
+    file_path = _page_file(directory, path)
+    os.makedirs(os.path.dirname(file_path), exist_ok=True)
+    with open(file_path, "w", encoding="utf-8") as file:
+        file.write(page)
+
+
+def read_page(directory: str, path: str) -> str:
+    """
+    Returns the saved HTML of the page at the given URL path, or `None`.
+    """
+    try:
+        with open(_page_file(directory, path), "r", encoding="utf-8") as file:
+            return file.read()
+    except FileNotFoundError:
+        return None
+
+
+def read_manifest(directory: str) -> Dict[str, Any]:
+    with open(os.path.join(directory, MANIFEST), "r", encoding="utf-8") as file:
+        return json.load(file)
+
+
+def _write_manifest(directory: str, root: str, pages: int):
+    with open(os.path.join(directory, MANIFEST), "w", encoding="utf-8") as file:
+        json.dump({"root": root, "pages": pages}, file, ensure_ascii=False, indent=2)
+
+
+def iter_pages(directory: str) -> Iterator[Tuple[str, str]]:
+    """
+    Yields the URL path and the HTML of every saved page.
+    """
+    pages_directory = os.path.join(directory, "pages")
+    for name in sorted(os.listdir(pages_directory)):
+        with open(os.path.join(pages_directory, name), "r", encoding="utf-8") as file:
+            yield unquote(name[: -len(".html")]), file.read()
+
+
+def record(url: str, directory: str, max_categories: int = 20) -> int:
+    """
+    Downloads a category tree breadth first with all its articles.
+    Returns the number of saved pages.
+    """
+    base_url = ws._get_base_url(url)
+    queue = [unquote(url)]
+    seen = set(queue)
+    categories = 0
+    pages = 0
+
+    while queue and categories < max_categories:
+        category_url = queue.pop(0)
+        category_page = ws._fetch_url_text(category_url)
+        save_page(directory, _path(category_url), category_page)
+        categories += 1
+        pages += 1
+
+        _, _, articles_urls, subcategories_urls = ws._extract_category(
+            category_url, category_page, ws.DEFAULT_PARSER, False
+        )
+        for article_url in articles_urls:
+            if article_url not in seen:
+                seen.add(article_url)
+                save_page(
+                    directory, _path(article_url), ws._fetch_url_text(article_url)
+                )
+                pages += 1
+        for subcategory_url in subcategories_urls:
+            if subcategory_url not in seen and subcategory_url.startswith(base_url):
+                seen.add(subcategory_url)
+                queue.append(subcategory_url)
+
+    _write_manifest(directory, _path(url), pages)
+    return pages
+
+
+def _language_links(languages: List[str]) -> str:
+    return "".join(
+        f'<li><a class="interlanguage-link-target" href="{html.escape(url)}">'
+        f"{html.escape(urlparse(url).netloc.split('.')[0])}</a></li>"
+        for url in languages
+    )
+
+
+def _sidebar() -> str:
+    return "".join(
+        f'<li class="mw-list-item"><a href="/wiki/{link}">'
+        f'<span>{link.split(":")[-1].replace("_", " ")}</span></a></li>'
+        for link in SIDEBAR_LINKS
+    )
+
+
+def _page(name: str, languages: List[str], content: str) -> str:
+    """
+    Wraps the content in the layout of a Wikipedia page: the head with its styles
+    and scripts, the header, the sidebar, the language links and the footer.
+    """
+    return (
+        '<!DOCTYPE html><html class="client-nojs" lang="en" dir="ltr"><head>'
+        f'<meta charset="UTF-8"><title>{html.escape(name)} - Wikipedia</title>'
+        '<link rel="stylesheet" href="/w/load.php?modules=skins.vector.styles">'
+        "<style>.mw-parser-output .hatnote{font-style:italic}</style>"
+        '<script>document.documentElement.className="client-js";</script>'
+        '</head><body class="skin-vector mediawiki ltr">'
+        '<header class="vector-header mw-header"><a href="/wiki/Main_Page">'
+        'Wikipedia</a><form action="/w/index.php" id="searchform">'
+        '<input type="search" name="search"></form></header>'
+        '<div class="vector-main-menu"><ul class="vector-menu-content-list">'
+        f"{_sidebar()}</ul></div>"
+        '<div id="p-lang" class="vector-menu"><ul class="vector-menu-content-list">'
+        f"{_language_links(languages)}</ul></div>"
+        '<main id="content" class="mw-body"><h1 id="firstHeading">'
+        f'<span class="mw-page-title-main">{html.escape(name)}</span></h1>'
+        '<div id="mw-content-text" class="mw-body-content">'
+        f'<div class="mw-content-ltr mw-parser-output">{content}</div></div>'
+        '<div id="catlinks" class="catlinks"><a href="/wiki/Help:Category">'
+        "Categories</a></div></main>"
+        '<footer id="footer" class="mw-footer"><ul id="footer-places">'
+        '<li><a href="/wiki/Wikipedia:About">About Wikipedia</a></li>'
+        '<li><a href="/wiki/Wikipedia:General_disclaimer">Disclaimers</a></li>'
+        "</ul></footer></body></html>"
+    )
+
+
+def article_page(article: Dict[str, Any]) -> str:
+    """
+    Builds the page of an article record, with every section holding as many words
+    as its word count.
+    """
+    sections = "".join(
+        '<div class="mw-heading mw-heading2">'
+        f"<h2>{html.escape(section['name'])}</h2></div>"
+        f"<p>{' '.join(['word'] * section['word_count'])}</p>"
+        for section in article["sections"]
+    )
+    return _page(
+        article["name"],
+        article["languages"],
+        f'<p>Lead.</p>{sections}<div class="mw-authority-control">Authority</div>',
+    )
+
+
+def category_page(category: Dict[str, Any], subcategories: List[Dict[str, Any]]) -> str:
+    """
+    Builds the page of a category record with its subcategory tree and articles.
+    """
+    tree = "".join(
+        '<div class="CategoryTreeSection"><div class="CategoryTreeItem">'
+        f'<a href="{_href(subcategory["id"])}" title="{html.escape(subcategory["name"])}">'
+        f"{html.escape(subcategory['name'])}</a></div></div>"
+        for subcategory in subcategories
+    )
+    articles = "".join(
+        f'<li><a href="{_href(article["id"])}" title="{html.escape(article["name"])}">'
+        f"{html.escape(article['name'])}</a></li>"
+        for article in category["articles"]
+    )
+    return _page(
+        category["name"],
+        category["languages"],
+        f'<div id="mw-subcategories">{tree}</div>'
+        f'<div id="mw-pages"><div class="mw-category"><ul>{articles}</ul></div></div>',
+    )
+
+
+def _first_categories(
+    categories: List[Dict[str, Any]], max_categories: int
+) -> List[Dict[str, Any]]:
+    """
+    Returns the first categories of the tree breadth first, as `record` visits them.
+    """
+    children = {}
+    for category in categories:
+        children.setdefault(category["parent_id"], []).append(category)
+
+    queue = [categories[0]]
+    selected = []
+    while queue and len(selected) < max_categories:
+        category = queue.pop(0)
+        selected.append(category)
+        queue.extend(children.get(category["id"], []))
+    return selected
+
+
+def synthesize(data_path: str, directory: str, max_categories: int = None) -> int:
+    """
+    Builds a corpus from a scraped dataset (JSON or JSONL, compressed or not),
+    limited to its first `max_categories` categories if given.
+    Returns the number of saved pages.
+    """
+    categories = list(read_dataset(data_path))
+    if max_categories is not None:
+        categories = _first_categories(categories, max_categories)
+
+    children = {}
+    for category in categories:
+        children.setdefault(category["parent_id"], []).append(category)
+
+    pages = set()
+    for category in categories:
+        save_page(
+            directory,
+            _path(category["id"]),
+            category_page(category, children.get(category["id"], [])),
+        )
+        pages.add(category["id"])
+        for article in category["articles"]:
+            if article["id"] not in pages:
+                save_page(directory, _path(article["id"]), article_page(article))
+                pages.add(article["id"])
+
+    _write_manifest(directory, _path(categories[0]["id"]), len(pages))
+    return len(pages)
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    commands = argument_parser.add_subparsers(dest="command", required=True)
+    record_parser = commands.add_parser("record", help="download a category tree")
+    record_parser.add_argument("url")
+    record_parser.add_argument("directory")
+    record_parser.add_argument("--max-categories", type=int, default=20)
+    synthesize_parser = commands.add_parser(
+        "synthesize", help="build the pages of a scraped dataset"
+    )
+    synthesize_parser.add_argument("data_file")
+    synthesize_parser.add_argument("directory")
+    synthesize_parser.add_argument("--max-categories", type=int, default=None)
+    arguments = argument_parser.parse_args()
+
+    if arguments.command == "record":
+        http_client.configure()
+        pages = record(arguments.url, arguments.directory, arguments.max_categories)
+    else:
+        pages = synthesize(
+            arguments.data_file, arguments.directory, arguments.max_categories
+        )
+    print(f"{pages} pages saved in {arguments.directory}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,119 @@
+"""
+Compares the HTML parsing backends of the scraper on saved Wikipedia pages.
+
+For every parser (and with and without partial parsing) the saved pages are parsed
+and run through the article and category extractors. The time taken is reported,
+and the extracted records are checked to be identical to the ones of the reference
+configuration (`html.parser`, full document). Without paths, the pages of the
+committed corpus (see `benchmarks.corpus`) are used.
+
+Usage:
+    python -m benchmarks.parsers [PAGE_OR_DIRECTORY ...] [--repeat N]
+"""
+
+import argparse
+import os
+import time
+from typing import Any, Dict, List, Tuple
+
+import wikipedia_scrapping as ws
+from benchmarks import corpus
+
+# Constants
+PAGE_URL = "https://en.wikipedia.org/wiki/{}"
+REFERENCE = ("html.parser", False)
+
+
+def _read_pages(paths: List[str]) -> List[Tuple[str, str]]:
+    """
+    Reads the saved pages; directories are scanned for `.html` files.
+    Returns the page URLs (built from the file names) with their HTML.
+    """
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            files.extend(
+                os.path.join(path, name)
+                for name in sorted(os.listdir(path))
+                if name.endswith(".html")
+            )
+        else:
+            files.append(path)
+
+    pages = []
+    for file_path in files:
+        with open(file_path, "r", encoding="utf-8") as file:
+            name = os.path.splitext(os.path.basename(file_path))[0]
+            pages.append((PAGE_URL.format(name), file.read()))
+    return pages
+
+
+def _extract(url: str, html: str, parser: str, partial: bool) -> Dict[str, Any]:
+    """
+    Runs all the extractors on a page, as the crawler would.
+    """
+    soup = ws._parse_html(html, parser, partial)
+    record = {"article": ws._parse_article_data(url, soup)}
+    if soup.select_one("#mw-pages, .CategoryTreeItem") is not None:
+        record["category"] = ws._parse_category_page(url, soup)
+    return record
+
+
+def run(pages: List[Tuple[str, str]], repeat: int = 3) -> List[Dict[str, Any]]:
+    """
+    Benchmarks every available parser on the pages.
+    Returns one result per configuration with the best time out of `repeat` runs.
+    """
+    configurations = [
+        (parser, partial)
+        for parser in ws.PARSERS
+        if ws.is_parser_available(parser)
+        for partial in (False, True)
+    ]
+
+    reference = [_extract(url, html, *REFERENCE) for url, html in pages]
+
+    results = []
+    for parser, partial in configurations:
+        best = None
+        for _ in range(repeat):
+            start = time.perf_counter()
+            records = [_extract(url, html, parser, partial) for url, html in pages]
+            elapsed = time.perf_counter() - start
+            best = elapsed if best is None else min(best, elapsed)
+
+        results.append(
+            {
+                "parser": parser,
+                "partial": partial,
+                "seconds": round(best, 4),
+                "pages_per_second": round(len(pages) / best, 2) if best else None,
+                "identical": records == reference,
+            }
+        )
+    return results
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    argument_parser.add_argument(
+        "paths",
+        nargs="*",
+        default=[os.path.join(corpus.DEFAULT_DIRECTORY, "pages")],
+        help="saved pages or directories",
+    )
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    arguments = argument_parser.parse_args()
+
+    pages = _read_pages(arguments.paths)
+    print(f"{len(pages)} pages")
+    for result in run(pages, arguments.repeat):
+        print(
+            f"{result['parser']:<12} partial={str(result['partial']):<6}"
+            f" {result['seconds']:>8}s {result['pages_per_second']:>8} pages/s"
+            f" identical={result['identical']}"
+        )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,306 @@
+"""
+A local stub of Wikipedia serving a page corpus (see `benchmarks.corpus`) over HTTP,
+with a configurable latency and rate of `429 Too Many Requests` answers, so the
+crawler can be benchmarked without touching the live site. Like Wikipedia, pages are
+sent gzip compressed to the clients accepting it, with an `ETag` to revalidate them.
+
+The stub also answers the MediaWiki API queries of the "api" backend at
+`/w/api.php`, from the same pages: `list=categorymembers` (with continuation),
+`prop=langlinks`, `prop=info` and `action=parse`.
+
+Usage:
+    python -m benchmarks.stub_server CORPUS [--port N] [--latency S] [--error-rate R]
+        [--no-compression]
+"""
+
+import argparse
+import gzip
+import json
+import random
+import threading
+import time
+import zlib
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from typing import Any, Dict, List
+from urllib.parse import parse_qs, unquote, urlsplit
+
+import mediawiki_api
+import wikipedia_scrapping as ws
+from benchmarks import corpus
+
+# Constants
+MEMBERS_PER_RESPONSE = 20  # categorymembers per answer, so that clients continue
+# Namespaces of the page titles found in the corpora, by prefix
+NAMESPACES = {
+    "Category": 14,
+    "Categoría": 14,
+    "Template": 10,
+    "Plantilla": 10,
+    "Portal": 100,
+    "Anexo": 104,
+}
+
+
+def _namespace(title: str) -> int:
+    """
+    Returns the namespace of a page title, as MediaWiki does: from its prefix if it
+    is a known namespace, the main namespace otherwise.
+    """
+    prefix, separator, _ = title.partition(":")
+    return NAMESPACES.get(prefix, 0) if separator else 0
+
+
+class StubServer:
+    """
+    Serves a corpus from a background thread; use it as a context manager.
+
+    Every request waits `latency` seconds, then a random `error_rate` fraction of
+    them is answered with a 429 and a `Retry-After` header. `counts` holds the
+    number of answers by status code. With `compression`, pages are gzip compressed
+    when the request accepts it. With `validators`, pages are sent with an `ETag`
+    (the CRC-32 of the page) and answered with a `304 Not Modified` when the
+    request has it in `If-None-Match`. Requests to `mediawiki_api.API_PATH` are answered
+    from the pages of the corpus as the MediaWiki API would.
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        port: int = 0,
+        latency: float = 0.0,
+        error_rate: float = 0.0,
+        retry_after: int = 1,
+        seed: int = 0,
+        compression: bool = True,
+        validators: bool = True,
+    ):
+        self.directory = directory
+        self.latency = latency
+        self.error_rate = error_rate
+        self.retry_after = retry_after
+        self.compression = compression
+        self.validators = validators
+        self.random = random.Random(seed)
+        self.counts: Dict[int, int] = {}
+        self.pages: Dict[str, Dict[str, Any]] = {}
+        self.lock = threading.Lock()
+        self.server = ThreadingHTTPServer(("127.0.0.1", port), self._handler())
+        self.server.daemon_threads = True
+        self.thread = None
+
+    @property
+    def url(self) -> str:
+        host, port = self.server.server_address[:2]
+        return f"http://{host}:{port}"
+
+    def _answer(self) -> int:
+        with self.lock:
+            return 429 if self.random.random() < self.error_rate else 200
+
+    def _count(self, status: int):
+        with self.lock:
+            self.counts[status] = self.counts.get(status, 0) + 1
+
+    def _page(self, title: str) -> Dict[str, Any]:
+        """
+        Returns what the API tells about a page of the corpus, or `None` if the
+        corpus does not have it.
+        """
+        with self.lock:
+            if title in self.pages:
+                return self.pages[title]
+
+        url = mediawiki_api.page_url("", title)
+        html = corpus.read_page(self.directory, url)
+        page = None
+        if html is not None:
+            soup = ws._parse_html(html)
+            content = soup.find(class_="mw-parser-output")
+            page = {
+                "title": title,
+                "ns": _namespace(title),
+                "lastrevid": zlib.crc32(html.encode("utf-8")),
+                "text": str(content) if content is not None else "",
+                "languages": [
+                    link["href"]
+                    for link in soup.find_all(
+                        "a", class_="interlanguage-link-target", href=True
+                    )
+                ],
+                "members": [],
+            }
+            if soup.find(id="mw-pages") is not None:
+                _, _, articles_urls, subcategories_urls = ws._parse_category_page(
+                    url, soup
+                )
+                page["members"] = [
+                    mediawiki_api.title_from_url(member_url)
+                    for member_url in articles_urls + subcategories_urls
+                ]
+
+        with self.lock:
+            self.pages[title] = page
+        return page
+
+    def _query_pages(self, titles: List[str], props: List[str]) -> List[Dict[str, Any]]:
+        pages = []
+        for title in titles:
+            page = self._page(title)
+            if page is None:
+                pages.append({"ns": _namespace(title), "title": title, "missing": True})
+                continue
+
+            result = {"ns": page["ns"], "title": title}
+            if "info" in props:
+                result["lastrevid"] = page["lastrevid"]
+            if "langlinks" in props:
+                result["langlinks"] = [
+                    {"lang": urlsplit(url).netloc.split(".")[0], "url": url}
+                    for url in page["languages"]
+                ]
+            pages.append(result)
+        return pages
+
+    def api(self, params: Dict[str, str]) -> Dict[str, Any]:
+        """
+        Answers an API request (formatversion 2) from the corpus.
+        """
+        if params.get("action") == "parse":
+            page = self._page(params.get("page", ""))
+            if page is None:
+                return {
+                    "error": {
+                        "code": "missingtitle",
+                        "info": "The page you specified doesn't exist.",
+                    }
+                }
+            return {"parse": {"title": page["title"], "text": page["text"]}}
+
+        if params.get("action") != "query":
+            return {"error": {"code": "badvalue", "info": "Unsupported action."}}
+
+        if params.get("list") == "categorymembers":
+            page = self._page(params.get("cmtitle", ""))
+            members = page["members"] if page is not None else []
+            start = int(params.get("cmcontinue", 0))
+            end = start + MEMBERS_PER_RESPONSE
+            result = {
+                "batchcomplete": True,
+                "query": {
+                    "categorymembers": [
+                        {"ns": _namespace(title), "title": title}
+                        for title in members[start:end]
+                    ]
+                },
+            }
+            if end < len(members):
+                result["continue"] = {"cmcontinue": str(end), "continue": "-||"}
+            return result
+
+        titles = params.get("titles", "").split("|")
+        return {
+            "batchcomplete": True,
+            "query": {
+                "pages": self._query_pages(titles, params.get("prop", "").split("|"))
+            },
+        }
+
+    def _handler(self):
+        stub = self
+
+        class Handler(BaseHTTPRequestHandler):
+            protocol_version = "HTTP/1.1"
+            # The headers and the body are sent in two writes: without this, each
+            # response stalls on a delayed ACK
+            disable_nagle_algorithm = True
+
+            def do_GET(self):
+                if stub.latency:
+                    time.sleep(stub.latency)
+
+                url = urlsplit(self.path)
+                content_type = "text/html; charset=UTF-8"
+                if url.path == mediawiki_api.API_PATH:
+                    params = {
+                        name: values[0] for name, values in parse_qs(url.query).items()
+                    }
+                    page = json.dumps(stub.api(params), ensure_ascii=False)
+                    content_type = "application/json; charset=utf-8"
+                else:
+                    page = corpus.read_page(stub.directory, unquote(url.path))
+                status = 404 if page is None else stub._answer()
+                etag = None
+                if status == 200 and stub.validators:
+                    etag = f'"{zlib.crc32(page.encode("utf-8")):08x}"'
+                    if self.headers.get("If-None-Match") == etag:
+                        status = 304
+                stub._count(status)
+                body = page.encode("utf-8") if status == 200 else b""
+                compressed = (
+                    stub.compression
+                    and body
+                    and "gzip" in self.headers.get("Accept-Encoding", "")
+                )
+                if compressed:
+                    body = gzip.compress(body, compresslevel=6)
+
+                self.send_response(status)
+                self.send_header("Content-Type", content_type)
+                self.send_header("Vary", "Accept-Encoding")
+                if compressed:
+                    self.send_header("Content-Encoding", "gzip")
+                if etag is not None:
+                    self.send_header("ETag", etag)
+                self.send_header("Content-Length", str(len(body)))
+                if status == 429:
+                    self.send_header("Retry-After", str(stub.retry_after))
+                self.end_headers()
+                self.wfile.write(body)
+
+            def log_message(self, *args):
+                pass
+
+        return Handler
+
+    def start(self) -> "StubServer":
+        self.thread = threading.Thread(target=self.server.serve_forever, daemon=True)
+        self.thread.start()
+        return self
+
+    def stop(self):
+        self.server.shutdown()
+        self.server.server_close()
+
+    def __enter__(self) -> "StubServer":
+        return self.start()
+
+    def __exit__(self, *exc_info):
+        self.stop()
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    argument_parser.add_argument("corpus")
+    argument_parser.add_argument("--port", type=int, default=8000)
+    argument_parser.add_argument("--latency", type=float, default=0.0)
+    argument_parser.add_argument("--error-rate", type=float, default=0.0)
+    argument_parser.add_argument("--no-compression", action="store_true")
+    arguments = argument_parser.parse_args()
+
+    server = StubServer(
+        arguments.corpus,
+        arguments.port,
+        arguments.latency,
+        arguments.error_rate,
+        compression=not arguments.no_compression,
+    )
+    root = corpus.read_manifest(arguments.corpus)["root"]
+    print(f"Serving {arguments.corpus} on {server.url}{root}")
+    try:
+        server.server.serve_forever()
+    except KeyboardInterrupt:
+        server.stop()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,304 @@
+"""
+Runs the offline benchmark suite and reports the results as JSON.
+
+Nothing touches the live site: pages come from a corpus (see `benchmarks.corpus`;
+the committed one by default, or synthesized from the first data file with
+`--synthesize`) and the crawl runs against the local stub server. The suite times:
+
+- parse: parsing and extracting every article page, as the parse stage of the
+  crawl does after the download;
+- sections: the section word counting on already parsed articles;
+- crawl: a full `scrape_category` of the corpus through the stub server, with its
+  latency, 429 rate and gzip compression, and the bytes sent over the wire;
+- load: `database.load` of the data files as records, as columnar tables and from
+  snapshots;
+- formats: the size and the `database.load` time of the data files rewritten in
+  every dataset format (compact JSON and JSONL, uncompressed, gzip and Zstandard
+  when the `zstandard` package is installed);
+- aggregate: the aggregation pipeline behind the charts on the first two data files.
+
+Usage:
+    python -m benchmarks.suite [--corpus DIR | --synthesize] [--data FILE ...]
+        [--latency S] [--error-rate R] [--no-compression] [--output FILE]
+"""
+
+import argparse
+import json
+import logging
+import os
+import platform
+import shutil
+import tempfile
+import time
+from typing import Any, Callable, Dict, List, Tuple
+from urllib.parse import quote
+
+import database as db
+import datasets
+import wikipedia_scrapping as ws
+from aggregations import aggregate, compare
+from benchmarks import corpus
+from benchmarks.stub_server import StubServer
+from language_coverage import Coverage
+
+# Constants
+PAGE_URL = "http://localhost{}"
+FORMATS = (".json", ".json.gz", ".json.zst", ".jsonl", ".jsonl.gz", ".jsonl.zst")
+
+
+def _best_time(func: Callable[[], Any], repeat: int) -> float:
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def _articles(corpus_directory: str) -> List[Tuple[str, str]]:
+    return [
+        (PAGE_URL.format(path), page)
+        for path, page in corpus.iter_pages(corpus_directory)
+        if 'id="mw-pages"' not in page
+    ]
+
+
+def bench_parse(
+    articles: List[Tuple[str, str]], parser: str, partial: bool, repeat: int
+) -> Dict[str, Any]:
+    seconds = _best_time(
+        lambda: [
+            ws._extract_article(url, page, parser, partial) for url, page in articles
+        ],
+        repeat,
+    )
+    return {
+        "parser": parser,
+        "partial": partial,
+        "pages": len(articles),
+        "seconds": round(seconds, 4),
+        "pages_per_second": round(len(articles) / seconds, 2) if seconds else None,
+    }
+
+
+def bench_sections(
+    articles: List[Tuple[str, str]], parser: str, repeat: int
+) -> Dict[str, Any]:
+    soups = [ws._parse_html(page, parser) for _, page in articles]
+    seconds = _best_time(lambda: [ws._extract_sections(soup) for soup in soups], repeat)
+    return {
+        "pages": len(soups),
+        "seconds": round(seconds, 4),
+        "pages_per_second": round(len(soups) / seconds, 2) if seconds else None,
+    }
+
+
+def bench_crawl(
+    corpus_directory: str,
+    latency: float,
+    error_rate: float,
+    max_concurrency: int,
+    rate: float,
+    parse_workers: int,
+    compression: bool = True,
+) -> Dict[str, Any]:
+    root = corpus.read_manifest(corpus_directory)["root"]
+    transfer = {"bytes": 0, "decoded_bytes": 0}
+
+    def count_bytes(event: Dict[str, Any]):
+        if event["type"] == "request" and event["status"] is not None:
+            transfer["bytes"] += event["bytes"]
+            transfer["decoded_bytes"] += event["decoded_bytes"]
+
+    with StubServer(
+        corpus_directory,
+        latency=latency,
+        error_rate=error_rate,
+        compression=compression,
+    ) as stub:
+        start = time.perf_counter()
+        data = ws.scrape_category(
+            stub.url + quote(root),
+            max_concurrency=max_concurrency,
+            rate=rate,
+            parse_workers=parse_workers,
+            metrics_hook=count_bytes,
+        )
+        seconds = time.perf_counter() - start
+        responses = dict(stub.counts)
+
+    articles = sum(len(category["articles"]) for category in data)
+    return {
+        "latency": latency,
+        "error_rate": error_rate,
+        "max_concurrency": max_concurrency,
+        "rate": rate,
+        "parse_workers": parse_workers,
+        "compression": compression,
+        "categories": len(data),
+        "articles": articles,
+        "responses": {str(status): count for status, count in responses.items()},
+        **transfer,
+        "seconds": round(seconds, 4),
+        "articles_per_second": round(articles / seconds, 2) if seconds else None,
+    }
+
+
+def bench_load(data_paths: List[str], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for data_path in data_paths:
+            # Snapshots are written next to the data file: work on a copy
+            path = os.path.join(directory, os.path.basename(data_path))
+            shutil.copyfile(data_path, path)
+            key = f"benchmark-{len(results)}"
+
+            def timed(**options) -> float:
+                return round(
+                    _best_time(lambda: db.load(key, path, **options), repeat), 4
+                )
+
+            result = {"data": data_path, "records": timed()}
+            result["columnar"] = timed(columnar=True)
+            db.load(key, path, snapshot=True)
+            result["records_snapshot"] = timed(snapshot=True)
+            db.load(key, path, columnar=True, snapshot=True)
+            result["columnar_snapshot"] = timed(columnar=True, snapshot=True)
+            results.append(result)
+            db.stores.pop(key, None)
+    return results
+
+
+def bench_formats(data_paths: List[str], repeat: int) -> List[Dict[str, Any]]:
+    results = []
+    with tempfile.TemporaryDirectory() as directory:
+        for data_path in data_paths:
+            categories = list(datasets.read_dataset(data_path))
+            result = {"data": data_path, "bytes": os.path.getsize(data_path)}
+            for extension in FORMATS:
+                path = os.path.join(directory, "benchmark" + extension)
+                try:
+                    datasets.write_dataset(path, categories)
+                except ImportError:
+                    continue  # zstandard is not installed
+                seconds = _best_time(lambda: db.load("benchmark", path), repeat)
+                result[extension] = {
+                    "bytes": os.path.getsize(path),
+                    "seconds": round(seconds, 4),
+                }
+            results.append(result)
+    for loaded in (db.database, db.index, db.articles):
+        loaded.pop("benchmark", None)
+    return results
+
+
+def bench_aggregate(data_paths: List[str], repeat: int) -> Dict[str, Any]:
+    tables = []
+    for i, data_path in enumerate(data_paths[:2]):
+        db.load(f"aggregate-{i}", data_path, columnar=True)
+        tables.append(db.stores.pop(f"aggregate-{i}"))
+    first, second = tables
+
+    def pipeline():
+        aggregates = aggregate(first), aggregate(second)
+        coverage = Coverage({"first": first, "second": second})
+        compare(coverage, "first", aggregates[0], "second")
+        compare(coverage, "second", aggregates[1], "first")
+
+    seconds = _best_time(pipeline, repeat)
+    articles = len(first.article_ids) + len(second.article_ids)
+    return {
+        "data": data_paths[:2],
+        "articles": articles,
+        "seconds": round(seconds, 4),
+        "articles_per_second": round(articles / seconds, 2) if seconds else None,
+    }
+
+
+def run(arguments: argparse.Namespace, corpus_directory: str) -> Dict[str, Any]:
+    articles = _articles(corpus_directory)
+    return {
+        "environment": {
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpus": os.cpu_count(),
+        },
+        "corpus": {
+            "directory": corpus_directory,
+            **corpus.read_manifest(corpus_directory),
+        },
+        "parse": [
+            bench_parse(articles, parser, partial, arguments.repeat)
+            for parser, partial in (
+                (ws.DEFAULT_PARSER, False),
+                (ws.DEFAULT_PARSER, True),
+            )
+        ],
+        "sections": bench_sections(articles, ws.DEFAULT_PARSER, arguments.repeat),
+        "crawl": bench_crawl(
+            corpus_directory,
+            arguments.latency,
+            arguments.error_rate,
+            arguments.concurrency,
+            arguments.rate,
+            arguments.parse_workers,
+            not arguments.no_compression,
+        ),
+        "load": bench_load(arguments.data, arguments.repeat),
+        "formats": bench_formats(arguments.data, arguments.repeat),
+        "aggregate": (
+            bench_aggregate(arguments.data, arguments.repeat)
+            if len(arguments.data) >= 2
+            else None
+        ),
+    }
+
+
+def main():
+    argument_parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    argument_parser.add_argument(
+        "--corpus", default=corpus.DEFAULT_DIRECTORY, help="corpus directory"
+    )
+    argument_parser.add_argument(
+        "--synthesize",
+        action="store_true",
+        help="synthesize the corpus from the first data file",
+    )
+    argument_parser.add_argument(
+        "--data", nargs="+", default=["data_es.json", "data_en.json"]
+    )
+    argument_parser.add_argument("--latency", type=float, default=0.05)
+    argument_parser.add_argument("--error-rate", type=float, default=0.0)
+    argument_parser.add_argument(
+        "--concurrency", type=int, default=ws.DEFAULT_MAX_CONCURRENCY
+    )
+    argument_parser.add_argument("--rate", type=float, default=0)
+    argument_parser.add_argument("--parse-workers", type=int, default=None)
+    argument_parser.add_argument("--no-compression", action="store_true")
+    argument_parser.add_argument("--repeat", type=int, default=3)
+    argument_parser.add_argument("--output", help="JSON file (default: stdout)")
+    arguments = argument_parser.parse_args()
+
+    logging.getLogger().setLevel(logging.WARNING)
+
+    with tempfile.TemporaryDirectory() as directory:
+        corpus_directory = arguments.corpus
+        if arguments.synthesize:
+            corpus_directory = os.path.join(directory, "corpus")
+            corpus.synthesize(arguments.data[0], corpus_directory)
+        results = run(arguments, corpus_directory)
+
+    if arguments.synthesize:
+        results["corpus"]["directory"] = f"synthesized from {arguments.data[0]}"
+
+    report = json.dumps(results, ensure_ascii=False, indent=2)
+    if arguments.output:
+        with open(arguments.output, "w", encoding="utf-8") as file:
+            file.write(report + "\n")
+    else:
+        print(report)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,102 @@
+"""
+This module persists the progress of a crawl so it can be resumed after a failure.
+
+The checkpoint is an append-only JSONL file. The first line identifies the crawl and
+every following line holds a completed category record together with the URLs of its
+subcategories, so the visited set (the completed categories) and the frontier (the
+subcategories not completed yet) can be rebuilt from it. Lines are written as soon as
+a category is complete, and a truncated last line (e.g. the process was killed while
+writing it) is ignored on resume.
+"""
+
+import json
+import logging
+import os
+from typing import Any, Dict, List, Tuple
+
+
+class CrawlCheckpoint:
+    """
+    Append-only JSONL checkpoint of a category crawl.
+    """
+
+    def __init__(self, path: str, url: str, resume: bool = False):
+        """
+        Opens the checkpoint of the crawl of `url`.
+
+        Args:
+            path (str): The checkpoint file.
+            url (str): The root category URL of the crawl.
+            resume (bool): Load the completed categories of an existing checkpoint
+                instead of starting a new one.
+
+        Raises:
+            ValueError: If the checkpoint to resume belongs to another crawl.
+        """
+        self.path = path
+        self.completed: Dict[str, Tuple[Dict[str, Any], List[str]]] = {}
+
+        if resume and os.path.exists(path):
+            self._load(url)
+            self._truncate_incomplete_line()
+            self.file = open(path, "a", encoding="utf-8")
+        else:
+            self.file = open(path, "w", encoding="utf-8")
+            self._write({"type": "crawl", "url": url})
+
+    def _load(self, url: str):
+        with open(self.path, "r", encoding="utf-8") as file:
+            for number, line in enumerate(file):
+                try:
+                    entry = json.loads(line)
+                except json.JSONDecodeError:
+                    logging.warning("Ignoring incomplete checkpoint line %d", number + 1)
+                    continue
+
+                if entry["type"] == "crawl":
+                    if entry["url"] != url:
+                        raise ValueError(
+                            f"Checkpoint {self.path} belongs to the crawl of {entry['url']}"
+                        )
+                elif entry["type"] == "category":
+                    self.completed[entry["record"]["id"]] = (
+                        entry["record"],
+                        entry["subcategories"],
+                    )
+
+        logging.info(
+            "Resuming from checkpoint %s with %d completed categories",
+            self.path,
+            len(self.completed),
+        )
+
+    def _truncate_incomplete_line(self):
+        """
+        Drops a partially written last line so new lines start on a fresh line.
+        """
+        with open(self.path, "rb+") as file:
+            content = file.read()
+            end = content.rfind(b"\n") + 1
+            if end < len(content):
+                file.truncate(end)
+
+    def _write(self, entry: Dict[str, Any]):
+        self.file.write(json.dumps(entry, ensure_ascii=False) + "\n")
+        self.file.flush()
+
+    def save(self, record: Dict[str, Any], subcategories_urls: List[str]):
+        """
+        Persists a completed category record and the subcategories still to visit.
+        """
+        self.completed[record["id"]] = (record, subcategories_urls)
+        self._write(
+            {"type": "category", "record": record, "subcategories": subcategories_urls}
+        )
+
+    def close(self):
+        """
+        Flushes the checkpoint to disk and closes it.
+        """
+        self.file.flush()
+        os.fsync(self.file.fileno())
+        self.file.close()
@@ -0,0 +1,265 @@
+"""
+This module holds a scraped dataset as columnar NumPy tables instead of a tree of
+dictionaries.
+
+Categories, articles and sections are rows identified by their position, and the
+nested lists of the tree (the articles of a category, the sections of an article
+and the language links of a page) become offset arrays into a flat column: the
+items of row `i` are `column[offsets[i]:offsets[i + 1]]`. Articles listed in several
+categories are stored once, and language link URLs are interned. Counts, sums and
+distributions can then be computed with vectorized NumPy operations.
+"""
+
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterable, List, Set
+
+import numpy as np
+
+
+def _offsets(lengths: List[int]) -> np.ndarray:
+    offsets = np.zeros(len(lengths) + 1, dtype=np.int64)
+    np.cumsum(lengths, out=offsets[1:])
+    return offsets
+
+
+def _segment_sums(values: np.ndarray, offsets: np.ndarray) -> np.ndarray:
+    """
+    Sums every segment of a column, including the empty ones.
+    """
+    totals = np.zeros(len(values) + 1, dtype=np.int64)
+    np.cumsum(values, out=totals[1:])
+    return totals[offsets[1:]] - totals[offsets[:-1]]
+
+
+@dataclass
+class ColumnarDataset:
+    """
+    Columnar tables of a dataset.
+
+    Categories: `category_ids`, `category_names`, `category_parents` (row of the
+    parent category, -1 for none) and `category_articles` (offsets into
+    `memberships`, the article row of every article of every category).
+
+    Articles: `article_ids`, `article_names`, `article_revision_ids` (-1 for none),
+    `article_sections` (offsets into the section columns), `article_word_counts`,
+    `article_sections_counts` and `article_categories` (offsets into
+    `article_category_rows`, the category row of every membership of every
+    article, so the categories of an article are found without a scan).
+
+    Sections: `section_names` and `section_word_counts`.
+
+    Language links: `languages` holds every distinct URL once, and
+    `category_languages` / `article_languages` are offsets into
+    `category_language_codes` / `article_language_codes`, rows of `languages`.
+    """
+
+    category_ids: np.ndarray
+    category_names: np.ndarray
+    category_parents: np.ndarray
+    category_articles: np.ndarray
+    memberships: np.ndarray
+    article_ids: np.ndarray
+    article_names: np.ndarray
+    article_revision_ids: np.ndarray
+    article_sections: np.ndarray
+    section_names: np.ndarray
+    section_word_counts: np.ndarray
+    languages: np.ndarray
+    category_languages: np.ndarray
+    category_language_codes: np.ndarray
+    article_languages: np.ndarray
+    article_language_codes: np.ndarray
+    article_word_counts: np.ndarray = field(init=False)
+    article_sections_counts: np.ndarray = field(init=False)
+    article_categories: np.ndarray = field(init=False)
+    article_category_rows: np.ndarray = field(init=False)
+    article_rows: Dict[str, int] = field(init=False, repr=False)
+    language_rows: Dict[str, int] = field(init=False, repr=False)
+
+    def __post_init__(self):
+        self.article_word_counts = _segment_sums(
+            self.section_word_counts, self.article_sections
+        )
+        self.article_sections_counts = np.diff(self.article_sections)
+        # Memberships grouped by article, in the order of the categories
+        membership_categories = np.repeat(
+            np.arange(len(self.category_ids)), self.category_article_counts()
+        )
+        self.article_categories = _offsets(
+            np.bincount(self.memberships, minlength=len(self.article_ids))
+        )
+        self.article_category_rows = membership_categories[
+            np.argsort(self.memberships, kind="stable")
+        ]
+        self.article_rows = {url: row for row, url in enumerate(self.article_ids)}
+        self.language_rows = {url: row for row, url in enumerate(self.languages)}
+
+    @classmethod
+    def from_records(cls, categories: Iterable[Dict[str, Any]]) -> "ColumnarDataset":
+        """
+        Builds the tables from category records, consumed one by one, so a JSONL
+        dataset never has to be held in memory as a tree.
+        Only the first occurrence of an article is stored.
+        """
+        category_ids, category_names, parent_ids = [], [], []
+        category_lengths, memberships = [], []
+        article_ids, article_names, revision_ids, section_lengths = [], [], [], []
+        section_names, section_word_counts = [], []
+        languages: Dict[str, int] = {}
+        category_language_lengths, category_language_codes = [], []
+        article_language_lengths, article_language_codes = [], []
+        article_rows: Dict[str, int] = {}
+
+        def intern(urls: List[str], codes: List[int]):
+            for url in urls:
+                codes.append(languages.setdefault(url, len(languages)))
+
+        for category in categories:
+            category_ids.append(category["id"])
+            category_names.append(category["name"])
+            parent_ids.append(category["parent_id"])
+            category_language_lengths.append(len(category["languages"]))
+            intern(category["languages"], category_language_codes)
+
+            category_lengths.append(len(category["articles"]))
+            for article in category["articles"]:
+                row = article_rows.get(article["id"])
+                if row is None:
+                    row = len(article_ids)
+                    article_rows[article["id"]] = row
+                    article_ids.append(article["id"])
+                    article_names.append(article["name"])
+                    revision_ids.append(article.get("revision_id", -1))
+                    section_lengths.append(len(article["sections"]))
+                    for section in article["sections"]:
+                        section_names.append(section["name"])
+                        section_word_counts.append(section["word_count"])
+                    article_language_lengths.append(len(article["languages"]))
+                    intern(article["languages"], article_language_codes)
+                memberships.append(row)
+
+        category_rows = {url: row for row, url in enumerate(category_ids)}
+        return cls(
+            category_ids=np.array(category_ids, dtype=object),
+            category_names=np.array(category_names, dtype=object),
+            category_parents=np.array(
+                [category_rows.get(parent, -1) for parent in parent_ids],
+                dtype=np.int64,
+            ),
+            category_articles=_offsets(category_lengths),
+            memberships=np.array(memberships, dtype=np.int64),
+            article_ids=np.array(article_ids, dtype=object),
+            article_names=np.array(article_names, dtype=object),
+            article_revision_ids=np.array(revision_ids, dtype=np.int64),
+            article_sections=_offsets(section_lengths),
+            section_names=np.array(section_names, dtype=object),
+            section_word_counts=np.array(section_word_counts, dtype=np.int64),
+            languages=np.array(list(languages), dtype=object),
+            category_languages=_offsets(category_language_lengths),
+            category_language_codes=np.array(category_language_codes, dtype=np.int64),
+            article_languages=_offsets(article_language_lengths),
+            article_language_codes=np.array(article_language_codes, dtype=np.int64),
+        )
+
+    def category_article_counts(self) -> np.ndarray:
+        """
+        Returns the number of articles of every category.
+        """
+        return np.diff(self.category_articles)
+
+    def read_categories(self) -> List[dict]:
+        """
+        Rebuilds the category records of the tree.
+        """
+        categories = []
+        for row, url in enumerate(self.category_ids):
+            parent = self.category_parents[row]
+            languages_start, languages_end = self.category_languages[row : row + 2]
+            articles_start, articles_end = self.category_articles[row : row + 2]
+            categories.append(
+                {
+                    "id": url,
+                    "parent_id": None if parent < 0 else self.category_ids[parent],
+                    "name": self.category_names[row],
+                    "languages": self.languages[
+                        self.category_language_codes[languages_start:languages_end]
+                    ].tolist(),
+                    "articles": [
+                        self._article_record(article_row)
+                        for article_row in self.memberships[articles_start:articles_end]
+                    ],
+                }
+            )
+        return categories
+
+    def _article_record(self, row: int) -> Dict[str, Any]:
+        sections_start, sections_end = self.article_sections[row : row + 2]
+        languages_start, languages_end = self.article_languages[row : row + 2]
+        article = {
+            "id": self.article_ids[row],
+            "name": self.article_names[row],
+            "languages": self.languages[
+                self.article_language_codes[languages_start:languages_end]
+            ].tolist(),
+            "sections": [
+                {"name": name, "word_count": int(word_count)}
+                for name, word_count in zip(
+                    self.section_names[sections_start:sections_end],
+                    self.section_word_counts[sections_start:sections_end],
+                )
+            ],
+        }
+        if self.article_revision_ids[row] >= 0:
+            article["revision_id"] = int(self.article_revision_ids[row])
+        return article
+
+    def get_all_category_ids(self) -> List[str]:
+        """
+        Returns the category IDs, in the order of the dataset.
+        """
+        return self.category_ids.tolist()
+
+    def get_all_article_ids(self) -> List[str]:
+        """
+        Returns the article IDs of every category, with an ID per membership.
+        """
+        return self.article_ids[self.memberships].tolist()
+
+    def get_all_ids(self) -> List[str]:
+        """
+        Returns the ID of every category followed by the IDs of its articles.
+        """
+        ids = []
+        for row, url in enumerate(self.category_ids):
+            start, end = self.category_articles[row : row + 2]
+            ids.append(url)
+            ids.extend(self.article_ids[self.memberships[start:end]].tolist())
+        return ids
+
+    def matching_language_urls(self, urls: Iterable[str]) -> Set[str]:
+        """
+        Returns the URLs that are the language link of a page of the dataset.
+        """
+        return {url for url in urls if url in self.language_rows}
+
+    def get_article(self, article_url: str) -> Dict[str, Any]:
+        """
+        Returns the totals and categories of an article, or `None` if it is not stored.
+        """
+        row = self.article_rows.get(article_url)
+        if row is None:
+            return None
+
+        start, end = self.article_categories[row : row + 2]
+        return {
+            "word_count": int(self.article_word_counts[row]),
+            "sections_count": int(self.article_sections_counts[row]),
+            "categories": self.category_ids[
+                self.article_category_rows[start:end]
+            ].tolist(),
+        }
+
+    def close(self):
+        """
+        Nothing to release; tables are plain arrays.
+        """
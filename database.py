@@ -1,8 +1,12 @@
 """
 This module provides functions to manage and query a JSON-based database of categories and articles.
+Datasets stored in SQLite (see `sqlite_database`) are queried in place instead, and
+datasets loaded as columnar tables (see `columnar`) are queried on the tables.
 
 Functions:
-    load(key: str):
+    load(key: str, path: str = None, columnar: bool = False, snapshot: bool = False):
+
+    read_tables(key: str) -> ColumnarDataset:
 
     read_categories(key: str) -> List[dict]:
 
@@ -17,63 +21,243 @@ Functions:
     filter_is_not_matching_ids(ids: List[str], key: str) -> List[str]:
 
     get_article_word_count(key: str, article_id: str) -> int:
+
+    get_article_sections_count(key: str, article_id: str) -> int:
+
+    get_article_categories(key: str, article_id: str) -> List[str]:
 """
-from typing import List
-import json
+
+from typing import Any, List
+import hashlib
+import os
+import pickle
+
+import datasets
+import profiling
+from columnar import ColumnarDataset
+from sqlite_database import SqliteDatabase, is_sqlite_path
 
 database = {}
 index = {}
+articles = {}
+stores = {}
+
+# Data files looked up for a key, in order
+DATA_FILES = (
+    "data_{}.json",
+    "data_{}.json.gz",
+    "data_{}.json.zst",
+    "data_{}.jsonl",
+    "data_{}.jsonl.gz",
+    "data_{}.jsonl.zst",
+    "data_{}.sqlite",
+)
+SNAPSHOT_VERSION = 2  # bump when the loaded structures change
+
+
+def _find_data_file(key: str) -> str:
+    for name in DATA_FILES:
+        path = name.format(key)
+        if os.path.exists(path):
+            return path
+    raise FileNotFoundError(f"No data file found for key {key}")
 
 
-def load(key: str):
+def _snapshot_path(path: str, columnar: bool) -> str:
+    return f"{path}.columnar.snapshot" if columnar else f"{path}.snapshot"
+
+
+def _file_hash(path: str) -> str:
+    digest = hashlib.sha256()
+    with open(path, "rb") as file:
+        for chunk in iter(lambda: file.read(1024 * 1024), b""):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _read_snapshot(path: str, columnar: bool) -> Any:
+    """
+    Returns what was loaded from the data file the last time, or `None` if there is
+    no snapshot or the data file changed since it was taken.
+
+    The modification time and size of the data file are checked first; when they
+    differ (e.g. the file was copied or touched), the content hash decides.
+    """
+    snapshot_path = _snapshot_path(path, columnar)
+    try:
+        with open(snapshot_path, "rb") as file:
+            snapshot = pickle.load(file)
+    except (OSError, pickle.UnpicklingError, EOFError, AttributeError, ImportError):
+        return None
+    if snapshot.get("version") != SNAPSHOT_VERSION:
+        return None
+
+    stat = os.stat(path)
+    if (stat.st_mtime_ns, stat.st_size) != snapshot["signature"]:
+        if _file_hash(path) != snapshot["hash"]:
+            return None
+        _write_snapshot(path, columnar, snapshot["loaded"], snapshot["hash"])
+    return snapshot["loaded"]
+
+
+def _write_snapshot(path: str, columnar: bool, loaded: Any, content_hash: str = None):
+    """
+    Saves what was loaded from the data file with the signature of the file.
+    """
+    stat = os.stat(path)
+    snapshot = {
+        "version": SNAPSHOT_VERSION,
+        "signature": (stat.st_mtime_ns, stat.st_size),
+        "hash": content_hash or _file_hash(path),
+        "loaded": loaded,
+    }
+    snapshot_path = _snapshot_path(path, columnar)
+    # Write to a temporary file first so readers never see partial snapshots
+    temporary_path = f"{snapshot_path}.tmp"
+    with open(temporary_path, "wb") as file:
+        pickle.dump(snapshot, file, protocol=5)
+    os.replace(temporary_path, snapshot_path)
+
+
+def load(key: str, path: str = None, columnar: bool = False, snapshot: bool = False):
     """
     Loads data from a JSON file into the database and creates an index.
 
     Args:
         key (str): The key used to identify the data and index.
+        path (str): The data file. By default the first existing of `DATA_FILES`:
+            `data_<key>.json`, `data_<key>.jsonl` (compressed or not) or
+            `data_<key>.sqlite`. The format (JSON or JSONL) and the compression
+            (gzip or Zstandard, see `datasets`) are detected from the content of the
+            file. JSONL files (one category per line, as streamed by the scraper)
+            are read line by line. SQLite databases are opened, not loaded: the
+            other functions query them.
+        columnar (bool): Load the data as columnar NumPy tables (see `read_tables`)
+            instead of the tree of dictionaries. JSONL and SQLite datasets are
+            converted record by record, without building the tree.
+        snapshot (bool): Keep a binary snapshot (pickle) of what was loaded next to
+            the data file, and load from it the next time instead of parsing the data
+            file again. The snapshot is rebuilt automatically when the data file
+            changes. SQLite databases are only snapshotted as columnar tables.
 
     Raises:
-        FileNotFoundError: If the JSON file corresponding to the key does not exist.
-        json.JSONDecodeError: If the JSON file is not properly formatted.
+        FileNotFoundError: If the data file corresponding to the key does not exist.
+        json.JSONDecodeError: If the data file is not properly formatted.
 
     Side Effects:
         - Updates the global `database` dictionary with the loaded data.
         - Updates the global `index` dictionary with the created index.
+        - Updates the global `articles` dictionary with the article index.
 
     The function performs the following steps:
-        1. Reads data from a JSON file named `data_<key>.json`.
+        1. Reads data from the data file of the key.
         2. Loads the data into the `database` dictionary under the given key.
         3. Creates an index for the data and stores it in the `index` dictionary.
         4. Prints error messages if there are duplicate languages in the index.
+        5. Indexes every article by ID with its total word count, its number of
+           sections and the categories it belongs to, in the `articles` dictionary.
 
     Example:
         load("example_key")
     """
 
-    data = []
-    with open(f"data_{key}.json", "r", encoding="utf-8") as file:
-        data = json.load(file)
+    if path is None:
+        path = _find_data_file(key)
+
+    if key in stores:
+        stores.pop(key).close()
+    if is_sqlite_path(path) or columnar:
+        for loaded in (database, index, articles):
+            loaded.pop(key, None)
+
+    if is_sqlite_path(path) and not columnar:
+        stores[key] = SqliteDatabase(path)
+        return
+
+    if snapshot:
+        with profiling.stage("load"):
+            loaded = _read_snapshot(path, columnar)
+        if loaded is not None:
+            if columnar:
+                stores[key] = loaded
+            else:
+                database[key], index[key], articles[key] = loaded
+            return
+
+    if columnar:
+        with profiling.stage("load"):
+            if is_sqlite_path(path):
+                store = SqliteDatabase(path)
+                records = store.read_categories()
+                store.close()
+            else:
+                # JSONL is read lazily: the lines are parsed while the tables are built
+                records = datasets.read_dataset(path)
+        with profiling.stage("index"):
+            stores[key] = ColumnarDataset.from_records(records)
+        if snapshot:
+            with profiling.stage("load"):
+                _write_snapshot(path, columnar, stores[key])
+        return
+
+    with profiling.stage("load"):
+        data = list(datasets.read_dataset(path))
 
     # load database
     database[key] = data
     index[key] = {}
+    articles[key] = {}
 
     # indexing
-    for category in data:
-        for language in category["languages"]:
-            if index[key].get(language, None) is None:
-                index[key][language] = category["id"]
-            else:
-                print(f"Error: {language} already exists in index for key {key}")
-        for article in category["articles"]:
-            for language in article["languages"]:
+    with profiling.stage("index"):
+        for category in data:
+            for language in category["languages"]:
                 if index[key].get(language, None) is None:
-                    index[key][language] = article["id"]
+                    index[key][language] = category["id"]
+                else:
+                    print(f"Error: {language} already exists in index for key {key}")
+            for article in category["articles"]:
+                for language in article["languages"]:
+                    if index[key].get(language, None) is None:
+                        index[key][language] = article["id"]
+
+                # The first occurrence of an article gives its counts
+                entry = articles[key].get(article["id"])
+                if entry is None:
+                    entry = {
+                        "word_count": sum(
+                            section["word_count"] for section in article["sections"]
+                        ),
+                        "sections_count": len(article["sections"]),
+                        "categories": [],
+                    }
+                    articles[key][article["id"]] = entry
+                entry["categories"].append(category["id"])
+
+    if snapshot:
+        with profiling.stage("load"):
+            _write_snapshot(path, columnar, (database[key], index[key], articles[key]))
 
     # Save index to a JSON file - debugging purposes
     # with open("index.json", "w", encoding="utf-8") as file:
     #     json.dump(index, file, ensure_ascii=False, indent=2)
 
+
+def read_tables(key: str) -> ColumnarDataset:
+    """
+    Retrieve the columnar tables of a dataset loaded with `columnar=True`.
+
+    Args:
+        key (str): The key used to identify the data.
+
+    Raises:
+        KeyError: If the data of the key was not loaded as columnar tables.
+    """
+    if not isinstance(stores.get(key), ColumnarDataset):
+        raise KeyError(f"{key} was not loaded as columnar tables")
+    return stores[key]
+
+
 def read_categories(key: str) -> List[dict]:
     """
     Retrieve categories from the database using the provided key.
@@ -84,8 +268,11 @@ def read_categories(key: str) -> List[dict]:
     Returns:
         List[dict]: A list of dictionaries representing the categories.
     """
+    if key in stores:
+        return stores[key].read_categories()
     return database[key]
 
+
 def get_all_ids(key: str) -> List[str]:
     """
     Retrieve all IDs associated with a given key from the database.
@@ -96,6 +283,8 @@ def get_all_ids(key: str) -> List[str]:
     Returns:
         List[str]: A list of IDs found under the specified key. This includes IDs from both categories and articles within those categories.
     """
+    if key in stores:
+        return stores[key].get_all_ids()
     ids = []
     if key in database:
         for category in database[key]:
@@ -104,6 +293,7 @@ def get_all_ids(key: str) -> List[str]:
                 ids.append(article["id"])
     return ids
 
+
 def get_all_category_ids(key: str) -> List[str]:
     """
     Retrieve all category IDs associated with a given key from the database.
@@ -114,12 +304,15 @@ def get_all_category_ids(key: str) -> List[str]:
     Returns:
         List[str]: A list of category IDs associated with the given key.
     """
+    if key in stores:
+        return stores[key].get_all_category_ids()
     ids = []
     if key in database:
         for category in database[key]:
             ids.append(category["id"])
     return ids
 
+
 def get_all_article_ids(key: str) -> List[str]:
     """
     Retrieve all article IDs for a given key from the database.
@@ -130,6 +323,8 @@ def get_all_article_ids(key: str) -> List[str]:
     Returns:
         List[str]: A list of article IDs associated with the given key.
     """
+    if key in stores:
+        return stores[key].get_all_article_ids()
     ids = []
     if key in database:
         for category in database[key]:
@@ -137,6 +332,7 @@ def get_all_article_ids(key: str) -> List[str]:
                 ids.append(article["id"])
     return ids
 
+
 def filter_matching_ids(ids: List[str], key: str) -> List[str]:
     """
     Filters a list of IDs, returning only those that match a given key in the index.
@@ -148,12 +344,16 @@ def filter_matching_ids(ids: List[str], key: str) -> List[str]:
     Returns:
         List[str]: A list of IDs that match the given key in the index.
     """
+    if key in stores:
+        matching = stores[key].matching_language_urls(ids)
+        return [id for id in ids if id in matching]
     matching_ids = []
     for id in ids:
         if index[key].get(id) is not None:
             matching_ids.append(id)
     return matching_ids
 
+
 def filter_is_not_matching_ids(ids: List[str], key: str) -> List[str]:
     """
     Filter out IDs that do not match any entry in the index for the given key.
@@ -165,12 +365,22 @@ def filter_is_not_matching_ids(ids: List[str], key: str) -> List[str]:
     Returns:
     List[str]: A list of IDs that do not match any entry in the index.
     """
+    if key in stores:
+        matching = stores[key].matching_language_urls(ids)
+        return [id for id in ids if id not in matching]
     filtered_ids = []
     for id in ids:
         if index[key].get(id) is None:
             filtered_ids.append(id)
     return filtered_ids
 
+
+def _get_article(key: str, article_id: str) -> dict:
+    if key in stores:
+        return stores[key].get_article(article_id)
+    return articles.get(key, {}).get(article_id)
+
+
 def get_article_word_count(key: str, article_id: str) -> int:
     """
     Get the total word count for a specific article by its ID.
@@ -180,14 +390,37 @@ def get_article_word_count(key: str, article_id: str) -> int:
     article_id (str): The ID of the article to get the word count for.
 
     Returns:
-    int: The total word count of the article.
+    int: The total word count of the article, or 0 if it is not in the database.
     """
-    word_count = 0
-    if key in database:
-        for category in database[key]:
-            for article in category["articles"]:
-                if article["id"] == article_id:
-                    for section in article["sections"]:
-                        word_count += section["word_count"]
-                    break
-    return word_count
+    entry = _get_article(key, article_id)
+    return entry["word_count"] if entry is not None else 0
+
+
+def get_article_sections_count(key: str, article_id: str) -> int:
+    """
+    Get the number of sections of a specific article by its ID.
+
+    Parameters:
+    key (str): The key to identify the database.
+    article_id (str): The ID of the article.
+
+    Returns:
+    int: The number of sections of the article, or 0 if it is not in the database.
+    """
+    entry = _get_article(key, article_id)
+    return entry["sections_count"] if entry is not None else 0
+
+
+def get_article_categories(key: str, article_id: str) -> List[str]:
+    """
+    Get the IDs of the categories a specific article belongs to.
+
+    Parameters:
+    key (str): The key to identify the database.
+    article_id (str): The ID of the article.
+
+    Returns:
+    List[str]: The category IDs, in the order of the database.
+    """
+    entry = _get_article(key, article_id)
+    return list(entry["categories"]) if entry is not None else []
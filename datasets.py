@@ -0,0 +1,159 @@
+"""
+This module reads and writes the scraped datasets as JSONL: one category record
+per line, so a crawl can stream its records to disk as soon as they are complete
+and a reader never has to hold the raw file in memory. Files ending in `.gz` are
+compressed with gzip, and files ending in `.zst` with Zstandard (needs the
+`zstandard` package), which decompresses several times faster than gzip.
+
+Whole datasets (a JSON array of the categories, as returned by the scraper) are
+written compactly, without indentation. When reading, the compression and the
+format (JSON array or JSONL) are detected from the content of the file, whatever
+its name.
+
+Functions:
+    open_dataset(path: str, mode: str) -> IO[str]:
+
+    read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+
+    read_dataset(path: str) -> Iterator[Dict[str, Any]]:
+
+    write_dataset(path: str, categories: Iterable[Dict[str, Any]]):
+"""
+
+import gzip
+import json
+from typing import IO, Any, Dict, Iterable, Iterator, Optional
+
+# Constants
+GZIP_MAGIC = b"\x1f\x8b"
+ZSTD_MAGIC = b"\x28\xb5\x2f\xfd"
+GZIP_LEVEL = 6  # the default of the gzip command line tool, much faster than 9
+ZSTD_LEVEL = 10
+SEPARATORS = (",", ":")  # no spaces after the separators
+
+
+def _compression(path: str, mode: str) -> Optional[str]:
+    """
+    Returns the compression of a dataset file: from its first bytes when reading,
+    from its extension when writing.
+    """
+    if mode == "r":
+        with open(path, "rb") as file:
+            magic = file.read(len(ZSTD_MAGIC))
+        if magic.startswith(GZIP_MAGIC):
+            return "gzip"
+        if magic == ZSTD_MAGIC:
+            return "zstd"
+        return None
+
+    if path.endswith(".gz"):
+        return "gzip"
+    if path.endswith(".zst"):
+        return "zstd"
+    return None
+
+
+def open_dataset(path: str, mode: str = "r") -> IO[str]:
+    """
+    Opens a dataset file in text mode, compressed with gzip if it ends in `.gz` or
+    with Zstandard if it ends in `.zst`. Compressed files are recognized by their
+    content when reading.
+    """
+    compression = _compression(path, mode)
+    if compression == "gzip":
+        return gzip.open(path, mode + "t", compresslevel=GZIP_LEVEL, encoding="utf-8")
+    if compression == "zstd":
+        import zstandard  # optional dependency, only needed for `.zst` datasets
+
+        return zstandard.open(
+            path,
+            mode + "t",
+            cctx=zstandard.ZstdCompressor(level=ZSTD_LEVEL) if mode != "r" else None,
+            encoding="utf-8",
+        )
+    return open(path, mode, encoding="utf-8")
+
+
+def read_jsonl(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the records of a JSONL dataset one by one. Blank lines are skipped.
+    """
+    with open_dataset(path, "r") as file:
+        for line in file:
+            if line.strip():
+                yield json.loads(line)
+
+
+def read_dataset(path: str) -> Iterator[Dict[str, Any]]:
+    """
+    Yields the category records of a dataset, either a JSON array (read at once)
+    or JSONL (read line by line), compressed or not.
+    """
+    with open_dataset(path, "r") as file:
+        # The first character tells a JSON array from a JSONL record
+        first = file.read(1)
+        while first.isspace():
+            first = file.read(1)
+        if first == "[":
+            categories = json.loads(first + file.read())
+        else:
+            categories = None
+
+    if categories is not None:
+        yield from categories
+    else:
+        yield from read_jsonl(path)
+
+
+def write_dataset(path: str, categories: Iterable[Dict[str, Any]]):
+    """
+    Writes a whole dataset without indentation: as JSONL if the path contains
+    `.jsonl`, as a JSON array otherwise, compressed according to its extension.
+    """
+    if ".jsonl" in path:
+        writer = JsonlWriter(path)
+        for category in categories:
+            writer.write(category)
+        writer.close()
+        return
+
+    with open_dataset(path, "w") as file:
+        file.write(
+            json.dumps(list(categories), ensure_ascii=False, separators=SEPARATORS)
+        )
+
+
+class JsonlWriter:
+    """
+    Appends category records to a JSONL dataset, one line per record.
+
+    Only the counts of what was written are kept, so the memory used does not grow
+    with the number of records.
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+        self.categories = 0
+        self.articles = 0
+        self.sections = 0
+        self.file = open_dataset(path, "w")
+
+    def write(self, category: Dict[str, Any]):
+        """
+        Writes a complete category record.
+        """
+        self.file.write(
+            json.dumps(category, ensure_ascii=False, separators=SEPARATORS) + "\n"
+        )
+        self.file.flush()
+        self.categories += 1
+        self.articles += len(category["articles"])
+        self.sections += sum(
+            len(article["sections"]) for article in category["articles"]
+        )
+
+    def close(self):
+        """
+        Flushes the dataset to disk and closes it.
+        """
+        self.file.close()
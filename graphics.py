@@ -2,7 +2,11 @@
 This module processes and visualizes data related to categories, articles, and sections
 in different languages using matplotlib and pandas.
 """
-import statistics
+
+import os
+from concurrent.futures import ProcessPoolExecutor
+from functools import cached_property
+from typing import List, Sequence, Tuple
 
 import matplotlib.pyplot as plt
 import numpy as np
@@ -10,9 +14,16 @@ import pandas as pd
 from matplotlib.colors import to_rgba
 
 import database as db
-
-db.load("es")
-db.load("en")
+import profiling
+from aggregations import (
+    LanguageAggregates,
+    LanguageComparison,
+    aggregate,
+    compare,
+    summarize,
+)
+from columnar import ColumnarDataset
+from language_coverage import Coverage
 
 # DEFINIENDO VARIABLES
 ## Languages
@@ -29,249 +40,297 @@ color_language2_transparency = to_rgba(color_language2, alpha=0.5)
 color_language1_transparency = to_rgba(color_language1, alpha=0.5)
 color_both_transparency = to_rgba(color_both, alpha=0.5)
 
-# PROCESANDO DATOS
-## Contando categories, articles and sections
-categories_language1 = [cat for cat in db.read_categories(language1)]
-
-total_categories_language1 = len(categories_language1)
-total_articles_language1 = sum(
-    len(cat["articles"]) for cat in [cat for cat in categories_language1]
-)
-total_sections_language1 = sum(
-    len(article["sections"])  # Cuenta las sections de cada artículo
-    for category in categories_language1  # Itera sobre las categorías
-    for article in category["articles"]  # Itera sobre los artículos de cada categoría
-)
-
-categories_language2 = [cat for cat in db.read_categories(language2)]
-
-total_categories_language2 = len(categories_language2)
-total_articles_language2 = sum(len(cat["articles"]) for cat in categories_language2)
-total_sections_language2 = sum(
-    len(article["sections"])  # Cuenta las sections de cada artículo
-    for category in categories_language2  # Itera sobre las categorías
-    for article in category["articles"]  # Itera sobre los artículos de cada categoría
-)
-
-## Contando articles unicos
-unique_articles_language1 = set()
-
-for category in categories_language1:
-    for article in category["articles"]:
-        unique_articles_language1.add(article["id"])
-
-total_unique_articles_language1 = len(unique_articles_language1)
-
-unique_articles_language2 = set()
-
-for category in categories_language2:
-    for article in category["articles"]:
-        unique_articles_language2.add(article["id"])
-
-total_unique_articles_language2 = len(unique_articles_language2)
-
-## Identificando las categorías de los artículos duplicados
-set_unique_articles_language1 = set(unique_articles_language1)
-all_article_ids_language1 = [article["id"] for article in db.read_categories(language1)]
-set_all_articles_language1 = set(all_article_ids_language1)
-
-categories_w_duplicated_articles_language1 = (
-    set_all_articles_language1 - set_unique_articles_language1
-)
-
-set_unique_articles_language2 = set(unique_articles_language2)
-all_article_ids_language2 = [article["id"] for article in db.read_categories(language2)]
-set_all_articles_language2 = set(all_article_ids_language2)
-
-categories_w_duplicated_articles_language2 = (
-    set_all_articles_language2 - set_unique_articles_language2
-)
-
-
-## Contando categorias que están en los dos idiomas
-total_categories_both = len(
-    db.filter_matching_ids(db.get_all_category_ids(language2), language1)
-)
-
-## Contando categorias que solamente están en cada uno de los idiomas
-total_categories_only_language1 = len(
-    db.filter_is_not_matching_ids(db.get_all_category_ids(language1), language2)
-)  # está en language 1 y no en language 2
-total_categories_only_language2 = len(
-    db.filter_is_not_matching_ids(db.get_all_category_ids(language2), language1)
-)  # está en language 2 y no en language 1
-
-## Contando articulos que están en los dos idiomas
-total_unique_articles_both = len(
-    set(db.filter_matching_ids(db.get_all_article_ids(language1), language2))
-)
-
-## Contando categorias que solamente están en cada uno de los idiomas
-total_unique_articles_only_language1 = len(
-    set(db.filter_is_not_matching_ids(db.get_all_article_ids(language1), language2))
-)  # está en language 1 y no en language 2
-total_unique_articles_only_language2 = len(
-    set(db.filter_is_not_matching_ids(db.get_all_article_ids(language2), language1))
-)  # está en language 1 y no en language 2
-
-## Cantidad de articulos por categorias
-categories_language1 = []
-articles_count_language1 = []
-
-for category in db.read_categories(language1):
-    categories_language1.append(category["name"])
-    articles_count_language1.append(len(category["articles"]))
-
-df_category_articles_language1 = pd.DataFrame(
-    {"categories": categories_language1, "articles_count": articles_count_language1}
-)
-
-categories_language2 = []
-articles_count_language2 = []
-
-for category in db.read_categories(language2):
-    categories_language2.append(category["name"])
-    articles_count_language2.append(len(category["articles"]))
-
-df_category_articles_language2 = pd.DataFrame(
-    {"categories": categories_language2, "articles_count": articles_count_language2}
-)
-
-## Cantidad de secciones y palabras por articulos unicos
-result_data_language1 = []
-processed_articles_language1 = set()
-
-for category in db.read_categories(language1):
-    for article in category["articles"]:
-        if (
-            article["id"] in unique_articles_language1
-            and article["id"] not in processed_articles_language1
-        ):
-            # Contar la cantidad de secciones
-            num_sections = len(article["sections"])
-            # Calcular la suma de word_count
-            total_word_count = sum(
-                section["word_count"] for section in article["sections"]
-            )
-            # Añadir al resultado
-            result_data_language1.append(
-                {
-                    "article": article["id"],
-                    "sections_count": num_sections,
-                    "total_word_count": total_word_count,
-                }
-            )
-            # Marcar el artículo como procesado
-            processed_articles_language1.add(article["id"])
-
-df_unique_articles_language1 = pd.DataFrame(result_data_language1)
-
-result_data_language2 = []
-processed_articles_language2 = set()
-
-for category in db.read_categories(language2):
-    for article in category["articles"]:
-        if (
-            article["id"] in unique_articles_language2
-            and article["id"] not in processed_articles_language2
-        ):
-            # Contar la cantidad de secciones
-            num_sections = len(article["sections"])
-            # Calcular la suma de word_count
-            total_word_count = sum(
-                section["word_count"] for section in article["sections"]
-            )
-            # Añadir al resultado
-            result_data_language2.append(
-                {
-                    "article": article["id"],
-                    "sections_count": num_sections,
-                    "total_word_count": total_word_count,
-                }
-            )
-            # Marcar el artículo como procesado
-            processed_articles_language2.add(article["id"])
-
-df_unique_articles_language2 = pd.DataFrame(result_data_language2)
-
-## Articles traducidos con la cantidad de palabras
-unique_article_url_both_language1 = list(
-    set(db.filter_matching_ids(db.get_all_article_ids(language1), language2))
-)
-
-unique_article_desc_both_language1 = []
-
-# Iterar sobre cada URL de unique_article_url_both_language1
-for url in unique_article_url_both_language1:
-    # Llamar a la función db.get_article_word_count con cada URL
-    word_count = db.get_article_word_count(language1, url)
-
-    # Agregar el resultado como un diccionario con 'url' y 'word_count'
-    unique_article_desc_both_language1.append({"url": url, "word_count": word_count})
 
-
-unique_article_url_both_language2 = list(
-    set(db.filter_matching_ids(db.get_all_article_ids(language2), language1))
+# PROCESANDO DATOS
+class Metrics:
+    """
+    Metrics of the two languages compared by the charts.
+
+    Every metric is computed on first access and cached, and the data of a language
+    is only loaded when a metric needs it, so importing the module is cheap. The
+    metrics of each language come from a single pass of the aggregation pipeline
+    (see `aggregations`) over its columnar tables; only the metrics of the pages in
+    both or in one language also compare it with the other language, through the
+    coverage bitmaps of the two languages (see `language_coverage`).
+    """
+
+    def __init__(self, language1: str, language2: str):
+        self.language1 = language1
+        self.language2 = language2
+
+    def _tables(self, language: str) -> ColumnarDataset:
+        """
+        Loads the columnar tables of a language on first use.
+        """
+        try:
+            return db.read_tables(language)
+        except KeyError:
+            db.load(language, columnar=True, snapshot=True)
+            return db.read_tables(language)
+
+    def _article_desc_only(self, comparison: LanguageComparison, language: str):
+        return [
+            {
+                "url": item["url"],
+                "available language": language,
+                "word_count_to_translate": item["word_count"],
+            }
+            for item in comparison.articles_only.to_dict("records")
+        ]
+
+    def _aggregate(self, language: str) -> LanguageAggregates:
+        tables = self._tables(language)
+        with profiling.stage("aggregate"):
+            return aggregate(tables)
+
+    def _compare(
+        self, language: str, aggregates: LanguageAggregates, other: str
+    ) -> LanguageComparison:
+        with profiling.stage("aggregate"):
+            return compare(self.coverage, language, aggregates, other)
+
+    @cached_property
+    def coverage(self) -> Coverage:
+        tables = {
+            language: self._tables(language)
+            for language in (self.language1, self.language2)
+        }
+        with profiling.stage("aggregate"):
+            return Coverage(tables)
+
+    @cached_property
+    def aggregates_language1(self) -> LanguageAggregates:
+        return self._aggregate(self.language1)
+
+    @cached_property
+    def aggregates_language2(self) -> LanguageAggregates:
+        return self._aggregate(self.language2)
+
+    @cached_property
+    def comparison_language1(self) -> LanguageComparison:
+        return self._compare(self.language1, self.aggregates_language1, self.language2)
+
+    @cached_property
+    def comparison_language2(self) -> LanguageComparison:
+        return self._compare(self.language2, self.aggregates_language2, self.language1)
+
+    ## Contando categories, articles and sections
+    @cached_property
+    def total_categories_language1(self) -> int:
+        return self.aggregates_language1.total_categories
+
+    @cached_property
+    def total_categories_language2(self) -> int:
+        return self.aggregates_language2.total_categories
+
+    @cached_property
+    def total_articles_language1(self) -> int:
+        return self.aggregates_language1.total_articles
+
+    @cached_property
+    def total_articles_language2(self) -> int:
+        return self.aggregates_language2.total_articles
+
+    @cached_property
+    def total_sections_language1(self) -> int:
+        return self.aggregates_language1.total_sections
+
+    @cached_property
+    def total_sections_language2(self) -> int:
+        return self.aggregates_language2.total_sections
+
+    ## Contando articles unicos
+    @cached_property
+    def total_unique_articles_language1(self) -> int:
+        return self.aggregates_language1.total_unique_articles
+
+    @cached_property
+    def total_unique_articles_language2(self) -> int:
+        return self.aggregates_language2.total_unique_articles
+
+    ## Contando categorias que están en los dos idiomas
+    @cached_property
+    def total_categories_both(self) -> int:
+        # categorías de language 2 que están en language 1
+        return self.comparison_language2.total_categories_both
+
+    ## Contando categorias que solamente están en cada uno de los idiomas
+    @cached_property
+    def total_categories_only_language1(self) -> int:
+        # está en language 1 y no en language 2
+        return self.comparison_language1.total_categories_only
+
+    @cached_property
+    def total_categories_only_language2(self) -> int:
+        # está en language 2 y no en language 1
+        return self.comparison_language2.total_categories_only
+
+    ## Contando articulos que están en los dos idiomas
+    @cached_property
+    def total_unique_articles_both(self) -> int:
+        return len(self.comparison_language1.articles_both)
+
+    ## Contando articulos que solamente están en cada uno de los idiomas
+    @cached_property
+    def total_unique_articles_only_language1(self) -> int:
+        return len(self.comparison_language1.articles_only)
+
+    @cached_property
+    def total_unique_articles_only_language2(self) -> int:
+        return len(self.comparison_language2.articles_only)
+
+    ## Cantidad de articulos por categorias
+    @cached_property
+    def df_category_articles_language1(self) -> pd.DataFrame:
+        return self.aggregates_language1.categories
+
+    @cached_property
+    def df_category_articles_language2(self) -> pd.DataFrame:
+        return self.aggregates_language2.categories
+
+    ## Cantidad de secciones y palabras por articulos unicos
+    @cached_property
+    def df_unique_articles_language1(self) -> pd.DataFrame:
+        return self.aggregates_language1.unique_articles
+
+    @cached_property
+    def df_unique_articles_language2(self) -> pd.DataFrame:
+        return self.aggregates_language2.unique_articles
+
+    ## Articles traducidos con la cantidad de palabras
+    @cached_property
+    def unique_article_desc_both_language1(self) -> List[dict]:
+        return self.comparison_language1.articles_both.to_dict("records")
+
+    @cached_property
+    def unique_article_desc_both_language2(self) -> List[dict]:
+        return self.comparison_language2.articles_both.to_dict("records")
+
+    ## Quick Win Articles a traducir
+    @cached_property
+    def unique_article_desc_only_language1(self) -> List[dict]:
+        # está en language 1 y no en language 2
+        return self._article_desc_only(self.comparison_language1, self.language1)
+
+    @cached_property
+    def unique_article_desc_only_language2(self) -> List[dict]:
+        # está en language 2 y no en language 1
+        return self._article_desc_only(self.comparison_language2, self.language2)
+
+
+metrics = Metrics(language1, language2)
+
+# Charts in the order of the report
+CHARTS = (
+    "plot_quantity_of_subcategories_and_articles",
+    "plot_distribution_of_categories",
+    "plot_distribution_of_articles",
+    "plot_distribution_of_sections",
+    "plot_distribution_of_duplicated_articles",
+    "plot_number_of_categories",
+    "plot_number_of_unique_articles",
+    "plot_articles_distribution_per_category",
+    "plot_sections_distribution_per_article",
+    "plot_word_count_distribution_per_article",
+    "plot_word_count_distribution_and_quick_win",
 )
 
-unique_article_desc_both_language2 = []
+# Directory and formats the charts are saved in; `None` shows them instead
+_output: Tuple[str, Tuple[str, ...]] = None
 
-# Iterar sobre cada URL de unique_article_url_both_language1
-for url in unique_article_url_both_language2:
-    # Llamar a la función db.get_article_word_count con cada URL
-    word_count = db.get_article_word_count(language2, url)
 
-    # Agregar el resultado como un diccionario con 'url' y 'word_count'
-    unique_article_desc_both_language2.append({"url": url, "word_count": word_count})
+def _show(name: str):
+    """
+    Shows the current chart, or saves it to files in batch render mode.
+    """
+    if _output is None:
+        plt.show()
+        return
 
-## Quick Win Articles a traducir
-unique_articles_only_language1 = list(
-    set(db.filter_is_not_matching_ids(db.get_all_article_ids(language1), language2))
-)  # está en language 1 y no en language 2
+    directory, formats = _output
+    for file_format in formats:
+        plt.savefig(
+            os.path.join(directory, f"{name}.{file_format}"), format=file_format
+        )
+    plt.close("all")
 
-unique_article_desc_only_language1 = []
 
-### Iterar sobre cada URL de unique_article_url_both_language1
-for url in unique_articles_only_language1:
-    # Llamar a la función db.get_article_word_count con cada URL
-    word_count = db.get_article_word_count(language1, url)
+def _init_render_worker(precomputed: Metrics, directory: str, formats: Tuple[str, ...]):
+    global metrics, _output
 
-    # Agregar el resultado como un diccionario con 'url' y 'word_count'
-    unique_article_desc_only_language1.append(
-        {
-            "url": url,
-            "available language": language1,
-            "word_count_to_translate": word_count,
-        }
-    )
+    plt.switch_backend("Agg")
+    metrics = precomputed
+    _output = (directory, formats)
 
-unique_articles_only_language2 = list(
-    set(db.filter_is_not_matching_ids(db.get_all_article_ids(language2), language1))
-)  # está en language 1 y no en language 2
 
-unique_article_desc_only_language2 = []
+def _render_chart(chart: str) -> List[str]:
+    with profiling.stage("render"):
+        globals()[chart]()
+    name = chart[len("plot_") :]
+    return [
+        os.path.join(_output[0], f"{name}.{file_format}") for file_format in _output[1]
+    ]
 
-### Iterar sobre cada URL de unique_article_url_both_language1
-for url in unique_articles_only_language2:
-    # Llamar a la función db.get_article_word_count con cada URL
-    word_count = db.get_article_word_count(language2, url)
 
-    # Agregar el resultado como un diccionario con 'url' y 'word_count'
-    unique_article_desc_only_language2.append(
-        {
-            "url": url,
-            "available language": language2,
-            "word_count_to_translate": word_count,
-        }
-    )
+def render_all(
+    directory: str = "charts",
+    formats: Sequence[str] = ("png",),
+    workers: int = None,
+    charts: Sequence[str] = CHARTS,
+) -> List[str]:
+    """
+    Renders the charts to image files without a display, in parallel.
+
+    The metrics are aggregated once in the calling process and handed to worker
+    processes that only draw, each with the non-interactive Agg backend. When
+    profiling (see `profiling`), they are rendered one after the other in the
+    calling process instead, so that the render stage is profiled.
+
+    Args:
+        directory (str): Directory the files are written to, `<chart name>.<format>`.
+        formats (Sequence[str]): Image formats, e.g. "png" and "svg".
+        workers (int): Number of worker processes (by default, one per CPU).
+        charts (Sequence[str]): Names of the `plot_*` functions to render.
+
+    Returns:
+        List[str]: The paths of the written files.
+    """
+    global _output
+
+    os.makedirs(directory, exist_ok=True)
+    # Aggregate before starting the workers, so they do not load the data again
+    metrics.comparison_language1
+    metrics.comparison_language2
+
+    if profiling.get() is not None:
+        backend = plt.get_backend()
+        _init_render_worker(metrics, directory, tuple(formats))
+        try:
+            return [path for chart in charts for path in _render_chart(chart)]
+        finally:
+            _output = None
+            plt.switch_backend(backend)
+
+    with ProcessPoolExecutor(
+        max_workers=workers,
+        initializer=_init_render_worker,
+        initargs=(metrics, directory, tuple(formats)),
+    ) as executor:
+        return [path for paths in executor.map(_render_chart, charts) for path in paths]
 
 
 # VISUALIZAR DATOS
 def plot_quantity_of_subcategories_and_articles():
     ### Datos para el gráfico
     labels_chart1 = ["Categories", "Articles"]
-    categories_values_chart1 = [total_categories_language1, total_categories_language2]
-    articles_values_chart1 = [total_articles_language1, total_articles_language2]
+    categories_values_chart1 = [
+        metrics.total_categories_language1,
+        metrics.total_categories_language2,
+    ]
+    articles_values_chart1 = [
+        metrics.total_articles_language1,
+        metrics.total_articles_language2,
+    ]
 
     ### Configuración del gráfico
     x = np.arange(
@@ -322,13 +381,16 @@ def plot_quantity_of_subcategories_and_articles():
 
     ### Ajustar el diseño
     plt.tight_layout()
-    plt.show()
+    _show("quantity_of_subcategories_and_articles")
 
 
 def plot_distribution_of_categories():
     ### Datos para el gráfico
     labels_chart2 = [label_language1, label_language2]
-    categories_values_chart2 = [total_categories_language1, total_categories_language2]
+    categories_values_chart2 = [
+        metrics.total_categories_language1,
+        metrics.total_categories_language2,
+    ]
 
     ### Calcular porcentajes
     total_chart2 = sum(categories_values_chart2)
@@ -362,13 +424,16 @@ def plot_distribution_of_categories():
 
     ### Mostrar el gráfico
     plt.tight_layout()
-    plt.show()
+    _show("distribution_of_categories")
 
 
 def plot_distribution_of_articles():
     ### Datos para el gráfico
     labels_chart3 = [label_language1, label_language2]
-    articles_values_chart3 = [total_articles_language1, total_articles_language2]
+    articles_values_chart3 = [
+        metrics.total_articles_language1,
+        metrics.total_articles_language2,
+    ]
 
     ### Calcular porcentajes
     total_chart3 = sum(articles_values_chart3)
@@ -402,13 +467,16 @@ def plot_distribution_of_articles():
 
     ### Mostrar el gráfico
     plt.tight_layout()
-    plt.show()
+    _show("distribution_of_articles")
 
 
 def plot_distribution_of_sections():
     ### Datos para el gráfico
     labels_chart4 = [label_language1, label_language2]
-    sections_values_chart4 = [total_sections_language1, total_sections_language2]
+    sections_values_chart4 = [
+        metrics.total_sections_language1,
+        metrics.total_sections_language2,
+    ]
 
     ### Calcular porcentajes
     total_chart4 = sum(sections_values_chart4)
@@ -442,18 +510,18 @@ def plot_distribution_of_sections():
 
     ### Mostrar el gráfico
     plt.tight_layout()
-    plt.show()
+    _show("distribution_of_sections")
 
 
 def plot_distribution_of_duplicated_articles():
     labels_chart5 = ["Duplicated", "Unique"]
     values_chart5_language1 = [
-        total_articles_language1 - total_unique_articles_language1,
-        total_unique_articles_language1,
+        metrics.total_articles_language1 - metrics.total_unique_articles_language1,
+        metrics.total_unique_articles_language1,
     ]
     values_chart5_language2 = [
-        total_articles_language2 - total_unique_articles_language2,
-        total_unique_articles_language2,
+        metrics.total_articles_language2 - metrics.total_unique_articles_language2,
+        metrics.total_unique_articles_language2,
     ]
 
     ### Calcular porcentajes
@@ -509,7 +577,7 @@ def plot_distribution_of_duplicated_articles():
 
     ### Ajustar diseño
     plt.tight_layout()
-    plt.show()
+    _show("distribution_of_duplicated_articles")
 
 
 def plot_number_of_categories():
@@ -519,9 +587,9 @@ def plot_number_of_categories():
         "Both languages",
     ]
     values_chart6 = [
-        total_categories_only_language1,
-        total_categories_only_language2,
-        total_categories_both,
+        metrics.total_categories_only_language1,
+        metrics.total_categories_only_language2,
+        metrics.total_categories_both,
     ]
 
     total_values_chart6 = sum(values_chart6)
@@ -558,7 +626,7 @@ def plot_number_of_categories():
 
     ### Mostrar el gráfico
     plt.tight_layout()
-    plt.show()
+    _show("number_of_categories")
 
 
 def plot_number_of_unique_articles():
@@ -568,9 +636,9 @@ def plot_number_of_unique_articles():
         "Both languages",
     ]
     values_chart7 = [
-        total_unique_articles_only_language1,
-        total_unique_articles_only_language2,
-        total_unique_articles_both,
+        metrics.total_unique_articles_only_language1,
+        metrics.total_unique_articles_only_language2,
+        metrics.total_unique_articles_both,
     ]
 
     total_values_chart7 = sum(values_chart7)
@@ -607,32 +675,32 @@ def plot_number_of_unique_articles():
 
     ### Mostrar el gráfico
     plt.tight_layout()
-    plt.show()
+    _show("number_of_unique_articles")
 
 
 def plot_articles_distribution_per_category():
     ### Outlier category
-    # outlier_chart8_language1 = df_category_articles_language1[
-    #     df_category_articles_language1["articles_count"]
-    #     > df_category_articles_language1["articles_count"].quantile(0.75)
+    # outlier_chart8_language1 = metrics.df_category_articles_language1[
+    #     metrics.df_category_articles_language1["articles_count"]
+    #     > metrics.df_category_articles_language1["articles_count"].quantile(0.75)
     # ].sort_values(by="articles_count", ascending=False)
-    # outlier_chart8_language2 = df_category_articles_language2[
-    #     df_category_articles_language2["articles_count"]
-    #     > df_category_articles_language2["articles_count"].quantile(0.75)
+    # outlier_chart8_language2 = metrics.df_category_articles_language2[
+    #     metrics.df_category_articles_language2["articles_count"]
+    #     > metrics.df_category_articles_language2["articles_count"].quantile(0.75)
     # ].sort_values(by="articles_count", ascending=False)
 
     ### Calcular la media y mediana
-    mean_chart8_language1 = df_category_articles_language1[
+    mean_chart8_language1 = metrics.df_category_articles_language1[
         "articles_count"
     ].mean()  # Média
-    median_chart8_language1 = df_category_articles_language1[
+    median_chart8_language1 = metrics.df_category_articles_language1[
         "articles_count"
     ].median()  # Mediana
 
-    mean_chart8_language2 = df_category_articles_language2[
+    mean_chart8_language2 = metrics.df_category_articles_language2[
         "articles_count"
     ].mean()  # Média
-    median_chart8_language2 = df_category_articles_language2[
+    median_chart8_language2 = metrics.df_category_articles_language2[
         "articles_count"
     ].median()  # Mediana
 
@@ -640,8 +708,8 @@ def plot_articles_distribution_per_category():
     plt.figure(figsize=(8, 6))
     plt.boxplot(
         [
-            df_category_articles_language1["articles_count"],
-            df_category_articles_language2["articles_count"],
+            metrics.df_category_articles_language1["articles_count"],
+            metrics.df_category_articles_language2["articles_count"],
         ],
         vert=True,
         patch_artist=True,
@@ -675,32 +743,32 @@ def plot_articles_distribution_per_category():
     plt.tight_layout()
 
     ### Mostrar el gráfico
-    plt.show()
+    _show("articles_distribution_per_category")
 
 
 def plot_sections_distribution_per_article():
     ### Outlier category
-    # outlier_chart9_language1 = df_unique_articles_language1[
-    #     df_unique_articles_language1["sections_count"]
-    #     > df_unique_articles_language1["sections_count"].quantile(0.75)
+    # outlier_chart9_language1 = metrics.df_unique_articles_language1[
+    #     metrics.df_unique_articles_language1["sections_count"]
+    #     > metrics.df_unique_articles_language1["sections_count"].quantile(0.75)
     # ].sort_values(by="sections_count", ascending=False)
-    # outlier_chart9_language2 = df_unique_articles_language2[
-    #     df_unique_articles_language2["sections_count"]
-    #     > df_unique_articles_language2["sections_count"].quantile(0.75)
+    # outlier_chart9_language2 = metrics.df_unique_articles_language2[
+    #     metrics.df_unique_articles_language2["sections_count"]
+    #     > metrics.df_unique_articles_language2["sections_count"].quantile(0.75)
     # ].sort_values(by="sections_count", ascending=False)
 
     ### Calcular la media y mediana
-    mean_chart9_language1 = df_unique_articles_language1[
+    mean_chart9_language1 = metrics.df_unique_articles_language1[
         "sections_count"
     ].mean()  # Média
-    median_chart9_language1 = df_unique_articles_language1[
+    median_chart9_language1 = metrics.df_unique_articles_language1[
         "sections_count"
     ].median()  # Mediana
 
-    mean_chart9_language2 = df_unique_articles_language2[
+    mean_chart9_language2 = metrics.df_unique_articles_language2[
         "sections_count"
     ].mean()  # Média
-    median_chart9_language2 = df_unique_articles_language2[
+    median_chart9_language2 = metrics.df_unique_articles_language2[
         "sections_count"
     ].median()  # Mediana
 
@@ -708,8 +776,8 @@ def plot_sections_distribution_per_article():
     plt.figure(figsize=(8, 6))
     plt.boxplot(
         [
-            df_unique_articles_language1["sections_count"],
-            df_unique_articles_language2["sections_count"],
+            metrics.df_unique_articles_language1["sections_count"],
+            metrics.df_unique_articles_language2["sections_count"],
         ],
         vert=True,
         patch_artist=True,
@@ -743,32 +811,32 @@ def plot_sections_distribution_per_article():
     plt.tight_layout()
 
     ### Mostrar el gráfico
-    plt.show()
+    _show("sections_distribution_per_article")
 
 
 def plot_word_count_distribution_per_article():
     ### Outlier category
-    # outlier_chart10_language1 = df_unique_articles_language1[
-    #     df_unique_articles_language1["total_word_count"]
-    #     > df_unique_articles_language1["total_word_count"].quantile(0.75)
+    # outlier_chart10_language1 = metrics.df_unique_articles_language1[
+    #     metrics.df_unique_articles_language1["total_word_count"]
+    #     > metrics.df_unique_articles_language1["total_word_count"].quantile(0.75)
     # ].sort_values(by="total_word_count", ascending=False)
-    # outlier_chart10_language2 = df_unique_articles_language2[
-    #     df_unique_articles_language2["total_word_count"]
-    #     > df_unique_articles_language2["total_word_count"].quantile(0.75)
+    # outlier_chart10_language2 = metrics.df_unique_articles_language2[
+    #     metrics.df_unique_articles_language2["total_word_count"]
+    #     > metrics.df_unique_articles_language2["total_word_count"].quantile(0.75)
     # ].sort_values(by="total_word_count", ascending=False)
 
     ### Calcular la media y mediana
-    mean_chart10_language1 = df_unique_articles_language1[
+    mean_chart10_language1 = metrics.df_unique_articles_language1[
         "total_word_count"
     ].mean()  # Média
-    median_chart10_language1 = df_unique_articles_language1[
+    median_chart10_language1 = metrics.df_unique_articles_language1[
         "total_word_count"
     ].median()  # Mediana
 
-    mean_chart10_language2 = df_unique_articles_language2[
+    mean_chart10_language2 = metrics.df_unique_articles_language2[
         "total_word_count"
     ].mean()  # Média
-    median_chart10_language2 = df_unique_articles_language2[
+    median_chart10_language2 = metrics.df_unique_articles_language2[
         "total_word_count"
     ].median()  # Mediana
 
@@ -776,8 +844,8 @@ def plot_word_count_distribution_per_article():
     plt.figure(figsize=(8, 6))
     plt.boxplot(
         [
-            df_unique_articles_language1["total_word_count"],
-            df_unique_articles_language2["total_word_count"],
+            metrics.df_unique_articles_language1["total_word_count"],
+            metrics.df_unique_articles_language2["total_word_count"],
         ],
         vert=True,
         patch_artist=True,
@@ -811,30 +879,24 @@ def plot_word_count_distribution_per_article():
     plt.tight_layout()
 
     ### Mostrar el gráfico
-    plt.show()
+    _show("word_count_distribution_per_article")
 
 
 def plot_word_count_distribution_and_quick_win():
-    word_counts_chart11_language1 = [
-        item["word_count"] for item in unique_article_desc_both_language1
+    word_counts_chart11_language1 = metrics.comparison_language1.articles_both[
+        "word_count"
     ]
-    word_counts_chart11_language2 = [
-        item["word_count"] for item in unique_article_desc_both_language2
+    word_counts_chart11_language2 = metrics.comparison_language2.articles_both[
+        "word_count"
     ]
 
-    mean_chart11_language1 = sum(word_counts_chart11_language1) / len(
-        word_counts_chart11_language1
-    )  # Média
-    median_chart11_language1 = statistics.median(
-        word_counts_chart11_language1
-    )  # Mediana
+    summary_chart11_language1 = summarize(word_counts_chart11_language1)
+    mean_chart11_language1 = summary_chart11_language1["mean"]  # Média
+    median_chart11_language1 = summary_chart11_language1["median"]  # Mediana
 
-    mean_chart11_language2 = sum(word_counts_chart11_language2) / len(
-        word_counts_chart11_language2
-    )  # Média
-    median_chart11_language2 = statistics.median(
-        word_counts_chart11_language2
-    )  # Mediana
+    summary_chart11_language2 = summarize(word_counts_chart11_language2)
+    mean_chart11_language2 = summary_chart11_language2["mean"]  # Média
+    median_chart11_language2 = summary_chart11_language2["median"]  # Mediana
 
     ### Crear el boxplot
     plt.figure(figsize=(8, 6))
@@ -872,24 +934,27 @@ def plot_word_count_distribution_and_quick_win():
     plt.tight_layout()
 
     ### Mostrar o gráfico
-    plt.show()
+    _show("word_count_distribution_and_quick_win")
 
     ### Quick Win Adding the estimated_effort
     rate_translation = (
         median_chart11_language2 - median_chart11_language1
     ) / median_chart11_language1
-    for item in unique_article_desc_only_language1:
+    for item in metrics.unique_article_desc_only_language1:
         item["estimated_word_count_translated"] = int(
             item["word_count_to_translate"] * rate_translation
             + item["word_count_to_translate"]
         )
 
-    for item in unique_article_desc_only_language2:
+    for item in metrics.unique_article_desc_only_language2:
         item["estimated_word_count_translated"] = int(
             item["word_count_to_translate"] / (rate_translation + 1)
         )
 
-    quick_win = unique_article_desc_only_language1 + unique_article_desc_only_language2
+    quick_win = (
+        metrics.unique_article_desc_only_language1
+        + metrics.unique_article_desc_only_language2
+    )
     sorted_quick_win = sorted(
         quick_win, key=lambda x: x["estimated_word_count_translated"]
     )
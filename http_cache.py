@@ -0,0 +1,198 @@
+"""
+This module provides a persistent on-disk cache for HTTP responses.
+
+Bodies are stored content-addressed (one file per SHA-256 of the body, shared by all
+the URLs that return the same content) and an SQLite index keeps, for every URL, the
+body hash and the `ETag`/`Last-Modified` validators used to revalidate it with a
+conditional GET. When the bodies exceed the size budget, the least recently used
+entries are evicted.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from typing import Any, Dict, Optional
+
+# Constants
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024  # 512 MB
+
+
+class DiskCache:
+    """
+    Content-addressed response cache with LRU eviction by total body size.
+    """
+
+    def __init__(self, directory: str, max_bytes: int = DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+        self.lock = threading.Lock()
+
+        os.makedirs(os.path.join(directory, "objects"), exist_ok=True)
+        self.connection = sqlite3.connect(
+            os.path.join(directory, "index.sqlite"), check_same_thread=False
+        )
+        self.connection.execute(
+            """
+            CREATE TABLE IF NOT EXISTS entries (
+                url TEXT PRIMARY KEY,
+                content_hash TEXT NOT NULL,
+                size INTEGER NOT NULL,
+                etag TEXT,
+                last_modified TEXT,
+                encoding TEXT,
+                last_used REAL NOT NULL
+            )
+            """
+        )
+        self.connection.execute(
+            "CREATE INDEX IF NOT EXISTS entries_last_used ON entries (last_used)"
+        )
+        self.connection.commit()
+
+    def _object_path(self, content_hash: str) -> str:
+        return os.path.join(self.directory, "objects", content_hash[:2], content_hash)
+
+    def lookup(self, url: str) -> Optional[Dict[str, Any]]:
+        """
+        Returns the validators of a cached URL, or `None` if it is not cached.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT content_hash, etag, last_modified, encoding FROM entries"
+                " WHERE url = ?",
+                (url,),
+            ).fetchone()
+        if row is None:
+            return None
+        return {
+            "content_hash": row[0],
+            "etag": row[1],
+            "last_modified": row[2],
+            "encoding": row[3],
+        }
+
+    def read(self, url: str) -> Optional[bytes]:
+        """
+        Returns the cached body of a URL and marks it as recently used.
+        """
+        entry = self.lookup(url)
+        if entry is None:
+            return None
+
+        try:
+            with open(self._object_path(entry["content_hash"]), "rb") as file:
+                body = file.read()
+        except FileNotFoundError:
+            self.delete(url)
+            return None
+
+        with self.lock:
+            self.connection.execute(
+                "UPDATE entries SET last_used = ? WHERE url = ?", (time.time(), url)
+            )
+            self.connection.commit()
+        return body
+
+    def store(
+        self,
+        url: str,
+        body: bytes,
+        etag: str = None,
+        last_modified: str = None,
+        encoding: str = None,
+    ):
+        """
+        Stores the body of a URL with its validators, then enforces the size budget.
+        """
+        content_hash = hashlib.sha256(body).hexdigest()
+        path = self._object_path(content_hash)
+
+        with self.lock:
+            if not os.path.exists(path):
+                os.makedirs(os.path.dirname(path), exist_ok=True)
+                # Write to a temporary file first so readers never see partial bodies
+                temporary_path = f"{path}.tmp"
+                with open(temporary_path, "wb") as file:
+                    file.write(body)
+                os.replace(temporary_path, path)
+
+            previous = self.connection.execute(
+                "SELECT content_hash FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            self.connection.execute(
+                "INSERT OR REPLACE INTO entries"
+                " (url, content_hash, size, etag, last_modified, encoding, last_used)"
+                " VALUES (?, ?, ?, ?, ?, ?, ?)",
+                (
+                    url,
+                    content_hash,
+                    len(body),
+                    etag,
+                    last_modified,
+                    encoding,
+                    time.time(),
+                ),
+            )
+            if previous is not None and previous[0] != content_hash:
+                self._remove_object_if_unused(previous[0])
+            self._evict()
+            self.connection.commit()
+
+    def delete(self, url: str):
+        """
+        Removes a URL from the cache.
+        """
+        with self.lock:
+            row = self.connection.execute(
+                "SELECT content_hash FROM entries WHERE url = ?", (url,)
+            ).fetchone()
+            if row is not None:
+                self.connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+                self._remove_object_if_unused(row[0])
+                self.connection.commit()
+
+    def _remove_object_if_unused(self, content_hash: str) -> bool:
+        """
+        Deletes a body file no entry points to anymore. Returns whether it was deleted.
+        """
+        in_use = self.connection.execute(
+            "SELECT 1 FROM entries WHERE content_hash = ? LIMIT 1", (content_hash,)
+        ).fetchone()
+        if in_use is not None:
+            return False
+
+        try:
+            os.remove(self._object_path(content_hash))
+        except FileNotFoundError:
+            pass
+        return True
+
+    def _evict(self):
+        """
+        Deletes the least recently used entries until the bodies fit in the budget.
+        Must be called with the lock held.
+        """
+        total = self.connection.execute(
+            "SELECT COALESCE(SUM(size), 0) FROM"
+            " (SELECT DISTINCT content_hash, size FROM entries)"
+        ).fetchone()[0]
+        if total <= self.max_bytes:
+            return
+
+        for url, content_hash, size in self.connection.execute(
+            "SELECT url, content_hash, size FROM entries ORDER BY last_used"
+        ).fetchall():
+            self.connection.execute("DELETE FROM entries WHERE url = ?", (url,))
+            if self._remove_object_if_unused(content_hash):
+                total -= size
+            if total <= self.max_bytes:
+                break
+
+    def close(self):
+        """
+        Closes the index database.
+        """
+        with self.lock:
+            self.connection.close()
@@ -0,0 +1,505 @@
+"""
+This module provides the HTTP client shared by the scraper: a connection-pooled
+`requests` session, a per-host token-bucket rate limiter and an optional on-disk
+response cache revalidated with conditional GETs. When telemetry is enabled (see
+`telemetry`), the phases of every request are timed and recorded.
+
+Responses are requested compressed by `requests` itself, whose default
+`Accept-Encoding` lists every encoding urllib3 decodes transparently: gzip and
+deflate, plus brotli and Zstandard when the `brotli` (or `brotlicffi`) and
+`zstandard` packages are installed. Wikipedia serves its pages gzip or brotli
+compressed, several times smaller than the HTML. The `Content-Encoding` of every
+response is recorded by `telemetry`, with its size as received and decoded.
+
+Failed requests are retried: when a host is overloaded (429, 503 or a MediaWiki
+`maxlag` error) its rate is lowered and its requests paused for the `Retry-After`
+of the answer, and the rate recovers as healthy responses come back. Connection
+errors and other transient server errors are retried with an exponential backoff.
+
+Functions:
+    configure(rate: float, burst: int, pool_size: int, cache_dir: str, cache_max_bytes: int):
+
+    get_session() -> requests.Session:
+
+    get(url: str, **kwargs) -> requests.Response:
+"""
+
+import random
+import socket
+import threading
+import time
+from datetime import datetime, timezone
+from email.utils import parsedate_to_datetime
+from typing import Dict, Optional
+from urllib.parse import urlparse
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.connection import HTTPConnection, HTTPSConnection
+from urllib3.connectionpool import HTTPConnectionPool, HTTPSConnectionPool
+from urllib3.exceptions import ConnectTimeoutError
+from urllib3.util.connection import allowed_gai_family
+
+import http_cache
+import telemetry
+
+# Constants
+USER_AGENT = "WikipediaEduBot/1.0 (User:test; mailto:test@gmail.com)"
+DEFAULT_RATE = 5.0  # requests/second per host
+DEFAULT_BURST = 10  # requests allowed back to back per host
+DEFAULT_POOL_SIZE = 32  # keep-alive connections per host
+MAX_ATTEMPTS = 5  # attempts of a request before giving up on it
+OVERLOAD_STATUSES = (429, 503)  # the server asks to slow down
+RETRY_STATUSES = (500, 502, 504)  # transient server errors
+MAX_RETRY_AFTER = 300.0  # longest Retry-After honoured, in seconds
+BACKOFF_BASE = 1.0  # seconds before the first retry, doubled at every attempt
+BACKOFF_MAX = 60.0
+BACKOFF_JITTER = 1.0
+RATE_DECREASE = 0.5  # factor applied to the rate of an overloaded host
+RATE_RECOVERY = 0.05  # fraction of the configured rate regained per healthy response
+MIN_RATE = 0.1  # requests/second an overloaded host is never slowed below
+
+
+class TokenBucket:
+    """
+    Thread-safe token bucket with an adaptive rate.
+
+    Tokens are refilled at `rate` per second up to `burst`. Each request takes one
+    token; when the bucket is empty the caller sleeps until its token is due, so
+    the sleep only happens when requests are actually arriving too fast.
+
+    The rate starts at `max_rate` and adapts to the server (AIMD, as in TCP):
+    `slow_down` halves it and pauses the bucket when the host is overloaded, and
+    every healthy response given to `speed_up` brings back a fraction of
+    `max_rate`. A bucket without a rate limit is only paused.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.max_rate = rate
+        self.rate = rate
+        self.burst = max(burst, 1)
+        self.tokens = float(self.burst)
+        self.updated_at = time.monotonic()
+        self.paused_until = 0.0
+        self.lock = threading.Lock()
+
+    def _refill(self, now: float):
+        self.tokens = min(self.burst, self.tokens + (now - self.updated_at) * self.rate)
+        self.updated_at = now
+
+    def acquire(self) -> float:
+        """
+        Takes one token, waiting if needed. Returns the time waited in seconds.
+        """
+        with self.lock:
+            now = time.monotonic()
+            wait_time = max(self.paused_until - now, 0.0)
+            if self.rate:
+                self._refill(now)
+                # Reserve the token even if it is not there yet, so concurrent
+                # callers queue up one interval after the other
+                self.tokens -= 1
+                if self.tokens < 0:
+                    wait_time = max(wait_time, -self.tokens / self.rate)
+
+        if wait_time > 0:
+            time.sleep(wait_time)
+        return wait_time
+
+    def slow_down(self, delay: float) -> float:
+        """
+        Halves the rate and pauses the bucket for `delay` seconds.
+        Returns the new rate.
+        """
+        with self.lock:
+            now = time.monotonic()
+            if self.rate:
+                self._refill(now)
+                self.rate = max(self.rate * RATE_DECREASE, min(MIN_RATE, self.max_rate))
+
+            paused_until = now + delay
+            if paused_until > self.paused_until:
+                if self.rate:
+                    # No token is refilled during the pause, so the requests
+                    # waiting for it resume one interval after the other
+                    pause = paused_until - max(self.paused_until, now)
+                    self.tokens = min(self.tokens, 0.0) - pause * self.rate
+                self.paused_until = paused_until
+            return self.rate
+
+    def speed_up(self) -> float:
+        """
+        Raises the rate back towards `max_rate` after a healthy response.
+        Returns the new rate.
+        """
+        if not self.max_rate or self.rate >= self.max_rate:
+            return self.rate
+
+        with self.lock:
+            self._refill(time.monotonic())
+            self.rate = min(self.max_rate, self.rate + RATE_RECOVERY * self.max_rate)
+            return self.rate
+
+
+class RateLimiter:
+    """
+    Keeps one token bucket per host.
+    """
+
+    def __init__(self, rate: float, burst: int):
+        self.rate = rate
+        self.burst = burst
+        self.buckets: Dict[str, TokenBucket] = {}
+        self.lock = threading.Lock()
+
+    def _bucket(self, url: str) -> TokenBucket:
+        host = urlparse(url).netloc
+        with self.lock:
+            if host not in self.buckets:
+                self.buckets[host] = TokenBucket(self.rate, self.burst)
+            return self.buckets[host]
+
+    def acquire(self, url: str) -> float:
+        """
+        Takes one token from the bucket of the URL's host.
+        """
+        return self._bucket(url).acquire()
+
+    def slow_down(self, url: str, delay: float) -> float:
+        """
+        Slows down the requests to the URL's host, pausing them for `delay` seconds.
+        """
+        return self._bucket(url).slow_down(delay)
+
+    def speed_up(self, url: str) -> float:
+        """
+        Lets the requests to the URL's host speed back up.
+        """
+        return self._bucket(url).speed_up()
+
+
+class _TracedConnectionMixin:
+    """
+    Times the phases of the new connections opened for a traced request (see
+    `telemetry.start_trace`): name resolution, TCP connection and TLS handshake.
+
+    The name is resolved here, then each address is connected to in turn as urllib3
+    would, so that the resolution and the connection are timed apart.
+    """
+
+    def _new_conn(self) -> socket.socket:
+        trace = telemetry.current_trace()
+        if trace is None:
+            return super()._new_conn()
+
+        host = self._dns_host
+        start = time.perf_counter()
+        try:
+            addresses = socket.getaddrinfo(
+                host, self.port, allowed_gai_family(), socket.SOCK_STREAM
+            )
+        except OSError:
+            # Let urllib3 resolve the name again and raise its own error
+            return super()._new_conn()
+        resolved = time.perf_counter()
+        trace["dns"] += resolved - start
+
+        error = None
+        try:
+            for address in dict.fromkeys(info[4][0] for info in addresses):
+                self._dns_host = address
+                try:
+                    return super()._new_conn()
+                except ConnectTimeoutError as e:
+                    error = e
+            raise error
+        finally:
+            self._dns_host = host
+            trace["connect"] += time.perf_counter() - resolved
+
+    def connect(self):
+        trace = telemetry.current_trace()
+        if trace is None:
+            return super().connect()
+
+        before = trace["dns"] + trace["connect"]
+        start = time.perf_counter()
+        try:
+            return super().connect()
+        finally:
+            if isinstance(self, HTTPSConnection):
+                connection_time = trace["dns"] + trace["connect"] - before
+                trace["tls"] += time.perf_counter() - start - connection_time
+
+
+class _TracedHTTPConnection(_TracedConnectionMixin, HTTPConnection):
+    pass
+
+
+class _TracedHTTPSConnection(_TracedConnectionMixin, HTTPSConnection):
+    pass
+
+
+class _TracedHTTPConnectionPool(HTTPConnectionPool):
+    ConnectionCls = _TracedHTTPConnection
+
+
+class _TracedHTTPSConnectionPool(HTTPSConnectionPool):
+    ConnectionCls = _TracedHTTPSConnection
+
+
+class _TracedAdapter(HTTPAdapter):
+    """
+    Adapter whose connection pools open traced connections.
+    """
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        self.poolmanager.pool_classes_by_scheme = {
+            "http": _TracedHTTPConnectionPool,
+            "https": _TracedHTTPSConnectionPool,
+        }
+
+
+_session = None
+_session_lock = threading.Lock()
+_pool_size = DEFAULT_POOL_SIZE
+_limiter = RateLimiter(DEFAULT_RATE, DEFAULT_BURST)
+_cache = None
+
+
+def configure(
+    rate: float = DEFAULT_RATE,
+    burst: int = DEFAULT_BURST,
+    pool_size: int = DEFAULT_POOL_SIZE,
+    cache_dir: str = None,
+    cache_max_bytes: int = http_cache.DEFAULT_MAX_BYTES,
+):
+    """
+    Configures the rate limiter, the connection pool and the response cache.
+
+    Args:
+        rate (float): Requests per second allowed per host. `0` or `None` disables the limit.
+        burst (int): Requests allowed back to back per host before throttling.
+        pool_size (int): Keep-alive connections kept per host.
+        cache_dir (str): Directory of the on-disk response cache. `None` disables it.
+        cache_max_bytes (int): Size budget of the cached bodies.
+    """
+    global _limiter, _session, _pool_size, _cache
+
+    _limiter = RateLimiter(rate, burst)
+
+    if _cache is not None:
+        _cache.close()
+    _cache = http_cache.DiskCache(cache_dir, cache_max_bytes) if cache_dir else None
+
+    if pool_size != _pool_size:
+        with _session_lock:
+            if _session is not None:
+                _session.close()
+            _session = None
+            _pool_size = pool_size
+
+
+def get_session() -> requests.Session:
+    """
+    Returns the shared session, creating it on first use.
+    """
+    global _session
+
+    with _session_lock:
+        if _session is None:
+            session = requests.Session()
+            adapter = _TracedAdapter(
+                pool_connections=_pool_size, pool_maxsize=_pool_size
+            )
+            session.mount("http://", adapter)
+            session.mount("https://", adapter)
+            _session = session
+        return _session
+
+
+def _send(url: str, **kwargs) -> requests.Response:
+    """
+    Sends a GET request through the shared session once the host's rate limit allows
+    it. When telemetry is enabled, the time of each phase of the request is recorded
+    with its status and size.
+    """
+    if telemetry.get() is None:
+        _limiter.acquire(url)
+        return get_session().get(url, **kwargs)
+
+    stream = kwargs.pop("stream", False)
+    event = {"url": url, "host": urlparse(url).netloc, "status": None}
+    trace = telemetry.start_trace()
+    try:
+        event["rate_limit_wait"] = _limiter.acquire(url)
+        start = time.perf_counter()
+        try:
+            response = get_session().get(url, stream=True, **kwargs)
+        except requests.exceptions.RequestException as e:
+            event["error"] = type(e).__name__
+            raise
+        headers_received = time.perf_counter()
+        if not stream:
+            response.content  # downloads the body
+        event["download"] = time.perf_counter() - headers_received
+        # The connection phases are part of the wait for the headers
+        event.update(trace)
+        event["ttfb"] = max(
+            headers_received - start - trace["dns"] - trace["connect"] - trace["tls"],
+            0.0,
+        )
+        event["status"] = response.status_code
+        event["encoding"] = response.headers.get("Content-Encoding", "identity")
+        # Compressed bodies are counted as received, and once decoded
+        event["decoded_bytes"] = None if stream else len(response.content)
+        event["bytes"] = (
+            response.raw.tell() if hasattr(response.raw, "tell") else 0
+        ) or len(response.content)
+        return response
+    finally:
+        telemetry.end_trace()
+        telemetry.record_request(event)
+
+
+def _retry_after(response: requests.Response) -> Optional[float]:
+    """
+    Returns the delay requested by the `Retry-After` header (seconds or HTTP date).
+    """
+    value = response.headers.get("Retry-After")
+    if value is None:
+        return None
+    try:
+        seconds = float(value)
+    except ValueError:
+        try:
+            retry_at = parsedate_to_datetime(value)
+            seconds = (retry_at - datetime.now(timezone.utc)).total_seconds()
+        except (TypeError, ValueError):
+            return None
+    return min(max(seconds, 0.0), MAX_RETRY_AFTER)
+
+
+def _backoff(attempt: int) -> float:
+    return min(BACKOFF_MAX, BACKOFF_BASE * 2 ** (attempt - 1)) + random.uniform(
+        0, BACKOFF_JITTER
+    )
+
+
+def _is_overloaded(response: requests.Response) -> bool:
+    return (
+        response.status_code in OVERLOAD_STATUSES
+        or response.headers.get("MediaWiki-API-Error") == "maxlag"
+    )
+
+
+def _request(url: str, **kwargs) -> requests.Response:
+    """
+    Sends a GET request, retrying it up to `MAX_ATTEMPTS` times on transient failures.
+
+    An overloaded host is slowed down and paused for the `Retry-After` of the answer
+    (or an exponential backoff), so the other requests to it wait as well. Other
+    transient failures only back off the request itself. Once the attempts are
+    exhausted, the last response is returned or the last error raised; other
+    answers (e.g. 404) are returned right away.
+    """
+    for attempt in range(1, MAX_ATTEMPTS + 1):
+        last_attempt = attempt == MAX_ATTEMPTS
+        try:
+            response = _send(url, **kwargs)
+        except (
+            requests.exceptions.ConnectionError,
+            requests.exceptions.Timeout,
+            requests.exceptions.ChunkedEncodingError,
+        ) as e:
+            if last_attempt:
+                raise
+            delay = _backoff(attempt)
+            telemetry.record_retry(url, type(e).__name__, attempt, delay)
+            time.sleep(delay)
+            continue
+
+        if _is_overloaded(response):
+            delay = _retry_after(response)
+            rate = _limiter.slow_down(
+                url, _backoff(attempt) if delay is None else delay
+            )
+            telemetry.record_rate(url, rate)
+            if last_attempt:
+                return response
+            reason = response.headers.get("MediaWiki-API-Error") or response.status_code
+            # The wait happens in the rate limiter, with the other requests
+            telemetry.record_retry(url, str(reason), attempt, 0.0)
+            continue
+
+        if response.status_code in RETRY_STATUSES:
+            if last_attempt:
+                return response
+            delay = _backoff(attempt)
+            telemetry.record_retry(url, str(response.status_code), attempt, delay)
+            time.sleep(delay)
+            continue
+
+        if response.status_code < 400:
+            telemetry.record_rate(url, _limiter.speed_up(url))
+        return response
+
+
+def get(url: str, **kwargs) -> requests.Response:
+    """
+    Sends a GET request through the shared session once the host's rate limit allows
+    it, retrying the transient failures (see `_request`).
+
+    When the cache is enabled, a cached URL is revalidated with `If-None-Match` /
+    `If-Modified-Since`; a `304 Not Modified` answer is turned into a `200` response
+    with the cached body. Every revalidation is recorded by `telemetry`, with
+    whether the cached body was used. A URL answered without validators is removed
+    from the cache, as it cannot be revalidated anymore.
+    """
+    if _cache is None:
+        return _request(url, **kwargs)
+
+    # The cache key is the full URL, including the query string
+    cache_key = requests.Request("GET", url, params=kwargs.get("params")).prepare().url
+    entry = _cache.lookup(cache_key)
+
+    headers = kwargs.pop("headers", None) or {}
+    conditional_headers = dict(headers)
+    if entry is not None:
+        if entry["etag"]:
+            conditional_headers["If-None-Match"] = entry["etag"]
+        if entry["last_modified"]:
+            conditional_headers["If-Modified-Since"] = entry["last_modified"]
+
+    response = _request(url, headers=conditional_headers, **kwargs)
+
+    if response.status_code == 304 and entry is not None:
+        body = _cache.read(cache_key)
+        if body is not None:
+            response.status_code = 200
+            response._content = body
+            response.encoding = entry["encoding"]
+            telemetry.record_cache(url, from_cache=True)
+            return response
+        # The body was evicted in the meantime: fetch it again unconditionally
+        response = _request(url, headers=headers, **kwargs)
+
+    if entry is not None:
+        telemetry.record_cache(url, from_cache=False)
+
+    etag = response.headers.get("ETag")
+    last_modified = response.headers.get("Last-Modified")
+    if response.status_code == 200:
+        if etag or last_modified:
+            _cache.store(
+                cache_key,
+                response.content,
+                etag=etag,
+                last_modified=last_modified,
+                encoding=response.encoding,
+            )
+        elif entry is not None:
+            _cache.delete(cache_key)
+
+    return response
@@ -0,0 +1,153 @@
+"""
+This module compares the datasets of any number of languages at once.
+
+Every page URL of every dataset (the pages themselves and their language links) is
+interned into an integer ID, and each ID gets a bitmap of the languages whose
+language links point to it (bit `i` for the `i`-th language). A page of a language
+exists in another one when the bit of that language is set, as
+`database.filter_matching_ids` decides it for a pair of languages. Comparing N
+languages then costs N loads and one pass over their pages, instead of one
+comparison per pair.
+
+Functions:
+    load(languages: Sequence[str], snapshot: bool = True) -> Coverage:
+"""
+
+from typing import Dict, List, Sequence
+
+import numpy as np
+import pandas as pd
+
+import database as db
+from columnar import ColumnarDataset
+
+# Constants
+MAX_LANGUAGES = 64  # bits of a bitmap
+KINDS = ("categories", "articles")
+
+
+class Coverage:
+    """
+    Presence of the categories and articles of several languages in each other.
+
+    `masks[kind][language]` holds the bitmap of every category (in dataset order)
+    or distinct article (in order of first appearance) of the language; its own bit
+    is always set.
+    """
+
+    def __init__(self, tables: Dict[str, ColumnarDataset]):
+        """
+        Args:
+            tables (Dict[str, ColumnarDataset]): The columnar tables of each language.
+
+        Raises:
+            ValueError: If more than `MAX_LANGUAGES` languages are compared.
+        """
+        if len(tables) > MAX_LANGUAGES:
+            raise ValueError(f"At most {MAX_LANGUAGES} languages can be compared")
+
+        self.languages: List[str] = list(tables)
+        self.tables = tables
+
+        # Intern the URLs of all the datasets at once
+        columns = [
+            column
+            for dataset in tables.values()
+            for column in (dataset.category_ids, dataset.article_ids, dataset.languages)
+        ]
+        codes, self.urls = pd.factorize(np.concatenate(columns))
+        codes = np.split(codes, np.cumsum([len(column) for column in columns])[:-1])
+
+        bitmap = np.zeros(len(self.urls), dtype=np.uint64)
+        for i in range(len(self.languages)):
+            bitmap[codes[3 * i + 2]] |= np.uint64(1 << i)
+
+        self.masks: Dict[str, Dict[str, np.ndarray]] = {kind: {} for kind in KINDS}
+        for i, language in enumerate(self.languages):
+            own = np.uint64(1 << i)
+            self.masks["categories"][language] = bitmap[codes[3 * i]] | own
+            self.masks["articles"][language] = bitmap[codes[3 * i + 1]] | own
+
+    def _bits(self, languages: Sequence[str]) -> np.uint64:
+        bits = 0
+        for language in languages:
+            bits |= 1 << self.languages.index(language)
+        return np.uint64(bits)
+
+    def matrix(self, kind: str = "articles") -> pd.DataFrame:
+        """
+        Returns the coverage matrix: the number of pages of the row language that
+        exist in the column language. The diagonal holds the number of pages.
+        """
+        shifts = np.arange(len(self.languages), dtype=np.uint64)
+        counts = np.array(
+            [
+                ((self.masks[kind][language][:, None] >> shifts) & np.uint64(1)).sum(
+                    axis=0
+                )
+                for language in self.languages
+            ],
+            dtype=np.int64,
+        ).reshape(len(self.languages), len(self.languages))
+        return pd.DataFrame(counts, index=self.languages, columns=self.languages)
+
+    def exclusive(self, kind: str = "articles") -> pd.Series:
+        """
+        Returns the number of pages of each language that exist in no other one.
+        """
+        return pd.Series(
+            {
+                language: np.count_nonzero(
+                    self.masks[kind][language] == self._bits([language])
+                )
+                for language in self.languages
+            }
+        )
+
+    def select(
+        self,
+        language: str,
+        kind: str = "articles",
+        present: Sequence[str] = (),
+        absent: Sequence[str] = (),
+    ) -> np.ndarray:
+        """
+        Returns whether each page of a language (in the order of `masks`) exists in
+        all the `present` languages and in none of the `absent` ones.
+        """
+        masks = self.masks[kind][language]
+        present_bits = self._bits(present)
+        return ((masks & present_bits) == present_bits) & (
+            (masks & self._bits(absent)) == 0
+        )
+
+    def pages(
+        self,
+        language: str,
+        kind: str = "articles",
+        present: Sequence[str] = (),
+        absent: Sequence[str] = (),
+    ) -> List[str]:
+        """
+        Returns the URLs of the pages of a language that exist in all the `present`
+        languages and in none of the `absent` ones, e.g. the articles to translate
+        into another language.
+        """
+        dataset = self.tables[language]
+        ids = dataset.category_ids if kind == "categories" else dataset.article_ids
+        return ids[self.select(language, kind, present, absent)].tolist()
+
+
+def load(languages: Sequence[str], snapshot: bool = True) -> Coverage:
+    """
+    Loads the datasets of the languages as columnar tables and compares them.
+
+    Args:
+        languages (Sequence[str]): The keys of the datasets, e.g. `["es", "en", "pt"]`.
+        snapshot (bool): Use the binary snapshots of the datasets (see `database.load`).
+    """
+    tables = {}
+    for language in languages:
+        db.load(language, columnar=True, snapshot=snapshot)
+        tables[language] = db.read_tables(language)
+    return Coverage(tables)
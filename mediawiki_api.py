@@ -0,0 +1,238 @@
+"""
+This module is a small client for the MediaWiki Action API (`api.php`), used by the
+"api" backend of the scraper instead of the rendered HTML pages.
+
+Functions:
+    api_endpoint(page_url: str) -> str:
+
+    title_from_url(page_url: str) -> str:
+
+    page_url(base_url: str, title: str) -> str:
+
+    page_name(title: str, namespace: int) -> str:
+
+    query(endpoint: str, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+
+    get_category_members(endpoint: str, title: str) -> Tuple[List[Tuple[str, int]], List[str]]:
+
+    get_langlinks(endpoint: str, titles: List[str]) -> Dict[str, List[str]]:
+
+    get_revision_ids(endpoint: str, titles: List[str]) -> Dict[str, int]:
+
+    get_revision_ids_and_langlinks(endpoint: str, titles: List[str]) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+
+    get_page_html(endpoint: str, title: str) -> str:
+"""
+
+import logging
+from typing import Any, Dict, Iterator, List, Tuple
+from urllib.parse import unquote, urlparse
+
+import requests
+
+import http_client
+
+# Constants
+API_PATH = "/w/api.php"
+TITLES_PER_REQUEST = 50  # maximum number of titles per query for regular clients
+MAXLAG = 5  # seconds of replication lag above which the API asks to come back later
+MAIN_NAMESPACE = 0
+CATEGORY_NAMESPACE = 14
+
+
+def api_endpoint(page_url: str) -> str:
+    """
+    Returns the `api.php` endpoint of the wiki that serves the given page.
+    """
+    parsed_url = urlparse(page_url)
+    return f"{parsed_url.scheme}://{parsed_url.netloc}{API_PATH}"
+
+
+def title_from_url(page_url: str) -> str:
+    """
+    Returns the page title of a `/wiki/<title>` URL.
+    """
+    path = unquote(urlparse(page_url).path)
+    return path.split("/wiki/", 1)[-1].replace("_", " ")
+
+
+def page_url(base_url: str, title: str) -> str:
+    """
+    Returns the `/wiki/<title>` URL of a page title, as the scraper stores it.
+    """
+    return f"{base_url}/wiki/{title.replace(' ', '_')}"
+
+
+def page_name(title: str, namespace: int) -> str:
+    """
+    Returns the name of a page as shown on it (`mw-page-title-main`): its title
+    without the namespace prefix. Titles in the main namespace are kept whole, as
+    they can contain colons.
+    """
+    if namespace == MAIN_NAMESPACE:
+        return title
+    return title.split(":", 1)[-1]
+
+
+def _get_json(endpoint: str, params: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Sends one API request and returns the decoded JSON response.
+    With `maxlag`, the API answers with a `maxlag` error when its replicas lag
+    behind; `http_client` then slows down and retries the request.
+    """
+    headers = {"User-Agent": http_client.USER_AGENT}
+    params = {"format": "json", "formatversion": "2", "maxlag": MAXLAG, **params}
+
+    try:
+        response = http_client.get(endpoint, params=params, headers=headers, timeout=10)
+        response.raise_for_status()
+        result = response.json()
+    except requests.exceptions.RequestException as e:
+        logging.error("Error fetching %s: %s", endpoint, e)
+        raise
+
+    if "error" in result:
+        raise requests.exceptions.RequestException(
+            f"API error {result['error'].get('code')}: {result['error'].get('info')}"
+        )
+    return result
+
+
+def query(endpoint: str, params: Dict[str, Any]) -> Iterator[Dict[str, Any]]:
+    """
+    Runs an `action=query` request and yields every response, following `continue`.
+    """
+    params = {"action": "query", **params}
+    continuation = {}
+
+    while True:
+        result = _get_json(endpoint, {**params, **continuation})
+        yield result
+        if "continue" not in result:
+            break
+        continuation = result["continue"]
+
+
+def get_category_members(
+    endpoint: str, title: str
+) -> Tuple[List[Tuple[str, int]], List[str]]:
+    """
+    Lists the members of a category.
+
+    Returns:
+        Tuple[List[Tuple[str, int]], List[str]]: The title and namespace of the
+        pages, and the titles of the subcategories.
+    """
+    pages = []
+    subcategories = []
+
+    for result in query(
+        endpoint,
+        {
+            "list": "categorymembers",
+            "cmtitle": title,
+            "cmtype": "page|subcat",
+            "cmlimit": "max",
+        },
+    ):
+        for member in result.get("query", {}).get("categorymembers", []):
+            if member["ns"] == CATEGORY_NAMESPACE:
+                subcategories.append(member["title"])
+            else:
+                pages.append((member["title"], member["ns"]))
+
+    return pages, subcategories
+
+
+def _query_pages(
+    endpoint: str, titles: List[str], params: Dict[str, Any]
+) -> Iterator[Tuple[str, Dict[str, Any]]]:
+    """
+    Runs a `prop=` query over the given titles, `TITLES_PER_REQUEST` titles per request.
+    Yields every returned page with the title as it was requested.
+    """
+    for i in range(0, len(titles), TITLES_PER_REQUEST):
+        batch = titles[i : i + TITLES_PER_REQUEST]
+        for result in query(endpoint, {**params, "titles": "|".join(batch)}):
+            # Map the normalized titles back to the requested ones
+            normalized = {
+                item["to"]: item["from"]
+                for item in result.get("query", {}).get("normalized", [])
+            }
+            for page in result.get("query", {}).get("pages", []):
+                yield normalized.get(page["title"], page["title"]), page
+
+
+def get_langlinks(endpoint: str, titles: List[str]) -> Dict[str, List[str]]:
+    """
+    Fetches the language links of the given pages, `TITLES_PER_REQUEST` titles per request.
+
+    Returns:
+        Dict[str, List[str]]: The URLs of each page in other languages, keyed by the
+        title as it was requested.
+    """
+    langlinks = {title: [] for title in titles}
+
+    for title, page in _query_pages(
+        endpoint, titles, {"prop": "langlinks", "llprop": "url", "lllimit": "max"}
+    ):
+        langlinks.setdefault(title, []).extend(
+            unquote(link["url"]) for link in page.get("langlinks", [])
+        )
+
+    return langlinks
+
+
+def get_revision_ids(endpoint: str, titles: List[str]) -> Dict[str, int]:
+    """
+    Fetches the ID of the latest revision of the given pages, `TITLES_PER_REQUEST`
+    titles per request. Missing pages are left out.
+
+    Returns:
+        Dict[str, int]: The latest revision ID, keyed by the title as it was requested.
+    """
+    return {
+        title: page["lastrevid"]
+        for title, page in _query_pages(endpoint, titles, {"prop": "info"})
+        if "lastrevid" in page
+    }
+
+
+def get_revision_ids_and_langlinks(
+    endpoint: str, titles: List[str]
+) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+    """
+    Fetches the latest revision ID and the language links of the given pages in the
+    same requests (`prop=info|langlinks`), `TITLES_PER_REQUEST` titles per request.
+    Missing pages are left out of the revision IDs.
+
+    Returns:
+        Tuple[Dict[str, int], Dict[str, List[str]]]: The latest revision IDs and the
+        URLs of each page in other languages, keyed by the title as it was requested.
+    """
+    revisions = {}
+    langlinks = {title: [] for title in titles}
+
+    for title, page in _query_pages(
+        endpoint,
+        titles,
+        {"prop": "info|langlinks", "llprop": "url", "lllimit": "max"},
+    ):
+        if "lastrevid" in page:
+            revisions[title] = page["lastrevid"]
+        langlinks.setdefault(title, []).extend(
+            unquote(link["url"]) for link in page.get("langlinks", [])
+        )
+
+    return revisions, langlinks
+
+
+def get_page_html(endpoint: str, title: str) -> str:
+    """
+    Returns the rendered HTML of the content of a page.
+    """
+    result = _get_json(
+        endpoint,
+        {"action": "parse", "page": title, "prop": "text", "redirects": "1"},
+    )
+    return result["parse"]["text"]
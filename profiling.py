@@ -0,0 +1,326 @@
+"""
+This module profiles the named stages of the scraper and of the analysis: `fetch`,
+`parse` and `sections` in the crawl, `load` and `index` in `database.load`,
+`aggregate` and `render` in the charts.
+
+Profiling is off until `enable` is called (or inside `profile`), and `stage` is then
+a no-op. When it is on, every stage is run under its own cProfile profiler (in the
+thread running it; the profiler of an enclosing stage is paused meanwhile), and
+tracemalloc snapshots are taken when a stage starts for the first time and when no
+call of it is running anymore. A snapshot walks over all the traced blocks, so the
+later ones are shared by all the idle stages and taken at most every
+`SNAPSHOT_INTERVAL` seconds, and once more when profiling stops. `disable` writes,
+for each stage:
+
+- `<stage>.prof`: the CPU profile of all its calls, for `pstats` or snakeviz;
+- `<stage>.txt`: the top functions by cumulative time and the top lines by memory
+  allocated between the first start and the last end of the stage (which includes
+  what other threads allocated meanwhile);
+
+and a `summary.txt` with the calls, wall time and allocated memory of each stage.
+
+Stages running in worker processes (`scrape_category(parse_workers=...)`) are not
+profiled.
+
+Functions:
+    enable(directory: str, top: int, allocations: bool) -> Profiler:
+
+    disable() -> List[str]:
+
+    get() -> Profiler:
+
+    stage(name: str) -> ContextManager:
+
+    call(name: str, func: Callable[..., Any], *args) -> Any:
+
+    profile(directory: str, top: int, allocations: bool) -> ContextManager[Profiler]:
+"""
+
+import contextlib
+import cProfile
+import io
+import os
+import pstats
+import threading
+import time
+import tracemalloc
+from typing import Any, Callable, ContextManager, Dict, Iterator, List, Optional
+
+# Constants
+STAGES = ("fetch", "parse", "sections", "load", "index", "aggregate", "render")
+DEFAULT_TOP = 25  # functions and allocation lines in the reports
+TRACEBACK_FRAMES = 1  # frames stored by tracemalloc for each allocation
+SNAPSHOT_INTERVAL = 10.0  # seconds between two shared allocation snapshots
+
+
+class _Stage:
+    """
+    What was collected for one stage.
+    """
+
+    def __init__(self):
+        self.calls = 0
+        self.seconds = 0.0
+        self.active = 0
+        self.stats: Optional[pstats.Stats] = None
+        self.first_snapshot: Optional[tracemalloc.Snapshot] = None
+        self.last_snapshot: Optional[tracemalloc.Snapshot] = None
+        # The stage ran since its last snapshot
+        self.pending = False
+
+
+class Profiler:
+    """
+    Collects the CPU profiles and allocation snapshots of the stages, and writes
+    their reports into `directory`.
+    """
+
+    def __init__(
+        self, directory: str, top: int = DEFAULT_TOP, allocations: bool = True
+    ):
+        self.directory = directory
+        self.top = top
+        self.allocations = allocations
+        self.stages: Dict[str, _Stage] = {}
+        self.lock = threading.Lock()
+        self.local = threading.local()
+        self.started_tracemalloc = False
+        self.snapshot_time = time.monotonic()
+
+    def start(self):
+        if self.allocations and not tracemalloc.is_tracing():
+            tracemalloc.start(TRACEBACK_FRAMES)
+            self.started_tracemalloc = True
+
+    def _snapshot(self) -> tracemalloc.Snapshot:
+        return tracemalloc.take_snapshot().filter_traces(
+            (
+                tracemalloc.Filter(False, tracemalloc.__file__),
+                tracemalloc.Filter(False, pstats.__file__),
+                tracemalloc.Filter(False, cProfile.__file__),
+                tracemalloc.Filter(False, __file__),
+            )
+        )
+
+    @contextlib.contextmanager
+    def stage(self, name: str) -> Iterator[None]:
+        """
+        Profiles the code run inside the block as part of the stage.
+        """
+        # Profilers of the enclosing stages running in this thread
+        stack = self.local.__dict__.setdefault("stack", [])
+        if stack and stack[-1] is not None:
+            stack[-1].disable()
+
+        with self.lock:
+            stage = self.stages.setdefault(name, _Stage())
+            stage.calls += 1
+            stage.active += 1
+            first = stage.calls == 1
+        if first and self.allocations:
+            snapshot = self._snapshot()
+            with self.lock:
+                stage.first_snapshot = snapshot
+
+        profiler = cProfile.Profile()
+        try:
+            profiler.enable()
+        except ValueError:
+            # Another profiler is already active (Python 3.12+ only allows one)
+            profiler = None
+        stack.append(profiler)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            elapsed = time.perf_counter() - start
+            stack.pop()
+            if profiler is not None:
+                profiler.disable()
+
+            with self.lock:
+                stage.seconds += elapsed
+                if profiler is not None:
+                    if stage.stats is None:
+                        stage.stats = pstats.Stats(profiler)
+                    else:
+                        stage.stats.add(profiler)
+                stage.active -= 1
+                stage.pending = True
+                due = (
+                    self.allocations
+                    and stage.active == 0
+                    and time.monotonic() - self.snapshot_time >= SNAPSHOT_INTERVAL
+                )
+                if due:
+                    self.snapshot_time = time.monotonic()
+            if due:
+                self._take_last_snapshot()
+
+            if stack and stack[-1] is not None:
+                stack[-1].enable()
+
+    def _take_last_snapshot(self):
+        """
+        Takes the last snapshot of the idle stages that ran since their previous one.
+        """
+        snapshot = self._snapshot()
+        with self.lock:
+            for stage in self.stages.values():
+                if stage.pending and stage.active == 0:
+                    stage.last_snapshot = snapshot
+                    stage.pending = False
+
+    def _report(self, name: str, stage: _Stage) -> str:
+        lines = [
+            f"Stage: {name}",
+            f"Calls: {stage.calls}",
+            f"Wall time: {stage.seconds:.3f}s (summed over the threads running it)",
+            "",
+            f"CPU profile, top {self.top} functions by cumulative time:",
+        ]
+        if stage.stats is not None:
+            buffer = io.StringIO()
+            stage.stats.stream = buffer
+            stage.stats.sort_stats(pstats.SortKey.CUMULATIVE).print_stats(self.top)
+            lines.append(buffer.getvalue())
+        else:
+            lines.append("  (not profiled)\n")
+
+        lines.append(f"Memory allocated, top {self.top} lines:")
+        if not self.allocations:
+            lines.append("  (not traced)")
+        for difference in self._allocations(stage)[: self.top]:
+            lines.append(f"  {difference}")
+        return "\n".join(lines) + "\n"
+
+    def _allocations(self, stage: _Stage) -> List[tracemalloc.StatisticDiff]:
+        if stage.first_snapshot is None or stage.last_snapshot is None:
+            return []
+        return stage.last_snapshot.compare_to(stage.first_snapshot, "lineno")
+
+    def write(self) -> List[str]:
+        """
+        Writes the reports of the stages. Returns the paths of the written files.
+        """
+        os.makedirs(self.directory, exist_ok=True)
+        paths = []
+        summary = [
+            f"{'Stage':<12}{'Calls':>10}{'Wall time (s)':>16}{'Allocated (KiB)':>18}"
+        ]
+        with self.lock:
+            stages = sorted(
+                self.stages.items(),
+                key=lambda item: STAGES.index(item[0]) if item[0] in STAGES else 99,
+            )
+            for name, stage in stages:
+                if stage.stats is not None:
+                    path = os.path.join(self.directory, f"{name}.prof")
+                    stage.stats.dump_stats(path)
+                    paths.append(path)
+
+                path = os.path.join(self.directory, f"{name}.txt")
+                with open(path, "w", encoding="utf-8") as file:
+                    file.write(self._report(name, stage))
+                paths.append(path)
+
+                allocated = sum(d.size_diff for d in self._allocations(stage)) / 1024
+                summary.append(
+                    f"{name:<12}{stage.calls:>10}{stage.seconds:>16.3f}"
+                    f"{allocated:>18.1f}"
+                )
+
+        path = os.path.join(self.directory, "summary.txt")
+        with open(path, "w", encoding="utf-8") as file:
+            file.write("\n".join(summary) + "\n")
+        paths.append(path)
+        return paths
+
+    def stop(self) -> List[str]:
+        """
+        Stops tracing the allocations (if it was started here) and writes the reports.
+        """
+        if self.allocations:
+            self._take_last_snapshot()
+        try:
+            return self.write()
+        finally:
+            if self.started_tracemalloc:
+                tracemalloc.stop()
+
+
+_profiler: Optional[Profiler] = None
+
+
+def enable(
+    directory: str, top: int = DEFAULT_TOP, allocations: bool = True
+) -> Profiler:
+    """
+    Starts profiling the stages.
+
+    Args:
+        directory (str): Directory the reports are written to by `disable`.
+        top (int): Number of functions and allocation lines in the reports.
+        allocations (bool): Trace the allocations with tracemalloc, which slows
+            down the allocations of every thread a few times. Without them, only
+            the CPU profiles are collected.
+    """
+    global _profiler
+
+    _profiler = Profiler(directory, top, allocations)
+    _profiler.start()
+    return _profiler
+
+
+def disable() -> List[str]:
+    """
+    Stops profiling and writes the reports. Returns the paths of the written files.
+    """
+    global _profiler
+
+    profiler, _profiler = _profiler, None
+    return profiler.stop() if profiler is not None else []
+
+
+def get() -> Optional[Profiler]:
+    """
+    Returns the active profiler, or `None` when profiling is off.
+    """
+    return _profiler
+
+
+def stage(name: str) -> ContextManager:
+    """
+    Returns a context manager profiling its block as part of the named stage, or
+    doing nothing when profiling is off.
+    """
+    profiler = _profiler
+    if profiler is None:
+        return contextlib.nullcontext()
+    return profiler.stage(name)
+
+
+def call(name: str, func: Callable[..., Any], *args) -> Any:
+    """
+    Calls `func(*args)` as part of the named stage, e.g. in an executor.
+    """
+    with stage(name):
+        return func(*args)
+
+
+@contextlib.contextmanager
+def profile(
+    directory: str, top: int = DEFAULT_TOP, allocations: bool = True
+) -> Iterator[Profiler]:
+    """
+    Profiles the stages run inside the block, then writes the reports.
+
+    Example:
+        with profiling.profile("profile"):
+            graphics.render_all("charts")
+    """
+    profiler = enable(directory, top, allocations)
+    try:
+        yield profiler
+    finally:
+        disable()
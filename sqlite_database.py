@@ -0,0 +1,326 @@
+"""
+This module stores a scraped dataset in SQLite, as an alternative to the JSON files
+read by the `database` module.
+
+The category tree is normalized into tables of categories, articles (stored once,
+with their total word count and number of sections), sections, category membership
+and language links, indexed so that the queries of the `database` module are
+answered without loading the dataset into memory. The crawler can write into it
+directly, one transaction per complete category.
+"""
+
+import os
+import sqlite3
+from typing import Any, Dict, Iterable, List, Set
+
+# Constants
+SUFFIXES = (".sqlite", ".sqlite3", ".db")
+MAX_PARAMETERS = 500  # values bound per `IN (...)` query
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS categories (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    parent_url TEXT,
+    name TEXT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS articles (
+    id INTEGER PRIMARY KEY,
+    url TEXT NOT NULL UNIQUE,
+    name TEXT NOT NULL,
+    revision_id INTEGER,
+    word_count INTEGER NOT NULL,
+    sections_count INTEGER NOT NULL
+);
+CREATE TABLE IF NOT EXISTS sections (
+    article_id INTEGER NOT NULL REFERENCES articles (id),
+    position INTEGER NOT NULL,
+    name TEXT NOT NULL,
+    word_count INTEGER NOT NULL,
+    PRIMARY KEY (article_id, position)
+);
+CREATE TABLE IF NOT EXISTS category_articles (
+    category_id INTEGER NOT NULL REFERENCES categories (id),
+    position INTEGER NOT NULL,
+    article_id INTEGER NOT NULL REFERENCES articles (id),
+    PRIMARY KEY (category_id, position)
+);
+CREATE INDEX IF NOT EXISTS category_articles_article
+    ON category_articles (article_id);
+CREATE TABLE IF NOT EXISTS language_links (
+    page_url TEXT NOT NULL,
+    position INTEGER NOT NULL,
+    language_url TEXT NOT NULL,
+    PRIMARY KEY (page_url, position)
+);
+CREATE INDEX IF NOT EXISTS language_links_language
+    ON language_links (language_url);
+"""
+
+
+def is_sqlite_path(path: str) -> bool:
+    """
+    Tells whether a dataset path names an SQLite database.
+    """
+    return path.endswith(SUFFIXES)
+
+
+class SqliteDatabase:
+    """
+    A scraped dataset stored in SQLite.
+
+    It can be written like a `datasets.JsonlWriter` (`write` and `close`, with the
+    counts of what was written) and queried like the `database` module.
+    """
+
+    def __init__(self, path: str, overwrite: bool = False):
+        """
+        Opens the database, creating its tables if needed.
+
+        Args:
+            path (str): The database file.
+            overwrite (bool): Delete the data already stored, to write a new crawl.
+        """
+        self.path = path
+        self.categories = 0
+        self.articles = 0
+        self.sections = 0
+
+        directory = os.path.dirname(path)
+        if directory:
+            os.makedirs(directory, exist_ok=True)
+        self.connection = sqlite3.connect(path)
+        self.connection.executescript(_SCHEMA)
+        if overwrite:
+            with self.connection:
+                for table in (
+                    "language_links",
+                    "category_articles",
+                    "sections",
+                    "articles",
+                    "categories",
+                ):
+                    self.connection.execute(f"DELETE FROM {table}")
+
+    def _write_languages(self, page_url: str, languages: List[str]):
+        self.connection.executemany(
+            "INSERT OR IGNORE INTO language_links (page_url, position, language_url)"
+            " VALUES (?, ?, ?)",
+            [(page_url, i, language) for i, language in enumerate(languages)],
+        )
+
+    def _write_article(self, article: Dict[str, Any]) -> int:
+        """
+        Stores an article the first time it is seen. Returns its row ID.
+        """
+        row = self.connection.execute(
+            "SELECT id FROM articles WHERE url = ?", (article["id"],)
+        ).fetchone()
+        if row is not None:
+            return row[0]
+
+        sections = article["sections"]
+        article_id = self.connection.execute(
+            "INSERT INTO articles"
+            " (url, name, revision_id, word_count, sections_count)"
+            " VALUES (?, ?, ?, ?, ?)",
+            (
+                article["id"],
+                article["name"],
+                article.get("revision_id"),
+                sum(section["word_count"] for section in sections),
+                len(sections),
+            ),
+        ).lastrowid
+        self.connection.executemany(
+            "INSERT INTO sections (article_id, position, name, word_count)"
+            " VALUES (?, ?, ?, ?)",
+            [
+                (article_id, i, section["name"], section["word_count"])
+                for i, section in enumerate(sections)
+            ],
+        )
+        self._write_languages(article["id"], article["languages"])
+        return article_id
+
+    def write(self, category: Dict[str, Any]):
+        """
+        Stores a complete category record with its articles in one transaction.
+        """
+        with self.connection:
+            category_id = self.connection.execute(
+                "INSERT INTO categories (url, parent_url, name) VALUES (?, ?, ?)",
+                (category["id"], category["parent_id"], category["name"]),
+            ).lastrowid
+            self._write_languages(category["id"], category["languages"])
+            self.connection.executemany(
+                "INSERT INTO category_articles (category_id, position, article_id)"
+                " VALUES (?, ?, ?)",
+                [
+                    (category_id, i, self._write_article(article))
+                    for i, article in enumerate(category["articles"])
+                ],
+            )
+
+        self.categories += 1
+        self.articles += len(category["articles"])
+        self.sections += sum(
+            len(article["sections"]) for article in category["articles"]
+        )
+
+    def write_all(self, categories: Iterable[Dict[str, Any]]):
+        """
+        Stores category records, e.g. a dataset loaded from a JSON file.
+        """
+        for category in categories:
+            self.write(category)
+
+    def _languages(self, page_url: str) -> List[str]:
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT language_url FROM language_links WHERE page_url = ?"
+                " ORDER BY position",
+                (page_url,),
+            )
+        ]
+
+    def _sections(self, article_id: int) -> List[Dict[str, Any]]:
+        return [
+            {"name": name, "word_count": word_count}
+            for name, word_count in self.connection.execute(
+                "SELECT name, word_count FROM sections WHERE article_id = ?"
+                " ORDER BY position",
+                (article_id,),
+            )
+        ]
+
+    def read_categories(self) -> List[dict]:
+        """
+        Rebuilds the category records, in the order they were written.
+        """
+        categories = []
+        for category_id, url, parent_url, name in self.connection.execute(
+            "SELECT id, url, parent_url, name FROM categories ORDER BY id"
+        ).fetchall():
+            articles = []
+            for article_id, article_url, article_name, revision_id in (
+                self.connection.execute(
+                    "SELECT a.id, a.url, a.name, a.revision_id"
+                    " FROM category_articles ca JOIN articles a ON a.id = ca.article_id"
+                    " WHERE ca.category_id = ? ORDER BY ca.position",
+                    (category_id,),
+                ).fetchall()
+            ):
+                article = {
+                    "id": article_url,
+                    "name": article_name,
+                    "languages": self._languages(article_url),
+                    "sections": self._sections(article_id),
+                }
+                if revision_id is not None:
+                    article["revision_id"] = revision_id
+                articles.append(article)
+
+            categories.append(
+                {
+                    "id": url,
+                    "parent_id": parent_url,
+                    "name": name,
+                    "languages": self._languages(url),
+                    "articles": articles,
+                }
+            )
+        return categories
+
+    def get_all_category_ids(self) -> List[str]:
+        """
+        Returns the category IDs, in the order they were written.
+        """
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT url FROM categories ORDER BY id"
+            )
+        ]
+
+    def get_all_article_ids(self) -> List[str]:
+        """
+        Returns the article IDs of every category, with an ID per membership.
+        """
+        return [
+            row[0]
+            for row in self.connection.execute(
+                "SELECT a.url FROM category_articles ca"
+                " JOIN articles a ON a.id = ca.article_id"
+                " ORDER BY ca.category_id, ca.position"
+            )
+        ]
+
+    def get_all_ids(self) -> List[str]:
+        """
+        Returns the ID of every category followed by the IDs of its articles.
+        """
+        ids = []
+        category_id = None
+        for current_id, category_url, article_url in self.connection.execute(
+            "SELECT c.id, c.url, a.url FROM categories c"
+            " LEFT JOIN category_articles ca ON ca.category_id = c.id"
+            " LEFT JOIN articles a ON a.id = ca.article_id"
+            " ORDER BY c.id, ca.position"
+        ):
+            if current_id != category_id:
+                ids.append(category_url)
+                category_id = current_id
+            if article_url is not None:
+                ids.append(article_url)
+        return ids
+
+    def matching_language_urls(self, urls: Iterable[str]) -> Set[str]:
+        """
+        Returns the URLs that are the language link of a page of the dataset.
+        """
+        urls = list(set(urls))
+        matching = set()
+        for i in range(0, len(urls), MAX_PARAMETERS):
+            batch = urls[i : i + MAX_PARAMETERS]
+            matching.update(
+                row[0]
+                for row in self.connection.execute(
+                    "SELECT DISTINCT language_url FROM language_links"
+                    f" WHERE language_url IN ({', '.join('?' * len(batch))})",
+                    batch,
+                )
+            )
+        return matching
+
+    def get_article(self, article_url: str) -> Dict[str, Any]:
+        """
+        Returns the totals and categories of an article, or `None` if it is not stored.
+        """
+        row = self.connection.execute(
+            "SELECT id, word_count, sections_count FROM articles WHERE url = ?",
+            (article_url,),
+        ).fetchone()
+        if row is None:
+            return None
+
+        return {
+            "word_count": row[1],
+            "sections_count": row[2],
+            "categories": [
+                category_row[0]
+                for category_row in self.connection.execute(
+                    "SELECT c.url FROM category_articles ca"
+                    " JOIN categories c ON c.id = ca.category_id"
+                    " WHERE ca.article_id = ? ORDER BY c.id",
+                    (row[0],),
+                )
+            ],
+        }
+
+    def close(self):
+        """
+        Closes the database.
+        """
+        self.connection.close()
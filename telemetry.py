@@ -0,0 +1,446 @@
+"""
+This module collects the telemetry of a crawl: counters and histograms of every HTTP
+request (rate-limit wait, DNS, connect, TLS, time to first byte, download, bytes,
+status, retries, cache revalidations) and of the parse stage (parsing, extraction),
+so the time of a run can be split between politeness sleeps, the network, retries
+and BeautifulSoup.
+
+Collection is off until `enable` is called, and then costs a few dictionary updates
+per request. The collected metrics are rendered in the Prometheus text format
+(e.g. for the textfile collector of the node exporter), and every request or parsed
+page is also passed as an event to the registered hooks.
+
+Functions:
+    enable(hook: Callable[[Dict[str, Any]], None]) -> Telemetry:
+
+    disable():
+
+    get() -> Telemetry:
+
+    start_trace() -> Dict[str, float]:
+
+    current_trace() -> Dict[str, float]:
+
+    end_trace():
+
+    record_request(event: Dict[str, Any]):
+
+    record_stage(stage: str, seconds: float, **labels):
+
+    record_retry(url: str, reason: str, attempt: int, seconds: float):
+
+    record_rate(url: str, rate: float):
+
+    record_cache(url: str, from_cache: bool):
+"""
+
+import bisect
+import os
+import threading
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+from urllib.parse import urlparse
+
+# Constants
+PREFIX = "wikipedia_scraper_"
+SECONDS_BUCKETS = (
+    0.001,
+    0.0025,
+    0.005,
+    0.01,
+    0.025,
+    0.05,
+    0.1,
+    0.25,
+    0.5,
+    1.0,
+    2.5,
+    5.0,
+    10.0,
+    30.0,
+)
+BYTES_BUCKETS = tuple(1024 * 4**i for i in range(8))  # 1 KiB to 16 MiB
+REQUEST_STAGES = ("rate_limit_wait", "dns", "connect", "tls", "ttfb", "download")
+CONNECTION_STAGES = ("dns", "connect", "tls")
+
+# Name: (type, help, histogram buckets)
+METRICS = {
+    "http_requests_total": (
+        "counter",
+        "HTTP responses received, by host and status code.",
+        None,
+    ),
+    "http_errors_total": (
+        "counter",
+        "HTTP requests that failed without a response, by host and error.",
+        None,
+    ),
+    "http_response_bytes_total": (
+        "counter",
+        "Bytes of the response bodies as received over the wire, by host and "
+        "content encoding.",
+        None,
+    ),
+    "http_response_decoded_bytes_total": (
+        "counter",
+        "Bytes of the response bodies once decompressed, by host and content "
+        "encoding.",
+        None,
+    ),
+    "http_cache_revalidations_total": (
+        "counter",
+        "Cached responses revalidated with a conditional request, by host and result "
+        "(hit when the cached body was still valid, miss when it was downloaded again).",
+        None,
+    ),
+    "http_retries_total": (
+        "counter",
+        "Requests retried after a failure, by host and reason (status or error).",
+        None,
+    ),
+    "http_host_rate": (
+        "gauge",
+        "Requests per second currently allowed per host by the adaptive rate limiter.",
+        None,
+    ),
+    "http_response_bytes": (
+        "histogram",
+        "Size of the response bodies as received over the wire.",
+        BYTES_BUCKETS,
+    ),
+    "stage_seconds": (
+        "histogram",
+        "Time spent in each stage of the crawl (request phases, retry waits, "
+        "parsing and extraction).",
+        SECONDS_BUCKETS,
+    ),
+}
+
+Labels = Tuple[Tuple[str, str], ...]
+
+
+class Histogram:
+    """
+    Cumulative histogram with fixed bucket upper bounds, as in Prometheus.
+    """
+
+    def __init__(self, buckets: Sequence[float]):
+        self.buckets = tuple(buckets)
+        self.counts = [0] * (len(self.buckets) + 1)  # the last one is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[int]:
+        counts = []
+        total = 0
+        for count in self.counts:
+            total += count
+            counts.append(total)
+        return counts
+
+
+def _labels(labels: Dict[str, Any]) -> Labels:
+    return tuple(sorted((name, str(value)) for name, value in labels.items()))
+
+
+def _format_labels(labels: Labels, **extra: str) -> str:
+    items = list(labels) + list(extra.items())
+    if not items:
+        return ""
+    escaped = (
+        (name, value.replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n"))
+        for name, value in items
+    )
+    return "{" + ",".join(f'{name}="{value}"' for name, value in escaped) + "}"
+
+
+def _format_value(value: float) -> str:
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Telemetry:
+    """
+    Thread-safe registry of the counters and histograms of the crawl.
+
+    Metrics are identified by their name in `METRICS` and their labels. `hooks` are
+    called with every recorded event, from the thread that recorded it.
+    """
+
+    def __init__(self, hooks: Sequence[Callable[[Dict[str, Any]], None]] = ()):
+        self.hooks: List[Callable[[Dict[str, Any]], None]] = list(hooks)
+        self.counters: Dict[str, Dict[Labels, float]] = {}
+        self.gauges: Dict[str, Dict[Labels, float]] = {}
+        self.histograms: Dict[str, Dict[Labels, Histogram]] = {}
+        self.lock = threading.Lock()
+
+    def increment(self, name: str, value: float = 1, **labels):
+        key = _labels(labels)
+        with self.lock:
+            series = self.counters.setdefault(name, {})
+            series[key] = series.get(key, 0) + value
+
+    def set(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        with self.lock:
+            self.gauges.setdefault(name, {})[key] = value
+
+    def observe(self, name: str, value: float, **labels):
+        key = _labels(labels)
+        with self.lock:
+            series = self.histograms.setdefault(name, {})
+            if key not in series:
+                series[key] = Histogram(METRICS[name][2])
+            series[key].observe(value)
+
+    def emit(self, event: Dict[str, Any]):
+        for hook in self.hooks:
+            hook(event)
+
+    def total(self, name: str, **labels) -> float:
+        """
+        Returns the sum of a counter over all its labels, or over the series with
+        the given labels.
+        """
+        selected = set(_labels(labels))
+        with self.lock:
+            return sum(
+                value
+                for key, value in self.counters.get(name, {}).items()
+                if selected.issubset(key)
+            )
+
+    def stage_totals(self) -> Dict[str, float]:
+        """
+        Returns the total time spent in each stage, in seconds.
+        """
+        with self.lock:
+            return {
+                dict(labels)["stage"]: histogram.sum
+                for labels, histogram in self.histograms.get(
+                    "stage_seconds", {}
+                ).items()
+            }
+
+    def render(self) -> str:
+        """
+        Returns the metrics in the Prometheus text exposition format.
+        """
+        lines = []
+        with self.lock:
+            for name, (kind, help_text, _) in METRICS.items():
+                series = {
+                    "counter": self.counters,
+                    "gauge": self.gauges,
+                    "histogram": self.histograms,
+                }[kind].get(name)
+                if not series:
+                    continue
+
+                full_name = PREFIX + name
+                lines.append(f"# HELP {full_name} {help_text}")
+                lines.append(f"# TYPE {full_name} {kind}")
+                for labels, value in sorted(series.items()):
+                    if kind != "histogram":
+                        lines.append(
+                            f"{full_name}{_format_labels(labels)} {_format_value(value)}"
+                        )
+                        continue
+
+                    bounds = [repr(float(bound)) for bound in value.buckets] + ["+Inf"]
+                    for bound, count in zip(bounds, value.cumulative_counts()):
+                        lines.append(
+                            f"{full_name}_bucket{_format_labels(labels, le=bound)} {count}"
+                        )
+                    lines.append(
+                        f"{full_name}_sum{_format_labels(labels)} {value.sum!r}"
+                    )
+                    lines.append(
+                        f"{full_name}_count{_format_labels(labels)} {value.count}"
+                    )
+        return "\n".join(lines) + "\n"
+
+    def write(self, path: str):
+        """
+        Writes the metrics to a Prometheus text file, atomically so that a collector
+        never reads a partial file.
+        """
+        temporary_path = path + ".tmp"
+        with open(temporary_path, "w", encoding="utf-8") as file:
+            file.write(self.render())
+        os.replace(temporary_path, path)
+
+
+_telemetry: Optional[Telemetry] = None
+_local = threading.local()
+
+
+def enable(hook: Callable[[Dict[str, Any]], None] = None) -> Telemetry:
+    """
+    Starts collecting telemetry into a new registry and returns it.
+
+    Args:
+        hook (Callable[[Dict[str, Any]], None]): Called with every event: a dict
+            with a `type` ("request", "stage", "retry" or "cache") and its
+            measurements.
+    """
+    global _telemetry
+
+    _telemetry = Telemetry([hook] if hook is not None else [])
+    return _telemetry
+
+
+def disable():
+    """
+    Stops collecting telemetry.
+    """
+    global _telemetry
+
+    _telemetry = None
+
+
+def get() -> Optional[Telemetry]:
+    """
+    Returns the registry being collected into, or `None` when telemetry is off.
+    """
+    return _telemetry
+
+
+def start_trace() -> Dict[str, float]:
+    """
+    Starts tracing the request sent from the current thread. The connection classes
+    of `http_client` add the time of the connection phases to the trace.
+    """
+    _local.trace = {"dns": 0.0, "connect": 0.0, "tls": 0.0}
+    return _local.trace
+
+
+def current_trace() -> Optional[Dict[str, float]]:
+    """
+    Returns the trace of the request being sent from the current thread, if any.
+    """
+    return getattr(_local, "trace", None)
+
+
+def end_trace():
+    _local.trace = None
+
+
+def record_request(event: Dict[str, Any]):
+    """
+    Records a request: its status (or error), bytes and the time of its phases.
+
+    Args:
+        event (Dict[str, Any]): The `url`, `host`, `status` (`None` when no
+            response was received, with the `error` name instead), `bytes` (as
+            received) and `decoded_bytes` (once decompressed), the `encoding` of
+            the body ("identity" when uncompressed) and the seconds of each of the
+            `REQUEST_STAGES`. The revalidations of cached responses are recorded
+            apart, by `record_cache`.
+    """
+    telemetry = _telemetry
+    if telemetry is None:
+        return
+
+    host = event["host"]
+    if event["status"] is None:
+        telemetry.increment("http_errors_total", host=host, error=event["error"])
+    else:
+        telemetry.increment("http_requests_total", host=host, status=event["status"])
+        encoding = event["encoding"]
+        telemetry.increment(
+            "http_response_bytes_total", event["bytes"], host=host, encoding=encoding
+        )
+        if event.get("decoded_bytes") is not None:
+            telemetry.increment(
+                "http_response_decoded_bytes_total",
+                event["decoded_bytes"],
+                host=host,
+                encoding=encoding,
+            )
+        telemetry.observe("http_response_bytes", event["bytes"])
+    for stage in REQUEST_STAGES:
+        # The connection phases are only observed when a connection was opened
+        if event.get(stage) is not None and (
+            stage not in CONNECTION_STAGES or event[stage] > 0
+        ):
+            telemetry.observe("stage_seconds", event[stage], stage=stage)
+    telemetry.emit({"type": "request", **event})
+
+
+def record_stage(stage: str, seconds: float, **labels):
+    """
+    Records the time of a stage outside the requests, e.g. `parse` or `extract`.
+    The labels are only passed to the hooks, not added to the metrics.
+    """
+    telemetry = _telemetry
+    if telemetry is None:
+        return
+
+    telemetry.observe("stage_seconds", seconds, stage=stage)
+    telemetry.emit({"type": "stage", "stage": stage, "seconds": seconds, **labels})
+
+
+def record_retry(url: str, reason: str, attempt: int, seconds: float):
+    """
+    Records the retry of a request and the backoff its thread sleeps before it.
+
+    Args:
+        url (str): The URL of the request.
+        reason (str): The status code or error name of the failed attempt.
+        attempt (int): The number of the failed attempt, from 1.
+        seconds (float): The backoff of the request. Pauses of an overloaded host
+            are waited in the rate limiter and counted as `rate_limit_wait`.
+    """
+    telemetry = _telemetry
+    if telemetry is None:
+        return
+
+    host = urlparse(url).netloc
+    telemetry.increment("http_retries_total", host=host, reason=reason)
+    if seconds:
+        telemetry.observe("stage_seconds", seconds, stage="retry_wait")
+    telemetry.emit(
+        {
+            "type": "retry",
+            "url": url,
+            "host": host,
+            "reason": reason,
+            "attempt": attempt,
+            "seconds": seconds,
+        }
+    )
+
+
+def record_rate(url: str, rate: float):
+    """
+    Records the rate currently allowed to the URL's host by the rate limiter.
+    """
+    telemetry = _telemetry
+    if telemetry is None or not rate:
+        return
+
+    telemetry.set("http_host_rate", rate, host=urlparse(url).netloc)
+
+
+def record_cache(url: str, from_cache: bool):
+    """
+    Records the revalidation of a cached response, and whether the cached body was
+    still valid (`304 Not Modified`) or the response was downloaded again.
+    """
+    telemetry = _telemetry
+    if telemetry is None:
+        return
+
+    host = urlparse(url).netloc
+    telemetry.increment(
+        "http_cache_revalidations_total",
+        host=host,
+        result="hit" if from_cache else "miss",
+    )
+    telemetry.emit(
+        {"type": "cache", "url": url, "host": host, "from_cache": from_cache}
+    )
@@ -0,0 +1,118 @@
+"""
+Fixtures shared by the tests: a small category tree, synthesized into a page corpus
+and served by the stub Wikipedia server of the benchmarks.
+"""
+
+import copy
+import json
+from typing import Any, Dict, List, Tuple
+from urllib.parse import quote
+
+import pytest
+
+import http_client
+from benchmarks import corpus
+from benchmarks.stub_server import StubServer
+
+# Constants
+WIKI_URL = "https://en.wikipedia.org"
+ROOT_PATH = "/wiki/Category:Sports"
+
+
+def _article(title: str, sections: Dict[str, int], name: str = None) -> Dict[str, Any]:
+    return {
+        "id": f"{WIKI_URL}/wiki/{title}",
+        "name": name or title.replace("_", " "),
+        "languages": [f"https://es.wikipedia.org/wiki/{title}"],
+        "sections": [
+            {"name": section, "word_count": word_count}
+            for section, word_count in sections.items()
+        ],
+    }
+
+
+def _category(
+    title: str, parent: str, articles: List[Dict[str, Any]]
+) -> Dict[str, Any]:
+    return {
+        "id": f"{WIKI_URL}/wiki/Category:{title}",
+        "parent_id": f"{WIKI_URL}/wiki/Category:{parent}" if parent else None,
+        "name": title.replace("_", " "),
+        "languages": [f"https://es.wikipedia.org/wiki/Categoría:{title}"],
+        "articles": articles,
+    }
+
+
+ARENA = _article("Arena", {"History": 3, "Events": 0})
+STADIUM = _article("Stadium", {"History": 5})
+NET = _article("Volleyball_net", {"Design": 4, "Rules": 2})
+SAND = _article("Sand", {"Beaches": 6})
+BALL = _article("Ball", {"History": 1, "Design": 2})
+# A colon in the main namespace is part of the name, a namespace prefix is not
+RULES = _article("Volleyball:_The_Rules", {"Scoring": 7})
+SQUAD = _article("Template:Football_squad", {}, name="Football squad")
+
+# Depth first: Sports > Volleyball > Beach volleyball, then Sports > Football.
+# Stadium belongs to two categories.
+CATEGORIES = [
+    _category("Sports", None, [ARENA, STADIUM]),
+    _category("Volleyball", "Sports", [STADIUM, NET, RULES]),
+    _category("Beach_volleyball", "Volleyball", [SAND]),
+    _category("Football", "Sports", [BALL, SQUAD]),
+]
+
+
+def rebase(data: Any, base_url: str) -> Any:
+    """
+    Returns the records with the URLs of the English Wikipedia moved to `base_url`,
+    as a crawl of the stub server returns them.
+    """
+    return json.loads(json.dumps(data).replace(WIKI_URL, base_url))
+
+
+@pytest.fixture
+def categories() -> List[Dict[str, Any]]:
+    return copy.deepcopy(CATEGORIES)
+
+
+@pytest.fixture
+def corpus_directory(tmp_path) -> str:
+    data_path = tmp_path / "data.json"
+    data_path.write_text(json.dumps(CATEGORIES), encoding="utf-8")
+    directory = str(tmp_path / "corpus")
+    corpus.synthesize(str(data_path), directory)
+    return directory
+
+
+@pytest.fixture
+def stub(corpus_directory):
+    with StubServer(corpus_directory) as server:
+        yield server
+    # Do not leak the cache or the rate limits of a test into the next one
+    http_client.configure()
+
+
+@pytest.fixture
+def root_url(stub) -> str:
+    return stub.url + quote(ROOT_PATH)
+
+
+@pytest.fixture
+def expected(stub) -> List[Dict[str, Any]]:
+    return rebase(CATEGORIES, stub.url)
+
+
+@pytest.fixture
+def requests_sent(monkeypatch) -> List[Tuple[str, Dict[str, Any]]]:
+    """
+    Records the URL and the query parameters of every request of `http_client.get`.
+    """
+    sent = []
+    get = http_client.get
+
+    def spy(url: str, **kwargs):
+        sent.append((url, kwargs.get("params") or {}))
+        return get(url, **kwargs)
+
+    monkeypatch.setattr(http_client, "get", spy)
+    return sent
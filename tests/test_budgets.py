@@ -0,0 +1,59 @@
+"""
+Tests of the budgets of the crawl frontier: depth, categories, articles and deadline.
+The crawls run with a single worker, so the categories are fetched in order.
+"""
+
+import pytest
+
+import wikipedia_scrapping as ws
+
+
+def _crawl(root_url: str, **kwargs):
+    return ws.scrape_category(root_url, rate=0, max_concurrency=1, **kwargs)
+
+
+def _distinct_articles(data):
+    return {article["id"] for category in data for article in category["articles"]}
+
+
+@pytest.mark.parametrize("max_depth, categories", [(0, [0]), (1, [0, 1, 3])])
+def test_max_depth(root_url, expected, max_depth, categories):
+    data = _crawl(root_url, max_depth=max_depth)
+    assert data == [expected[i] for i in categories]
+
+
+def test_max_categories(root_url, expected):
+    assert _crawl(root_url, max_categories=2) == expected[:2]
+
+
+@pytest.mark.parametrize("backend", ["html", "api"])
+def test_max_articles_trims_the_category_crossing_it(root_url, expected, backend):
+    data = _crawl(root_url, max_articles=3, backend=backend)
+
+    # Stadium is shared by both categories: the budget buys Volleyball net too
+    assert len(_distinct_articles(data)) == 3
+    assert data[0] == expected[0]
+    assert data[1] == {**expected[1], "articles": expected[1]["articles"][:2]}
+    assert len(data) == 2
+
+
+def test_max_articles_counts_distinct_articles(root_url, expected):
+    data = _crawl(root_url, max_articles=len(_distinct_articles(expected)))
+    assert data == expected
+
+
+def test_trimmed_category_is_not_checkpointed(root_url, expected, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    _crawl(root_url, max_articles=3, checkpoint_path=checkpoint_path)
+
+    data = _crawl(root_url, checkpoint_path=checkpoint_path, resume=True)
+    assert data == expected
+
+
+def test_deadline_keeps_only_complete_categories(stub, root_url, expected):
+    # The root category and its articles take two round trips, its
+    # subcategories two more
+    stub.latency = 0.3
+    data = ws.scrape_category(root_url, rate=0, deadline=0.9)
+
+    assert data == expected[:1]
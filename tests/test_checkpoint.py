@@ -0,0 +1,102 @@
+"""
+Tests of the crawl checkpoints and of resuming an interrupted crawl.
+"""
+
+from urllib.parse import unquote
+
+import pytest
+
+import wikipedia_scrapping as ws
+from checkpoint import CrawlCheckpoint
+
+# Constants
+URL = "https://en.wikipedia.org/wiki/Category:Sports"
+
+
+def _category_fetches(requests_sent):
+    return sorted(url for url, _ in requests_sent if "/Category:" in url)
+
+
+def test_resume_fetches_only_the_missing_categories(
+    root_url, expected, requests_sent, tmp_path
+):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    partial = ws.scrape_category(
+        root_url, rate=0, max_categories=2, checkpoint_path=checkpoint_path
+    )
+    assert len(partial) == 2
+
+    requests_sent.clear()
+    data = ws.scrape_category(
+        root_url, rate=0, checkpoint_path=checkpoint_path, resume=True
+    )
+
+    assert data == expected
+    completed = {category["id"] for category in partial}
+    assert _category_fetches(requests_sent) == sorted(
+        category["id"] for category in expected if category["id"] not in completed
+    )
+
+
+def test_resumed_crawl_can_be_resumed_again(root_url, expected, tmp_path):
+    checkpoint_path = str(tmp_path / "checkpoint.jsonl")
+    ws.scrape_category(
+        root_url, rate=0, max_categories=1, checkpoint_path=checkpoint_path
+    )
+    ws.scrape_category(
+        root_url,
+        rate=0,
+        max_categories=2,
+        checkpoint_path=checkpoint_path,
+        resume=True,
+    )
+
+    # The crawl identifies itself by its unquoted URL
+    checkpoint = CrawlCheckpoint(checkpoint_path, unquote(root_url), resume=True)
+    checkpoint.close()
+    assert len(checkpoint.completed) == 2
+    data = ws.scrape_category(
+        root_url, rate=0, checkpoint_path=checkpoint_path, resume=True
+    )
+    assert data == expected
+
+
+def test_truncated_last_line_is_ignored(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = CrawlCheckpoint(path, URL)
+    record = {"id": URL, "name": "Sports", "articles": []}
+    checkpoint.save(record, [URL + "/Volleyball"])
+    checkpoint.close()
+    with open(path, "a", encoding="utf-8") as file:
+        file.write('{"type": "category", "rec')
+
+    checkpoint = CrawlCheckpoint(path, URL, resume=True)
+    checkpoint.save({**record, "id": URL + "/Volleyball"}, [])
+    checkpoint.close()
+
+    resumed = CrawlCheckpoint(path, URL, resume=True)
+    resumed.close()
+    assert resumed.completed == {
+        URL: (record, [URL + "/Volleyball"]),
+        URL + "/Volleyball": ({**record, "id": URL + "/Volleyball"}, []),
+    }
+
+
+def test_checkpoint_of_another_crawl_is_rejected(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    CrawlCheckpoint(path, URL).close()
+
+    with pytest.raises(ValueError, match="belongs to the crawl"):
+        CrawlCheckpoint(path, URL + "_other", resume=True)
+
+
+def test_without_resume_the_checkpoint_starts_over(tmp_path):
+    path = str(tmp_path / "checkpoint.jsonl")
+    checkpoint = CrawlCheckpoint(path, URL)
+    checkpoint.save({"id": URL, "name": "Sports", "articles": []}, [])
+    checkpoint.close()
+
+    CrawlCheckpoint(path, URL).close()
+    resumed = CrawlCheckpoint(path, URL, resume=True)
+    resumed.close()
+    assert resumed.completed == {}
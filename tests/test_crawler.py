@@ -0,0 +1,64 @@
+"""
+Tests of the asynchronous crawl of a category tree served by the stub server.
+"""
+
+import wikipedia_scrapping as ws
+from benchmarks import corpus
+from datasets import read_jsonl
+
+
+def _break_page(corpus_directory: str, path: str):
+    # Without its title the page cannot be extracted
+    page = corpus.read_page(corpus_directory, path)
+    corpus.save_page(
+        corpus_directory, path, page.replace("mw-page-title-main", "mw-page-title")
+    )
+
+
+def test_crawl_returns_tree_in_depth_first_order(root_url, expected):
+    assert ws.scrape_category(root_url, rate=0) == expected
+
+
+def test_bfs_strategy_returns_same_tree(root_url, expected):
+    assert ws.scrape_category(root_url, rate=0, strategy="bfs") == expected
+
+
+def test_malformed_article_is_dead_lettered(
+    corpus_directory, root_url, expected, tmp_path
+):
+    _break_page(corpus_directory, "/wiki/Sand")
+    dead_letter_path = str(tmp_path / "dead_letters.jsonl")
+
+    data = ws.scrape_category(root_url, rate=0, dead_letter_path=dead_letter_path)
+
+    expected[2]["articles"] = []
+    assert data == expected
+    [dead_letter] = read_jsonl(dead_letter_path)
+    assert dead_letter["url"].endswith("/wiki/Sand")
+    assert dead_letter["kind"] == "article"
+    assert dead_letter["error"].startswith("AttributeError")
+    assert dead_letter["status"] is None
+
+
+def test_malformed_category_is_dead_lettered_with_its_subtree(
+    corpus_directory, root_url, expected, tmp_path
+):
+    _break_page(corpus_directory, "/wiki/Category:Volleyball")
+    dead_letter_path = str(tmp_path / "dead_letters.jsonl")
+
+    data = ws.scrape_category(root_url, rate=0, dead_letter_path=dead_letter_path)
+
+    assert data == [expected[0], expected[3]]
+    assert [item["kind"] for item in read_jsonl(dead_letter_path)] == ["category"]
+
+
+def test_missing_root_gives_empty_result(stub, tmp_path):
+    dead_letter_path = str(tmp_path / "dead_letters.jsonl")
+
+    data = ws.scrape_category(
+        stub.url + "/wiki/Category:Missing", rate=0, dead_letter_path=dead_letter_path
+    )
+
+    assert data == []
+    [dead_letter] = read_jsonl(dead_letter_path)
+    assert dead_letter["status"] == 404
@@ -0,0 +1,126 @@
+"""
+Tests of the storage backends of the `database` module: every backend answers the
+queries exactly as the tree of dictionaries loaded from the JSON file does.
+"""
+
+import json
+import os
+
+import pytest
+
+import database as db
+import datasets
+import wikipedia_scrapping as ws
+from columnar import ColumnarDataset
+from sqlite_database import SqliteDatabase
+
+# Constants
+KEY = "test"
+SHIPPED_DATA = os.path.join(os.path.dirname(__file__), "..", "data_en.json")
+
+
+@pytest.fixture(params=["tree", "data_en"])
+def json_path(request, categories, tmp_path) -> str:
+    if request.param == "data_en":
+        return SHIPPED_DATA
+    path = str(tmp_path / "data.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(categories, file)
+    return path
+
+
+def _sqlite(json_path: str, tmp_path) -> str:
+    path = str(tmp_path / "data.sqlite")
+    store = SqliteDatabase(path, overwrite=True)
+    with open(json_path, "r", encoding="utf-8") as file:
+        store.write_all(json.load(file))
+    store.close()
+    return path
+
+
+@pytest.fixture(autouse=True)
+def unload():
+    yield
+    for loaded in (db.database, db.index, db.articles):
+        loaded.pop(KEY, None)
+    if KEY in db.stores:
+        db.stores.pop(KEY).close()
+
+
+def _answers(json_path: str):
+    """
+    Returns the answer of every query of the `database` module for the loaded key.
+    """
+    with open(json_path, "r", encoding="utf-8") as file:
+        categories = json.load(file)
+    article_ids = sorted(
+        {article["id"] for category in categories for article in category["articles"]}
+    )
+    pages = categories + [
+        article for category in categories for article in category["articles"]
+    ]
+    candidates = [url for page in pages for url in page["languages"]]
+    candidates.append("https://xx.wikipedia.org/wiki/Missing")
+    return {
+        "categories": db.read_categories(KEY),
+        "ids": db.get_all_ids(KEY),
+        "category_ids": db.get_all_category_ids(KEY),
+        "article_ids": db.get_all_article_ids(KEY),
+        "matching": db.filter_matching_ids(candidates, KEY),
+        "not_matching": db.filter_is_not_matching_ids(candidates, KEY),
+        "articles": {
+            article_id: (
+                db.get_article_word_count(KEY, article_id),
+                db.get_article_sections_count(KEY, article_id),
+                db.get_article_categories(KEY, article_id),
+            )
+            for article_id in article_ids + ["https://en.wikipedia.org/wiki/Missing"]
+        },
+    }
+
+
+@pytest.fixture
+def reference(json_path):
+    db.load(KEY, path=json_path)
+    answers = _answers(json_path)
+    assert answers["articles"]["https://en.wikipedia.org/wiki/Missing"] == (0, 0, [])
+    return answers
+
+
+def test_sqlite_answers_like_records(json_path, reference, tmp_path):
+    db.load(KEY, path=_sqlite(json_path, tmp_path))
+    assert _answers(json_path) == reference
+
+
+@pytest.mark.parametrize("source", ["json", "jsonl", "sqlite"])
+def test_columnar_answers_like_records(json_path, reference, tmp_path, source):
+    path = json_path
+    if source == "jsonl":
+        path = str(tmp_path / "data.jsonl")
+        with open(json_path, "r", encoding="utf-8") as file:
+            datasets.write_dataset(path, json.load(file))
+    elif source == "sqlite":
+        path = _sqlite(json_path, tmp_path)
+
+    db.load(KEY, path=path, columnar=True)
+    assert _answers(json_path) == reference
+
+
+def test_columnar_article_categories_follow_memberships(categories):
+    tables = ColumnarDataset.from_records(categories)
+    stadium = tables.get_article("https://en.wikipedia.org/wiki/Stadium")
+    assert stadium["categories"] == [categories[0]["id"], categories[1]["id"]]
+    assert tables.get_article("https://en.wikipedia.org/wiki/Missing") is None
+
+
+def test_sqlite_written_by_the_crawl_answers_like_records(root_url, expected, tmp_path):
+    json_path = str(tmp_path / "data.json")
+    with open(json_path, "w", encoding="utf-8") as file:
+        json.dump(expected, file)
+    db.load(KEY, path=json_path)
+    reference = _answers(json_path)
+
+    sqlite_path = str(tmp_path / "crawl.sqlite")
+    ws.scrape_category(root_url, rate=0, max_concurrency=1, output_path=sqlite_path)
+    db.load(KEY, path=sqlite_path)
+    assert _answers(json_path) == reference
@@ -0,0 +1,115 @@
+"""
+Tests of the dataset files: their formats and compressions, the JSONL writer and
+the crawl streaming into it.
+"""
+
+import gzip
+import os
+
+import pytest
+
+import datasets
+import wikipedia_scrapping as ws
+from datasets import JsonlWriter, read_dataset, read_jsonl, write_dataset
+
+
+def _by_id(categories):
+    return sorted(categories, key=lambda category: category["id"])
+
+
+@pytest.mark.parametrize(
+    "name",
+    [
+        "data.json",
+        "data.json.gz",
+        "data.json.zst",
+        "data.jsonl",
+        "data.jsonl.gz",
+        "data.jsonl.zst",
+    ],
+)
+def test_written_dataset_reads_back(categories, tmp_path, name):
+    if name.endswith(".zst"):
+        pytest.importorskip("zstandard")
+    path = str(tmp_path / name)
+
+    write_dataset(path, categories)
+    assert list(read_dataset(path)) == categories
+
+
+@pytest.mark.parametrize("name", ["data.json.gz", "data.jsonl.gz"])
+def test_gzip_is_detected_whatever_the_name(categories, tmp_path, name):
+    path = str(tmp_path / name)
+    write_dataset(path, categories)
+    renamed = str(tmp_path / "data.bin")
+    os.rename(path, renamed)
+
+    assert datasets._compression(renamed, "r") == "gzip"
+    assert list(read_dataset(renamed)) == categories
+
+
+def test_zstd_is_detected_by_its_magic_bytes(tmp_path):
+    # Detecting the compression does not need the zstandard package
+    path = tmp_path / "data.json"
+    path.write_bytes(datasets.ZSTD_MAGIC + b"\x00" * 8)
+    assert datasets._compression(str(path), "r") == "zstd"
+
+
+def test_compression_is_chosen_by_extension_when_writing(tmp_path):
+    assert datasets._compression(str(tmp_path / "data.json.gz"), "w") == "gzip"
+    assert datasets._compression(str(tmp_path / "data.jsonl.zst"), "w") == "zstd"
+    assert datasets._compression(str(tmp_path / "data.json"), "w") is None
+
+
+@pytest.mark.parametrize("compressed", [False, True])
+def test_format_is_detected_after_leading_whitespace(tmp_path, compressed):
+    array = tmp_path / "array.json"
+    lines = tmp_path / "lines.json"
+    contents = {
+        array: '\n  [{"id": 1}, {"id": 2}]',
+        lines: '\n  {"id": 1}\n{"id": 2}\n',
+    }
+    for path, content in contents.items():
+        data = content.encode("utf-8")
+        path.write_bytes(gzip.compress(data) if compressed else data)
+
+    assert list(read_dataset(str(array))) == [{"id": 1}, {"id": 2}]
+    assert list(read_dataset(str(lines))) == [{"id": 1}, {"id": 2}]
+
+
+def test_jsonl_writer_counts_what_it_wrote(categories, tmp_path):
+    path = str(tmp_path / "data.jsonl")
+    writer = JsonlWriter(path)
+    for category in categories:
+        writer.write(category)
+    writer.close()
+
+    assert list(read_jsonl(path)) == categories
+    assert writer.categories == len(categories)
+    assert writer.articles == sum(len(c["articles"]) for c in categories)
+    assert writer.sections == sum(
+        len(a["sections"]) for c in categories for a in c["articles"]
+    )
+
+
+def test_blank_lines_are_skipped(tmp_path):
+    path = tmp_path / "data.jsonl"
+    path.write_text('{"id": 1}\n\n{"id": 2}\n', encoding="utf-8")
+    assert list(read_jsonl(str(path))) == [{"id": 1}, {"id": 2}]
+
+
+@pytest.mark.parametrize("name", ["data.jsonl", "data.jsonl.gz"])
+def test_crawl_streams_complete_categories(root_url, expected, tmp_path, name):
+    path = str(tmp_path / name)
+
+    assert ws.scrape_category(root_url, rate=0, output_path=path) == []
+    # Streamed in the order the categories were completed
+    assert _by_id(read_dataset(path)) == _by_id(expected)
+
+
+def test_streamed_crawl_keeps_budgets(root_url, expected, tmp_path):
+    path = str(tmp_path / "data.jsonl")
+    ws.scrape_category(
+        root_url, rate=0, max_concurrency=1, max_categories=2, output_path=path
+    )
+    assert list(read_jsonl(path)) == expected[:2]
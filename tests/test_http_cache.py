@@ -0,0 +1,124 @@
+"""
+Tests of the on-disk HTTP cache and of the conditional requests of `http_client`.
+"""
+
+import hashlib
+import os
+
+import pytest
+
+import http_cache
+import http_client
+import telemetry
+from benchmarks import corpus
+
+# Constants
+PATH = "/wiki/Arena"
+
+
+@pytest.fixture
+def cache(tmp_path):
+    disk_cache = http_cache.DiskCache(str(tmp_path / "cache"), max_bytes=10)
+    yield disk_cache
+    disk_cache.close()
+
+
+@pytest.fixture
+def metrics():
+    yield telemetry.enable()
+    telemetry.disable()
+
+
+@pytest.fixture
+def cached_client(stub, tmp_path):
+    http_client.configure(rate=0, cache_dir=str(tmp_path / "http_cache"))
+    return http_client
+
+
+def test_store_and_read(cache):
+    cache.store("a", b"body", etag='"1"', encoding="utf-8")
+    assert cache.lookup("a") == {
+        "content_hash": hashlib.sha256(b"body").hexdigest(),
+        "etag": '"1"',
+        "last_modified": None,
+        "encoding": "utf-8",
+    }
+    assert cache.read("a") == b"body"
+    assert cache.read("b") is None
+
+
+def test_same_body_is_stored_once(cache):
+    cache.store("a", b"body")
+    cache.store("b", b"body")
+    objects = [
+        name
+        for _, _, names in os.walk(os.path.join(cache.directory, "objects"))
+        for name in names
+    ]
+    assert len(objects) == 1
+
+
+def test_least_recently_used_entries_are_evicted(cache):
+    cache.store("a", b"1234")
+    cache.store("b", b"5678")
+    cache.read("a")  # "b" is now the least recently used
+    cache.store("c", b"9012")
+    assert cache.read("a") == b"1234"
+    assert cache.read("b") is None
+    assert cache.read("c") == b"9012"
+
+
+def test_replaced_body_is_removed(cache):
+    cache.store("a", b"old")
+    old_path = cache._object_path(cache.lookup("a")["content_hash"])
+    cache.store("a", b"new")
+    assert not os.path.exists(old_path)
+    assert cache.read("a") == b"new"
+
+
+def test_unchanged_page_is_served_from_cache(stub, cached_client, metrics):
+    first = cached_client.get(stub.url + PATH)
+    second = cached_client.get(stub.url + PATH)
+
+    assert second.status_code == 200
+    assert second.text == first.text
+    assert stub.counts == {200: 1, 304: 1}
+    assert metrics.total("http_cache_revalidations_total", result="hit") == 1
+
+
+def test_changed_page_is_downloaded_again(
+    stub, corpus_directory, cached_client, metrics
+):
+    cached_client.get(stub.url + PATH)
+    page = corpus.read_page(corpus_directory, PATH)
+    corpus.save_page(corpus_directory, PATH, page.replace("Arena", "Pavilion"))
+
+    response = cached_client.get(stub.url + PATH)
+    assert "Pavilion" in response.text
+    assert stub.counts == {200: 2}
+    assert metrics.total("http_cache_revalidations_total", result="miss") == 1
+
+    # The new version replaced the cached one
+    assert "Pavilion" in cached_client.get(stub.url + PATH).text
+    assert stub.counts == {200: 2, 304: 1}
+
+
+def test_page_without_validators_is_evicted(stub, cached_client):
+    cached_client.get(stub.url + PATH)
+    stub.validators = False
+    page = corpus.read_page(stub.directory, PATH)
+    corpus.save_page(stub.directory, PATH, page.replace("Arena", "Pavilion"))
+
+    assert "Pavilion" in cached_client.get(stub.url + PATH).text
+    assert cached_client._cache.lookup(stub.url + PATH) is None
+
+
+def test_evicted_body_is_fetched_unconditionally(stub, cached_client):
+    first = cached_client.get(stub.url + PATH)
+    entry = cached_client._cache.lookup(stub.url + PATH)
+    os.remove(cached_client._cache._object_path(entry["content_hash"]))
+
+    response = cached_client.get(stub.url + PATH)
+    assert response.status_code == 200
+    assert response.text == first.text
+    assert stub.counts == {200: 2, 304: 1}
@@ -0,0 +1,229 @@
+"""
+Tests of the HTTP client: the adaptive token buckets, the `Retry-After` answers,
+the exhaustion of the attempts and the pages the crawl dead-letters once the client
+gave up on them, and the telemetry of the negotiated compression.
+"""
+
+from datetime import datetime, timedelta, timezone
+from email.utils import format_datetime
+from typing import Dict, List, Union
+
+import pytest
+import requests
+
+import http_client
+import telemetry
+import wikipedia_scrapping as ws
+from datasets import read_jsonl
+
+# Constants
+URL = "https://en.wikipedia.org/wiki/Arena"
+
+
+class _Clock:
+    """
+    Stands for the `time` module of `http_client`: sleeping only moves the clock.
+    """
+
+    def __init__(self):
+        self.now = 1000.0
+        self.sleeps: List[float] = []
+
+    def monotonic(self) -> float:
+        return self.now
+
+    def perf_counter(self) -> float:
+        return self.now
+
+    def sleep(self, seconds: float):
+        self.sleeps.append(seconds)
+        self.now += seconds
+
+
+@pytest.fixture
+def clock(monkeypatch) -> _Clock:
+    fake_clock = _Clock()
+    monkeypatch.setattr(http_client, "time", fake_clock)
+    # Backoffs without jitter: 1, 2, 4... seconds
+    monkeypatch.setattr(http_client, "BACKOFF_JITTER", 0.0)
+    return fake_clock
+
+
+@pytest.fixture
+def client(clock):
+    http_client.configure()
+    yield http_client
+    http_client.configure()
+
+
+@pytest.fixture
+def metrics():
+    yield telemetry.enable()
+    telemetry.disable()
+
+
+def _response(status: int, headers: Dict[str, str] = None) -> requests.Response:
+    response = requests.Response()
+    response.status_code = status
+    response.headers.update(headers or {})
+    response._content = b""
+    return response
+
+
+def _answers(monkeypatch, *answers: Union[requests.Response, Exception]) -> List[str]:
+    """
+    Makes `_send` give the answers in turn. Returns the list of the URLs sent.
+    """
+    sent = []
+    remaining = list(answers)
+
+    def send(url: str, **kwargs) -> requests.Response:
+        sent.append(url)
+        answer = remaining.pop(0) if len(remaining) > 1 else remaining[0]
+        if isinstance(answer, Exception):
+            raise answer
+        return answer
+
+    monkeypatch.setattr(http_client, "_send", send)
+    return sent
+
+
+def test_bucket_waits_once_the_burst_is_spent(clock):
+    bucket = http_client.TokenBucket(rate=2, burst=2)
+
+    assert [bucket.acquire() for _ in range(2)] == [0.0, 0.0]
+    assert bucket.acquire() == 0.5
+    assert bucket.acquire() == 0.5
+    assert clock.sleeps == [0.5, 0.5]
+
+
+def test_slow_down_halves_the_rate_and_pauses(clock):
+    bucket = http_client.TokenBucket(rate=4, burst=1)
+    bucket.acquire()
+
+    assert bucket.slow_down(3.0) == 2.0
+    # The pause, then one interval of the new rate for the token taken before it
+    assert bucket.acquire() == 3.5
+
+
+def test_speed_up_recovers_the_rate(clock):
+    bucket = http_client.TokenBucket(rate=10, burst=1)
+    bucket.slow_down(0.0)
+
+    step = http_client.RATE_RECOVERY * 10
+    assert bucket.speed_up() == 5 + step
+    for _ in range(20):
+        bucket.speed_up()
+    assert bucket.rate == 10
+
+
+def test_rate_is_never_slowed_below_the_minimum(clock):
+    bucket = http_client.TokenBucket(rate=1, burst=1)
+    for _ in range(10):
+        bucket.slow_down(0.0)
+    assert bucket.rate == http_client.MIN_RATE
+
+
+@pytest.mark.parametrize(
+    "value, seconds",
+    [
+        (None, None),
+        ("7", 7.0),
+        ("-5", 0.0),
+        ("100000", http_client.MAX_RETRY_AFTER),
+        ("soon", None),
+    ],
+)
+def test_retry_after(value, seconds):
+    headers = {} if value is None else {"Retry-After": value}
+    assert http_client._retry_after(_response(429, headers)) == seconds
+
+
+def test_retry_after_http_date():
+    retry_at = datetime.now(timezone.utc) + timedelta(seconds=30)
+    headers = {"Retry-After": format_datetime(retry_at, usegmt=True)}
+    assert 28 <= http_client._retry_after(_response(429, headers)) <= 30
+
+
+def test_overloaded_host_is_paused_for_its_retry_after(client, clock, monkeypatch):
+    sent = _answers(monkeypatch, _response(429, {"Retry-After": "7"}), _response(200))
+    start = clock.now
+
+    assert client._request(URL).status_code == 200
+    assert len(sent) == 2
+    bucket = client._limiter._bucket(URL)
+    assert bucket.paused_until == start + 7
+    # Halved by the 429, then raised by the 200
+    rate = http_client.DEFAULT_RATE
+    assert bucket.rate == rate * http_client.RATE_DECREASE + (
+        rate * http_client.RATE_RECOVERY
+    )
+    # The pause is waited in the rate limiter, not by the request itself
+    assert clock.sleeps == []
+
+
+def test_maxlag_error_slows_down_the_host(client, clock, monkeypatch):
+    sent = _answers(
+        monkeypatch,
+        _response(200, {"MediaWiki-API-Error": "maxlag", "Retry-After": "1"}),
+        _response(200),
+    )
+    start = clock.now
+
+    client._request(URL)
+    assert len(sent) == 2
+    assert client._limiter._bucket(URL).paused_until == start + 1
+
+
+def test_exhausted_attempts_return_the_last_response(
+    client, clock, metrics, monkeypatch
+):
+    sent = _answers(monkeypatch, _response(500))
+
+    assert client._request(URL).status_code == 500
+    assert len(sent) == http_client.MAX_ATTEMPTS
+    assert clock.sleeps == [1.0, 2.0, 4.0, 8.0]
+    assert metrics.total("http_retries_total", reason="500") == 4
+
+
+def test_exhausted_attempts_raise_the_last_error(client, clock, monkeypatch):
+    sent = _answers(monkeypatch, requests.exceptions.ConnectionError("refused"))
+
+    with pytest.raises(requests.exceptions.ConnectionError):
+        client._request(URL)
+    assert len(sent) == http_client.MAX_ATTEMPTS
+
+
+def test_other_errors_are_not_retried(client, clock, monkeypatch):
+    sent = _answers(monkeypatch, _response(404))
+
+    assert client._request(URL).status_code == 404
+    assert len(sent) == 1
+    assert clock.sleeps == []
+
+
+@pytest.mark.parametrize("compression, encoding", [(True, "gzip"), (False, "identity")])
+def test_negotiated_encoding_is_recorded(stub, metrics, compression, encoding):
+    stub.compression = compression
+    http_client.configure(rate=0)
+
+    # The session sends the Accept-Encoding of requests, which the stub honours
+    assert http_client.get(stub.url + "/wiki/Arena").status_code == 200
+    received = metrics.total("http_response_bytes_total", encoding=encoding)
+    decoded = metrics.total("http_response_decoded_bytes_total", encoding=encoding)
+    assert received == metrics.total("http_response_bytes_total") > 0
+    assert decoded > received if compression else decoded == received
+
+
+def test_crawl_dead_letters_pages_that_keep_failing(stub, root_url, tmp_path):
+    stub.error_rate = 1.0
+    stub.retry_after = 0
+    dead_letter_path = str(tmp_path / "dead_letters.jsonl")
+
+    data = ws.scrape_category(root_url, rate=0, dead_letter_path=dead_letter_path)
+
+    assert data == []
+    [dead_letter] = read_jsonl(dead_letter_path)
+    assert dead_letter["kind"] == "category"
+    assert dead_letter["status"] == 429
+    assert stub.counts[429] == http_client.MAX_ATTEMPTS
@@ -0,0 +1,70 @@
+"""
+Tests of the incremental re-crawl based on the revision IDs of the articles.
+"""
+
+from typing import Any, Dict, List, Tuple
+
+import pytest
+
+import mediawiki_api
+import wikipedia_scrapping as ws
+from benchmarks import corpus
+
+# Constants
+FRENCH = "https://fr.wikipedia.org/wiki/Arena"
+
+
+def _articles(data: List[Dict[str, Any]]) -> Dict[str, Dict[str, Any]]:
+    return {
+        article["id"]: article for category in data for article in category["articles"]
+    }
+
+
+def _article_fetches(requests_sent: List[Tuple[str, Dict[str, Any]]]) -> List[str]:
+    """
+    Returns the articles downloaded by either backend.
+    """
+    return sorted(
+        params["page"] if params.get("action") == "parse" else url.rsplit("/", 1)[-1]
+        for url, params in requests_sent
+        if params.get("action") == "parse"
+        or (mediawiki_api.API_PATH not in url and "/Category:" not in url)
+    )
+
+
+@pytest.mark.parametrize("backend", ["html", "api"])
+def test_unchanged_articles_are_reused_with_fresh_language_links(
+    stub, root_url, requests_sent, backend
+):
+    first = ws.scrape_category(root_url, rate=0, backend=backend, previous=[])
+    assert all("revision_id" in article for article in _articles(first).values())
+
+    # A new language link does not change the revision of the page
+    stub._page("Arena")["languages"].append(FRENCH)
+    requests_sent.clear()
+    data = ws.scrape_category(root_url, rate=0, backend=backend, previous=first)
+
+    assert _article_fetches(requests_sent) == []
+    articles = _articles(data)
+    assert FRENCH in articles[stub.url + "/wiki/Arena"]["languages"]
+    del articles[stub.url + "/wiki/Arena"]
+    previous = _articles(first)
+    assert all(article == previous[url] for url, article in articles.items())
+
+
+@pytest.mark.parametrize("backend", ["html", "api"])
+def test_edited_article_is_fetched_again(stub, root_url, requests_sent, backend):
+    first = ws.scrape_category(root_url, rate=0, backend=backend, previous=[])
+
+    page = corpus.read_page(stub.directory, "/wiki/Stadium")
+    corpus.save_page(stub.directory, "/wiki/Stadium", page.replace("word", "term"))
+    stub.pages.pop("Stadium", None)
+    requests_sent.clear()
+    data = ws.scrape_category(root_url, rate=0, backend=backend, previous=first)
+
+    assert _article_fetches(requests_sent) == ["Stadium"]
+    stadium = _articles(data)[stub.url + "/wiki/Stadium"]
+    assert (
+        stadium["revision_id"]
+        != _articles(first)[stub.url + "/wiki/Stadium"]["revision_id"]
+    )
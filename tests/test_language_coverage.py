@@ -0,0 +1,63 @@
+"""
+Tests of the coverage of the languages in each other, on the shipped Spanish and
+English datasets, and of the comparison the charts derive from it.
+"""
+
+import json
+import os
+
+import pytest
+
+from aggregations import aggregate, compare
+from columnar import ColumnarDataset
+from language_coverage import MAX_LANGUAGES, Coverage
+
+# Constants
+LANGUAGES = ("es", "en")
+
+
+@pytest.fixture(scope="module")
+def coverage() -> Coverage:
+    tables = {}
+    for language in LANGUAGES:
+        path = os.path.join(os.path.dirname(__file__), "..", f"data_{language}.json")
+        with open(path, "r", encoding="utf-8") as file:
+            tables[language] = ColumnarDataset.from_records(json.load(file))
+    return Coverage(tables)
+
+
+def test_category_matrix(coverage):
+    matrix = coverage.matrix("categories")
+    assert matrix.loc["es"].tolist() == [16, 8]
+    assert matrix.loc["en"].tolist() == [8, 46]
+    assert coverage.exclusive("categories").to_dict() == {"es": 8, "en": 38}
+
+
+def test_article_matrix(coverage):
+    matrix = coverage.matrix("articles")
+    assert matrix.loc["es", "en"] == matrix.loc["en", "es"] == 143
+    assert coverage.exclusive("articles").to_dict() == {
+        "es": matrix.loc["es", "es"] - 143,
+        "en": matrix.loc["en", "en"] - 143,
+    }
+
+
+@pytest.mark.parametrize(
+    "language, other, categories_only", [("es", "en", 8), ("en", "es", 38)]
+)
+def test_comparison_follows_the_matrix(coverage, language, other, categories_only):
+    aggregates = aggregate(coverage.tables[language])
+    comparison = compare(coverage, language, aggregates, other)
+
+    assert comparison.total_categories_both == 8
+    assert comparison.total_categories_only == categories_only
+    assert len(comparison.articles_both) == 143
+    assert sorted(comparison.articles_only["url"]) == sorted(
+        coverage.pages(language, absent=[other])
+    )
+
+
+def test_too_many_languages_are_rejected(categories):
+    tables = ColumnarDataset.from_records(categories)
+    with pytest.raises(ValueError, match="At most"):
+        Coverage({str(i): tables for i in range(MAX_LANGUAGES + 1)})
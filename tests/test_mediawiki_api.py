@@ -0,0 +1,86 @@
+"""
+Tests of the MediaWiki API client and of the "api" backend of the crawl, against the
+API emulated by the stub server.
+"""
+
+import pytest
+import requests
+
+import http_client
+import mediawiki_api
+import wikipedia_scrapping as ws
+from benchmarks import stub_server
+
+
+@pytest.fixture
+def endpoint(stub) -> str:
+    http_client.configure(rate=0)
+    return stub.url + mediawiki_api.API_PATH
+
+
+@pytest.mark.parametrize(
+    "title, namespace, name",
+    [
+        ("Category:Sports", mediawiki_api.CATEGORY_NAMESPACE, "Sports"),
+        ("Template:Football squad", 10, "Football squad"),
+        (
+            "Volleyball: The Rules",
+            mediawiki_api.MAIN_NAMESPACE,
+            "Volleyball: The Rules",
+        ),
+        ("Arena", mediawiki_api.MAIN_NAMESPACE, "Arena"),
+    ],
+)
+def test_page_name_strips_only_namespace_prefixes(title, namespace, name):
+    assert mediawiki_api.page_name(title, namespace) == name
+
+
+def test_title_and_url_round_trip():
+    url = "https://en.wikipedia.org/wiki/Volleyball:_The_Rules"
+    title = mediawiki_api.title_from_url(url)
+    assert title == "Volleyball: The Rules"
+    assert mediawiki_api.page_url("https://en.wikipedia.org", title) == url
+
+
+def test_category_members_follow_continuation(endpoint, requests_sent, monkeypatch):
+    monkeypatch.setattr(stub_server, "MEMBERS_PER_RESPONSE", 2)
+
+    pages, subcategories = mediawiki_api.get_category_members(
+        endpoint, "Category:Volleyball"
+    )
+
+    assert pages == [
+        ("Stadium", 0),
+        ("Volleyball net", 0),
+        ("Volleyball: The Rules", 0),
+    ]
+    assert subcategories == ["Category:Beach volleyball"]
+    assert [params.get("cmcontinue") for _, params in requests_sent] == [None, "2"]
+
+
+def test_langlinks_are_batched(endpoint, requests_sent):
+    titles = ["Arena"] + [f"Missing {i}" for i in range(119)]
+
+    langlinks = mediawiki_api.get_langlinks(endpoint, titles)
+
+    batches = [params["titles"].split("|") for _, params in requests_sent]
+    assert [len(batch) for batch in batches] == [50, 50, 20]
+    assert sum(batches, []) == titles
+    assert langlinks["Arena"] == ["https://es.wikipedia.org/wiki/Arena"]
+    assert langlinks["Missing 0"] == []
+    assert len(langlinks) == len(titles)
+
+
+def test_revision_ids_leave_out_missing_pages(endpoint):
+    revisions = mediawiki_api.get_revision_ids(endpoint, ["Arena", "Missing"])
+    assert list(revisions) == ["Arena"]
+
+
+def test_api_error_raises(endpoint):
+    with pytest.raises(requests.exceptions.RequestException, match="missingtitle"):
+        mediawiki_api.get_page_html(endpoint, "Missing")
+
+
+def test_api_backend_gives_same_tree_as_html(root_url, expected, monkeypatch):
+    monkeypatch.setattr(stub_server, "MEMBERS_PER_RESPONSE", 2)
+    assert ws.scrape_category(root_url, rate=0, backend="api") == expected
@@ -0,0 +1,44 @@
+"""
+Regression tests of the section word counts on a saved article page.
+"""
+
+import os
+
+import pytest
+
+import wikipedia_scrapping as ws
+
+# Constants
+FIXTURE = os.path.join(os.path.dirname(__file__), "fixtures", "article.html")
+
+
+@pytest.fixture(params=[False, True], ids=["full", "partial"])
+def sections(request):
+    with open(FIXTURE, "r", encoding="utf-8") as file:
+        soup = ws._parse_html(file.read(), ws.DEFAULT_PARSER, request.param)
+    return {
+        section["name"]: section["word_count"] for section in ws._extract_sections(soup)
+    }
+
+
+def test_sections_in_page_order(sections):
+    assert list(sections) == ["History", "Events", "Tenants", "References"]
+
+
+def test_section_stops_at_next_heading(sections):
+    # Two paragraphs and the level 3 heading between them, not the next sections
+    assert sections["History"] == 10 + 1 + 5
+
+
+def test_consecutive_headings_give_empty_section(sections):
+    assert sections["Events"] == 0
+
+
+def test_style_is_skipped(sections):
+    # The hatnote and the list, not the TemplateStyles rules
+    assert sections["Tenants"] == 4 + 5
+
+
+def test_last_section_stops_at_authority_control(sections):
+    # The references only, not the authority control nor the navbox after it
+    assert sections["References"] == 2
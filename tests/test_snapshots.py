@@ -0,0 +1,117 @@
+"""
+Tests of the binary snapshots of the loaded datasets and of their invalidation.
+"""
+
+import json
+import os
+import pickle
+
+import pytest
+
+import database as db
+import datasets
+
+# Constants
+KEY = "test"
+
+
+@pytest.fixture
+def data_path(categories, tmp_path) -> str:
+    path = str(tmp_path / "data.json")
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(categories, file)
+    return path
+
+
+@pytest.fixture
+def reads(monkeypatch):
+    """
+    Counts the times the data file is parsed instead of loaded from its snapshot.
+    """
+    count = {"reads": 0}
+    read_dataset = datasets.read_dataset
+
+    def counting_read_dataset(path):
+        count["reads"] += 1
+        return read_dataset(path)
+
+    monkeypatch.setattr(datasets, "read_dataset", counting_read_dataset)
+    return count
+
+
+@pytest.fixture(autouse=True)
+def unload():
+    yield
+    for loaded in (db.database, db.index, db.articles):
+        loaded.pop(KEY, None)
+    if KEY in db.stores:
+        db.stores.pop(KEY).close()
+
+
+def _load(path: str, columnar: bool) -> list:
+    db.load(KEY, path=path, columnar=columnar, snapshot=True)
+    return db.read_categories(KEY)
+
+
+def _rewrite(path: str, categories: list):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(categories, file)
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_unchanged_file_is_loaded_from_snapshot(data_path, reads, columnar):
+    first = _load(data_path, columnar)
+    assert _load(data_path, columnar) == first
+    assert reads["reads"] == 1
+    assert os.path.exists(db._snapshot_path(data_path, columnar))
+
+
+@pytest.mark.parametrize("columnar", [False, True])
+def test_size_change_invalidates_snapshot(data_path, categories, reads, columnar):
+    _load(data_path, columnar)
+    categories[0]["name"] = "All sports"
+    _rewrite(data_path, categories)
+
+    assert _load(data_path, columnar)[0]["name"] == "All sports"
+    assert reads["reads"] == 2
+
+
+def test_content_change_with_same_size_invalidates_snapshot(
+    data_path, categories, reads
+):
+    _load(data_path, False)
+    categories[0]["name"] = "Sprots"
+    _rewrite(data_path, categories)
+    os.utime(data_path, ns=(0, os.stat(data_path).st_mtime_ns + 10**9))
+
+    assert _load(data_path, False)[0]["name"] == "Sprots"
+    assert reads["reads"] == 2
+
+
+def test_touched_file_is_checked_by_hash(data_path, reads):
+    _load(data_path, False)
+    os.utime(data_path, ns=(0, os.stat(data_path).st_mtime_ns + 10**9))
+
+    _load(data_path, False)
+    assert reads["reads"] == 1
+    # The snapshot now has the new modification time: no hash next time
+    with open(db._snapshot_path(data_path, False), "rb") as file:
+        signature = pickle.load(file)["signature"]
+    assert signature[0] == os.stat(data_path).st_mtime_ns
+
+
+def test_snapshot_of_another_version_is_rebuilt(data_path, reads, monkeypatch):
+    _load(data_path, False)
+    monkeypatch.setattr(db, "SNAPSHOT_VERSION", db.SNAPSHOT_VERSION + 1)
+
+    _load(data_path, False)
+    assert reads["reads"] == 2
+
+
+def test_corrupt_snapshot_is_rebuilt(data_path, reads):
+    first = _load(data_path, False)
+    with open(db._snapshot_path(data_path, False), "wb") as file:
+        file.write(b"not a pickle")
+
+    assert _load(data_path, False) == first
+    assert reads["reads"] == 2
@@ -3,14 +3,36 @@ This module scrapes Wikipedia categories and articles, extracting relevant data.
 """
 
 import time
+import json
+import asyncio
 import logging
-import random
+from collections import OrderedDict
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from dataclasses import dataclass, field
 from urllib.parse import unquote, urlparse
-from typing import List, Dict, Any, Tuple
+from typing import (
+    List,
+    Dict,
+    Any,
+    Awaitable,
+    Callable,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
 
 import requests
-from bs4 import BeautifulSoup
-from tenacity import retry, wait_exponential_jitter, stop_after_attempt
+from bs4 import BeautifulSoup, SoupStrainer, Tag
+from bs4.builder import builder_registry
+
+import http_client
+import mediawiki_api
+import profiling
+import telemetry
+from checkpoint import CrawlCheckpoint
+from datasets import JsonlWriter, open_dataset
+from sqlite_database import SqliteDatabase, is_sqlite_path
 
 # Configure logging
 logging.basicConfig(
@@ -18,7 +40,22 @@ logging.basicConfig(
 )
 
 # Constants
-USER_AGENT = "WikipediaEduBot/1.0 (User:test; mailto:test@gmail.com)"
+USER_AGENT = http_client.USER_AGENT
+DEFAULT_MAX_CONCURRENCY = 8  # requests in flight per host
+DEFAULT_MAX_WORKERS = 32  # threads running the blocking requests
+PARSERS = ("html.parser", "lxml", "html5lib")  # BeautifulSoup tree builders
+DEFAULT_PARSER = "html.parser"
+STREAMING_MEMO_SIZE = 10000  # articles memoized when streaming to a file
+PENDING_PAGES_PER_PARSER = 2  # downloaded pages waiting for each parser
+
+# Elements read by the extractors, kept with all their content by partial parsing
+_EXTRACTED_IDS = {"mw-pages", "mw-subcategories"}
+_EXTRACTED_CLASSES = {
+    "mw-page-title-main",
+    "interlanguage-link-target",
+    "mw-parser-output",  # headings, sections and authority control
+    "CategoryTreeItem",
+}
 
 
 def _get_base_url(url: str) -> str:
@@ -26,63 +63,109 @@ def _get_base_url(url: str) -> str:
     return f"{parsed_url.scheme}://{parsed_url.netloc}"
 
 
-@retry(wait=wait_exponential_jitter(max=10, jitter=1), stop=stop_after_attempt(3))
-def _fetch_and_parse_url_content(url: str) -> BeautifulSoup:
+def is_parser_available(parser: str) -> bool:
     """
-    Fetches the URL and returns the BeautifulSoup object.
+    Tells whether a BeautifulSoup tree builder of `PARSERS` can be used: "lxml" and
+    "html5lib" need their own packages.
+    """
+    return parser in PARSERS and builder_registry.lookup(parser) is not None
+
+
+def _is_extracted_element(name: str, attrs: Dict[str, Any]) -> bool:
+    """
+    Tells whether partial parsing keeps an element: the title, the language links,
+    the article content and the category listings.
+    """
+    classes = attrs.get("class") or []
+    if isinstance(classes, str):
+        classes = classes.split()
+    return attrs.get("id") in _EXTRACTED_IDS or not _EXTRACTED_CLASSES.isdisjoint(
+        classes
+    )
+
+
+_EXTRACTED_ELEMENTS = SoupStrainer(_is_extracted_element)
+
+
+def _parse_html(
+    html: str, parser: str = DEFAULT_PARSER, partial: bool = False
+) -> BeautifulSoup:
+    """
+    Parses a page with the given BeautifulSoup tree builder.
+    With `partial`, only the elements the extractors read are built, which skips
+    the head, navigation, sidebars and footer of the page.
+    """
+    return BeautifulSoup(
+        html, parser, parse_only=_EXTRACTED_ELEMENTS if partial else None
+    )
+
+
+def _fetch_url_text(url: str) -> str:
+    """
+    Fetches the URL and returns the HTML of the page.
+    Failed attempts are retried by `http_client.get`, which backs off and slows
+    down the host when it is overloaded.
     """
 
     headers = {"User-Agent": USER_AGENT}
 
     try:
-        response = requests.get(url, headers=headers, timeout=10)
+        response = http_client.get(url, headers=headers, timeout=10)
         response.raise_for_status()
-        return BeautifulSoup(response.text, "html.parser")
+        return response.text
     except requests.exceptions.RequestException as e:
         logging.error("Error fetching %s: %s", url, e)
         raise
-    finally:
-        wait_time = random.uniform(1, 2)
-        time.sleep(wait_time)
 
 
 def _process_sections_and_count_words(headings, termination_node):
     """
     Processes the headings and extracts word counts for their sections.
-    Combines the logic of extracting text content and counting words.
+    The content is split at the headings in a single pass: the siblings that follow
+    each heading are walked once, up to the next heading or the termination node,
+    so the whole article is processed in linear time.
     """
     sections = []
+    boundaries = {id(heading) for heading in headings}
+
+    for current_heading in headings:
+        word_count = 0
+
+        # Count the words between this heading and the next one (skipping style)
+        for sibling in current_heading.next_siblings:
+            if not isinstance(sibling, Tag):
+                continue
+            if id(sibling) in boundaries or sibling is termination_node:
+                break
+            if sibling.name != "style":
+                word_count += len(sibling.get_text().split())
 
-    for i, current_heading in enumerate(headings):
-        next_heading = headings[i + 1] if i + 1 < len(headings) else None
-
-        # Extract text content between headings (and skip style or termination node)
-        siblings = current_heading.find_next_siblings()
-        content = [
-            sibling.get_text()
-            for sibling in siblings
-            if sibling != next_heading
-            and sibling != termination_node
-            and sibling.name != "style"
-        ]
-
-        # Combine the content and count words
-        section_text = " ".join(content)
         sections.append(
             {
                 "name": current_heading.find("h2").get_text(strip=True),
-                "word_count": len(section_text.split()),
+                "word_count": word_count,
             }
         )
 
     return sections
 
 
-def _fetch_article_data(article_url: str) -> Dict[str, Any]:
+def _extract_sections(soup: BeautifulSoup) -> List[Dict[str, Any]]:
     """
-    Fetches and processes data from a Wikipedia article.
+    Extracts the level 2 sections of an article with their word counts.
+    """
+    with profiling.stage("sections"):
+        headings = soup.find_all(class_="mw-heading2")
+        termination_node = soup.find(class_="mw-authority-control")
+        return _process_sections_and_count_words(headings, termination_node)
+
+
+def _parse_article_data(article_url: str, soup: BeautifulSoup) -> Dict[str, Any]:
+    """
+    Extracts the article data from an already fetched article page.
     Args:
-        article_url (str): The URL of the Wikipedia article to fetch.
+        article_url (str): The URL of the Wikipedia article.
+        soup (BeautifulSoup): The parsed article page.
     Returns:
         Dict[str, Any]: A dictionary containing the article's data, including:
             - id (str): The URL of the article.
@@ -90,8 +173,6 @@ def _fetch_article_data(article_url: str) -> Dict[str, Any]:
             - languages (List[str]): A list of URLs to the article in different languages.
             - sections (Dict[str, Any]): A dictionary containing the sections of the article and word counts.
     """
-    soup = _fetch_and_parse_url_content(article_url)
-
     name = soup.find("span", class_="mw-page-title-main").text
     languages = [
         unquote(link["href"])
@@ -99,9 +180,7 @@ def _fetch_article_data(article_url: str) -> Dict[str, Any]:
     ]
 
     # process sections
-    headings = soup.find_all(class_="mw-heading2")
-    termination_node = soup.find(class_="mw-authority-control")
-    sections = _process_sections_and_count_words(headings, termination_node)
+    sections = _extract_sections(soup)
 
     return {
         "id": unquote(article_url),
@@ -111,63 +190,568 @@ def _fetch_article_data(article_url: str) -> Dict[str, Any]:
     }
 
 
-def _fetch_category_data(
-    category_url: str,
-    data: List[Dict[str, Any]],
-    stats: Dict[str, int],
-    parent_id: str = None,
-    depth: int = 0,
-) -> Tuple[List[Dict[str, Any]], Dict[str, int]]:
+def _parse_category_page(
+    category_url: str, soup: BeautifulSoup
+) -> Tuple[str, List[str], List[str], List[str]]:
     """
-    Fetches the category data and its articles recursively.
+    Extracts the name, languages, article URLs and subcategory URLs of a category page.
     """
-    logging.info(f"{' ' * depth}Fetching category URL: %s", category_url)
-
-    # Check that the category is not repeated
-    for category in data:
-        if category["id"] == category_url:
-            logging.warning(f"{' ' * depth}Category already fetched: %s", category_url)
-            return
-
-    stats["categories"] += 1
-
-    # Fetch the category URL
-    soup = _fetch_and_parse_url_content(category_url)
-
-    # Retrieve category information
-    category_id = category_url
-    category_name = soup.find("span", class_="mw-page-title-main").text
-    category_languages = [
+    base_url = _get_base_url(category_url)
+    name = soup.find("span", class_="mw-page-title-main").text
+    languages = [
         unquote(link["href"])
         for link in soup.find_all("a", class_="interlanguage-link-target", href=True)
     ]
-
-    # Process articles
     articles_urls = [
-        unquote(_get_base_url(category_url) + link["href"])
+        unquote(base_url + link["href"])
         for link in soup.select("#mw-pages .mw-category a[href][title]")
     ]
+    subcategories_urls = [
+        unquote(base_url + link["href"])
+        for link in soup.select(".CategoryTreeItem a[href][title]")
+    ]
+    return name, languages, articles_urls, subcategories_urls
+
+
+def _extract_article(
+    article_url: str, html: str, parser: str, partial: bool
+) -> Dict[str, Any]:
+    """
+    Parses the HTML of a downloaded article page and extracts its data, as
+    `_parse_article_data` does.
+    """
+    return _parse_article_data(article_url, _parse_html(html, parser, partial))
+
+
+def _extract_category(
+    category_url: str, html: str, parser: str, partial: bool
+) -> Tuple[str, List[str], List[str], List[str]]:
+    """
+    Parses the HTML of a downloaded category page and extracts its name, languages,
+    article URLs and subcategory URLs, as `_parse_category_page` does.
+    """
+    return _parse_category_page(category_url, _parse_html(html, parser, partial))
+
+
+def _run_extractor(
+    extractor: Callable[..., Any], html: str, parser: str, partial: bool, *args
+) -> Tuple[Any, float, float]:
+    """
+    Parses the HTML and runs the extractor on the soup, as `extractor(*args, soup)`.
+    Returns its result with the seconds spent parsing and extracting. It takes the
+    raw HTML and returns plain data, so it can run in a worker process.
+    """
+    with profiling.stage("parse"):
+        start = time.perf_counter()
+        soup = _parse_html(html, parser, partial)
+        parsed = time.perf_counter()
+        result = extractor(*args, soup)
+        return result, parsed - start, time.perf_counter() - parsed
+
 
-    # Fetch each article with its sections
-    articles = []
-    for article_url in articles_urls:
+@dataclass
+class _CrawlContext:
+    """
+    Shared state of a single asynchronous crawl.
+
+    Requests run in a thread pool (`requests` is blocking) and the number of
+    requests in flight against the same host is bounded by a semaphore per host.
+    In incremental mode, `previous` maps the article IDs of the previous run to
+    their records. When a checkpoint is set, every completed category is saved to
+    it, and the categories it already holds are not fetched again.
+
+    The crawl is bounded by the budgets (`None` means unlimited): `deadline` is the
+    `time.monotonic()` value at which the crawl stops. Distinct articles are counted
+    against `max_articles` when they are scheduled (`reserved_articles` holds their
+    URLs); the categories trimmed to fit in it are kept in `partial_categories`.
+
+    `visited` holds the categories already in the frontier and `articles` memoizes
+    the article fetches by URL, so every page is downloaded and parsed at most once
+    per crawl even when it belongs to several categories.
+
+    When `output` is set, complete categories are written to it instead of being
+    kept for the result, and the article memo only keeps the `STREAMING_MEMO_SIZE`
+    most recently used articles, so the memory used does not grow with the crawl.
+
+    Pages go through two stages: they are downloaded in the thread pool, then parsed
+    and extracted in `parse_executor` (a process pool when `parse_workers` is set,
+    the thread pool otherwise). `pending_pages` bounds the pages between the two
+    stages, so downloads wait when the parsers fall behind.
+
+    Pages that still fail once `http_client` gave up retrying them, or that cannot
+    be extracted (e.g. malformed markup), are added to `dead_letters` and left out
+    of the result instead of aborting the crawl.
+    """
+
+    stats: Dict[str, Any]
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY
+    backend: str = "html"
+    parser: str = DEFAULT_PARSER
+    partial_parsing: bool = False
+    strategy: Union[str, Callable[[str, int], Any]] = "dfs"
+    max_depth: int = None
+    max_categories: int = None
+    max_articles: int = None
+    deadline: float = None
+    previous: Dict[str, Dict[str, Any]] = None
+    checkpoint: CrawlCheckpoint = None
+    output: Union[JsonlWriter, SqliteDatabase] = None
+    visited: Set[str] = field(default_factory=set)
+    articles: Dict[str, asyncio.Future] = field(default_factory=OrderedDict)
+    executor: ThreadPoolExecutor = None
+    parse_workers: int = None
+    parse_executor: Executor = None
+    pending_pages: asyncio.Semaphore = None
+    host_limits: Dict[str, asyncio.Semaphore] = field(default_factory=dict)
+    dead_letters: List[Dict[str, Any]] = field(default_factory=list)
+    partial_categories: Set[str] = field(default_factory=set)
+    reserved_articles: Set[str] = field(default_factory=set)
+
+    def __post_init__(self):
+        max_workers = max(self.max_concurrency, DEFAULT_MAX_WORKERS)
+        if self.executor is None:
+            self.executor = ThreadPoolExecutor(max_workers=max_workers)
+        if self.parse_executor is None:
+            if self.parse_workers:
+                self.parse_executor = ProcessPoolExecutor(
+                    max_workers=self.parse_workers
+                )
+            else:
+                self.parse_executor = self.executor
+        if self.pending_pages is None:
+            self.pending_pages = asyncio.Semaphore(
+                self.max_concurrency
+                + PENDING_PAGES_PER_PARSER * (self.parse_workers or max_workers)
+            )
+
+    async def run(self, url: str, func: Callable[..., Any], *args) -> Any:
+        """
+        Runs a blocking request function against the URL's host without blocking
+        the event loop.
+        """
+        host = urlparse(url).netloc
+        if host not in self.host_limits:
+            self.host_limits[host] = asyncio.Semaphore(self.max_concurrency)
+
+        async with self.host_limits[host]:
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(
+                self.executor, profiling.call, "fetch", func, *args
+            )
+
+    async def parse(self, extractor: Callable[..., Any], html: str, *args) -> Any:
+        """
+        Parses the HTML in the parse stage with the parser of the crawl, then runs
+        the extractor on the soup as `extractor(*args, soup)`.
+        """
+        loop = asyncio.get_running_loop()
+        result, parse_time, extract_time = await loop.run_in_executor(
+            self.parse_executor,
+            _run_extractor,
+            extractor,
+            html,
+            self.parser,
+            self.partial_parsing,
+            *args,
+        )
+        telemetry.record_stage("parse", parse_time, extractor=extractor.__name__)
+        telemetry.record_stage("extract", extract_time, extractor=extractor.__name__)
+        return result
+
+    async def fetch(self, url: str, extractor: Callable[..., Any]) -> Any:
+        """
+        Downloads the URL, then runs the extractor on its page in the parse stage
+        as `extractor(url, soup)`.
+        """
+        async with self.pending_pages:
+            html = await self.run(url, _fetch_url_text, url)
+            return await self.parse(extractor, html, url)
+
+    def dead_letter(self, url: str, kind: str, error: Exception, depth: int = 0):
+        """
+        Records a page that failed for good, so the crawl goes on without it.
+        Errors other than HTTP failures are logged with their traceback.
+        """
+        response = getattr(error, "response", None)
+        logging.error(
+            f"{' ' * depth}Giving up on %s %s: %s",
+            kind,
+            url,
+            error,
+            exc_info=not isinstance(error, requests.exceptions.RequestException),
+        )
+        self.dead_letters.append(
+            {
+                "url": url,
+                "kind": kind,
+                "error": f"{type(error).__name__}: {error}",
+                "status": response.status_code if response is not None else None,
+            }
+        )
+        self.stats["dead_letters"] += 1
+
+    def shutdown(self):
+        """
+        Stops the download threads and the parse workers.
+        """
+        self.executor.shutdown(wait=False)
+        if self.parse_executor is not self.executor:
+            self.parse_executor.shutdown(wait=False, cancel_futures=True)
+
+
+async def _fetch_revision_ids(
+    ctx: _CrawlContext, category_url: str, titles: List[str], langlinks: bool = False
+) -> Tuple[Dict[str, int], Dict[str, List[str]]]:
+    """
+    Fetches the latest revision IDs of the articles of a category in batches, and
+    with `langlinks` their language links in the same requests.
+    Only needed in incremental mode; returns empty dictionaries otherwise.
+    """
+    if ctx.previous is None or not titles:
+        return {}, {}
+
+    endpoint = mediawiki_api.api_endpoint(category_url)
+    try:
+        if langlinks:
+            return await ctx.run(
+                endpoint,
+                mediawiki_api.get_revision_ids_and_langlinks,
+                endpoint,
+                titles,
+            )
+        revisions = await ctx.run(
+            endpoint, mediawiki_api.get_revision_ids, endpoint, titles
+        )
+        return revisions, {}
+    except requests.exceptions.RequestException as e:
+        # Without revision IDs the articles are simply fetched again
+        logging.warning("Revision IDs not available for %s: %s", category_url, e)
+        return {}, {}
+
+
+def _reserve_articles(
+    ctx: _CrawlContext, category_url: str, members: List, urls: List[str] = None
+) -> List:
+    """
+    Counts the articles of a category against the `max_articles` budget before they
+    are fetched. Returns the members that fit; `urls` are their article URLs (the
+    members themselves by default).
+
+    The budget counts distinct articles: an article already reserved, by another
+    category or earlier in this one, is kept without being counted again. Once the
+    budget is used up, a category is trimmed to the articles already reserved.
+    """
+    if ctx.max_articles is None:
+        return members
+
+    kept = []
+    for member, url in zip(members, members if urls is None else urls):
+        if url not in ctx.reserved_articles:
+            if len(ctx.reserved_articles) >= ctx.max_articles:
+                ctx.partial_categories.add(category_url)
+                ctx.stats["stopped_by"] = ctx.stats["stopped_by"] or "max_articles"
+                continue
+            ctx.reserved_articles.add(url)
+        kept.append(member)
+    ctx.stats["scheduled_articles"] = len(ctx.reserved_articles)
+    return kept
+
+
+def _reuse_article(
+    ctx: _CrawlContext,
+    article_url: str,
+    revision_id: int,
+    depth: int,
+    languages: List[str] = None,
+) -> Dict[str, Any]:
+    """
+    Returns the record of the previous run if the article has not been edited since,
+    or `None` if it has to be fetched again. Language links are not part of the page
+    revision, so the given ones replace the links of the previous record.
+    """
+    if ctx.previous is None or revision_id is None:
+        return None
+
+    article = ctx.previous.get(article_url)
+    if article is None or article.get("revision_id") != revision_id:
+        return None
+
+    logging.info(f"{' ' * depth}-Unchanged article: %s", article_url)
+    ctx.stats["reused_articles"] += 1
+    article = dict(article)
+    if languages is not None:
+        article["languages"] = languages
+    return article
+
+
+async def _memoize_article(
+    ctx: _CrawlContext,
+    article_url: str,
+    fetch_article: Callable[[], Awaitable[Dict[str, Any]]],
+) -> Dict[str, Any]:
+    """
+    Runs the fetch of an article only the first time its URL is seen in the crawl;
+    later calls (also while the first fetch is in flight) share its result.
+    When streaming, the least recently used articles are forgotten.
+    """
+    article = ctx.articles.get(article_url)
+    if article is None:
+        article = asyncio.ensure_future(fetch_article())
+        ctx.articles[article_url] = article
+        if ctx.output is not None and len(ctx.articles) > STREAMING_MEMO_SIZE:
+            ctx.articles.popitem(last=False)
+    else:
+        ctx.articles.move_to_end(article_url)
+        ctx.stats["saved_fetches"] += 1
+    return await article
+
+
+async def _fetch_article(
+    ctx: _CrawlContext,
+    article_url: str,
+    depth: int,
+    revision_id: int = None,
+    languages: List[str] = None,
+) -> Dict[str, Any]:
+    """
+    Fetches an article through the crawl context and extracts its data.
+    Returns `None` if the article could not be fetched or extracted.
+    """
+    article = _reuse_article(ctx, article_url, revision_id, depth, languages)
+    if article is None:
         logging.info(f"{' ' * depth}-Fetching article URL: %s", article_url)
-        article = _fetch_article_data(article_url)
-        stats["sections"] += len(article["sections"])
-        articles.append(article)
+        try:
+            article = await ctx.fetch(article_url, _parse_article_data)
+        except Exception as e:
+            ctx.dead_letter(article_url, "article", e, depth)
+            return None
+        if revision_id is not None:
+            article["revision_id"] = revision_id
 
-    stats["articles"] += len(articles)
+    return article
 
-    # Complete structure of the category
-    data.append(
-        {
-            "id": category_url,
-            "parent_id": parent_id,
-            "name": category_name,
-            "languages": category_languages,
-            "articles": articles,
+
+async def _fetch_category_html(
+    ctx: _CrawlContext, category_url: str, depth: int
+) -> Tuple[str, List[str], List[Dict[str, Any]], List[str]]:
+    """
+    Fetches a category from its rendered HTML page, and its articles concurrently.
+    Returns the name, languages, articles and subcategory URLs of the category.
+    """
+    name, languages, articles_urls, subcategories_urls = await ctx.fetch(
+        category_url, _parse_category_page
+    )
+
+    articles_urls = _reserve_articles(ctx, category_url, articles_urls)
+    titles = [mediawiki_api.title_from_url(url) for url in articles_urls]
+    revisions, langlinks = await _fetch_revision_ids(
+        ctx, category_url, titles, langlinks=True
+    )
+
+    articles = await asyncio.gather(
+        *(
+            _memoize_article(
+                ctx,
+                article_url,
+                lambda article_url=article_url, title=title: _fetch_article(
+                    ctx, article_url, depth, revisions.get(title), langlinks.get(title)
+                ),
+            )
+            for article_url, title in zip(articles_urls, titles)
+        )
+    )
+    articles = [article for article in articles if article is not None]
+    return name, languages, articles, subcategories_urls
+
+
+async def _fetch_article_api(
+    ctx: _CrawlContext,
+    endpoint: str,
+    title: str,
+    namespace: int,
+    languages: List[str],
+    depth: int,
+    revision_id: int = None,
+) -> Dict[str, Any]:
+    """
+    Fetches the sections of an article through `action=parse`.
+    Returns `None` if the article could not be fetched or extracted.
+    """
+    article_url = mediawiki_api.page_url(_get_base_url(endpoint), title)
+
+    article = _reuse_article(ctx, article_url, revision_id, depth, languages)
+    if article is None:
+        logging.info(f"{' ' * depth}-Fetching article URL: %s", article_url)
+        try:
+            html = await ctx.run(endpoint, mediawiki_api.get_page_html, endpoint, title)
+            sections = await ctx.parse(_extract_sections, html)
+        except Exception as e:
+            ctx.dead_letter(article_url, "article", e, depth)
+            return None
+        article = {
+            "id": article_url,
+            "name": mediawiki_api.page_name(title, namespace),
+            "languages": languages,
+            "sections": sections,
         }
+        if revision_id is not None:
+            article["revision_id"] = revision_id
+
+    return article
+
+
+async def _fetch_category_api(
+    ctx: _CrawlContext, category_url: str, depth: int
+) -> Tuple[str, List[str], List[Dict[str, Any]], List[str]]:
+    """
+    Fetches a category through the MediaWiki API: members are listed with
+    `list=categorymembers` and the language links of the category and all its
+    articles are fetched in batches with `prop=langlinks`.
+    Returns the name, languages, articles and subcategory URLs of the category.
+    """
+    endpoint = mediawiki_api.api_endpoint(category_url)
+    base_url = _get_base_url(category_url)
+    title = mediawiki_api.title_from_url(category_url)
+
+    members, subcategories_titles = await ctx.run(
+        endpoint, mediawiki_api.get_category_members, endpoint, title
     )
+    members = _reserve_articles(
+        ctx,
+        category_url,
+        members,
+        [mediawiki_api.page_url(base_url, member_title) for member_title, _ in members],
+    )
+    articles_titles = [article_title for article_title, _ in members]
+    langlinks = await ctx.run(
+        endpoint, mediawiki_api.get_langlinks, endpoint, [title] + articles_titles
+    )
+    revisions, _ = await _fetch_revision_ids(ctx, category_url, articles_titles)
+
+    articles = await asyncio.gather(
+        *(
+            _memoize_article(
+                ctx,
+                mediawiki_api.page_url(base_url, article_title),
+                lambda article_title=article_title, namespace=namespace: (
+                    _fetch_article_api(
+                        ctx,
+                        endpoint,
+                        article_title,
+                        namespace,
+                        langlinks[article_title],
+                        depth,
+                        revisions.get(article_title),
+                    )
+                ),
+            )
+            for article_title, namespace in members
+        )
+    )
+    articles = [article for article in articles if article is not None]
+    subcategories_urls = [
+        mediawiki_api.page_url(base_url, subcategory_title)
+        for subcategory_title in subcategories_titles
+    ]
+
+    # The page title without the namespace, as shown on the category page
+    name = mediawiki_api.page_name(title, mediawiki_api.CATEGORY_NAMESPACE)
+    return name, langlinks[title], articles, subcategories_urls
+
+
+_BACKENDS = {
+    "html": _fetch_category_html,
+    "api": _fetch_category_api,
+}
+
+
+@dataclass(order=True)
+class _FrontierItem:
+    """
+    A category waiting in the frontier, ordered by the crawl strategy.
+
+    `path` holds the position of the category among its siblings at every level of
+    the tree; sorting by it gives the depth-first order of a sequential crawl.
+    """
+
+    priority: Any
+    sequence: int
+    url: str = field(compare=False)
+    parent_id: Optional[str] = field(compare=False)
+    depth: int = field(compare=False)
+    path: Tuple[int, ...] = field(compare=False)
+
+
+def _frontier_priority(
+    ctx: _CrawlContext, url: str, depth: int, path: Tuple[int, ...]
+) -> Any:
+    """
+    Returns the priority of a category in the frontier (lowest first).
+    """
+    if ctx.strategy == "dfs":
+        return path
+    if ctx.strategy == "bfs":
+        return (depth, path)
+    return ctx.strategy(url, depth)
+
+
+def _budget_exhausted(ctx: _CrawlContext) -> Optional[str]:
+    """
+    Returns the name of the first budget used up, or `None` if the crawl can go on.
+    """
+    if ctx.max_categories is not None and ctx.stats["categories"] >= ctx.max_categories:
+        return "max_categories"
+    if (
+        ctx.max_articles is not None
+        and ctx.stats["scheduled_articles"] >= ctx.max_articles
+    ):
+        return "max_articles"
+    if ctx.deadline is not None and time.monotonic() >= ctx.deadline:
+        return "deadline"
+    return None
+
+
+async def _fetch_category_data(
+    ctx: _CrawlContext, item: _FrontierItem
+) -> Tuple[Dict[str, Any], List[str]]:
+    """
+    Fetches a category with all its articles and sections.
+    Returns the category record and the URLs of its subcategories.
+    """
+    depth = item.depth
+    logging.info(f"{' ' * depth}Fetching category URL: %s", item.url)
+
+    if ctx.checkpoint is not None and item.url in ctx.checkpoint.completed:
+        # Completed before the crawl was interrupted
+        category, subcategories_urls = ctx.checkpoint.completed[item.url]
+        ctx.stats["resumed_categories"] += 1
+        logging.info(f"{' ' * depth}Category resumed: %s", category["name"])
+        articles = _reserve_articles(
+            ctx,
+            item.url,
+            category["articles"],
+            [article["id"] for article in category["articles"]],
+        )
+        if len(articles) < len(category["articles"]):
+            category = {**category, "articles": articles}
+        return category, subcategories_urls
+
+    fetch_category = _BACKENDS[ctx.backend]
+    category_name, category_languages, articles, subcategories_urls = (
+        await fetch_category(ctx, item.url, depth)
+    )
+
+    # Complete structure of the category
+    category = {
+        "id": item.url,
+        "parent_id": item.parent_id,
+        "name": category_name,
+        "languages": category_languages,
+        "articles": articles,
+    }
+    # A trimmed category is not complete: a resumed crawl fetches it again
+    if ctx.checkpoint is not None and item.url not in ctx.partial_categories:
+        ctx.checkpoint.save(category, subcategories_urls)
 
     # Informative messages
     logging.info(
@@ -175,26 +759,262 @@ def _fetch_category_data(
         category_name,
         len(articles),
     )
+    return category, subcategories_urls
+
+
+def _push(
+    ctx: _CrawlContext,
+    frontier: asyncio.PriorityQueue,
+    url: str,
+    parent_id: Optional[str],
+    depth: int,
+    path: Tuple[int, ...],
+):
+    """
+    Adds a category to the frontier unless it was already seen or is too deep.
+    """
+    # Check that the category is not repeated
+    if url in ctx.visited:
+        logging.warning(f"{' ' * depth}Category already fetched: %s", url)
+        ctx.stats["saved_fetches"] += 1
+        return
+    if ctx.max_depth is not None and depth > ctx.max_depth:
+        return
+
+    ctx.visited.add(url)
+    ctx.stats["frontier_sequence"] += 1
+    frontier.put_nowait(
+        _FrontierItem(
+            _frontier_priority(ctx, url, depth, path),
+            ctx.stats["frontier_sequence"],
+            url,
+            parent_id,
+            depth,
+            path,
+        )
+    )
+
+
+async def _worker(
+    ctx: _CrawlContext,
+    frontier: asyncio.PriorityQueue,
+    results: Dict[Tuple[int, ...], Dict[str, Any]],
+):
+    """
+    Takes categories from the frontier until the crawl is cancelled.
+    Once a budget is used up, the rest of the frontier is drained without fetching.
+    A category that cannot be fetched or extracted is dead-lettered with its whole
+    subtree, and the workers go on with the rest of the frontier.
+    """
+    while True:
+        item = await frontier.get()
+        try:
+            stopped_by = _budget_exhausted(ctx)
+            if stopped_by is not None:
+                ctx.stats["stopped_by"] = ctx.stats["stopped_by"] or stopped_by
+                continue
+
+            # Count the category before fetching so the budget holds under concurrency
+            ctx.stats["categories"] += 1
+            try:
+                category, subcategories_urls = await _fetch_category_data(ctx, item)
+            except Exception as e:
+                ctx.stats["categories"] -= 1
+                ctx.dead_letter(item.url, "category", e, item.depth)
+                continue
+
+            if ctx.output is not None:
+                ctx.output.write(category)
+            else:
+                results[item.path] = category
+            ctx.stats["articles"] += len(category["articles"])
+
+            for i, subcategory_url in enumerate(subcategories_urls):
+                _push(
+                    ctx,
+                    frontier,
+                    subcategory_url,
+                    item.url,  # parent_id
+                    item.depth + 1,  # Increase depth for subcategories
+                    item.path + (i,),
+                )
+        finally:
+            frontier.task_done()
+
+
+async def _crawl(ctx: _CrawlContext, url: str) -> List[Dict[str, Any]]:
+    """
+    Runs the asynchronous crawl of a category tree.
+
+    Categories are taken from a frontier by a pool of workers in the order given by
+    the crawl strategy, so deep trees do not hit the recursion limit. When a budget
+    runs out the crawl stops: categories still in flight at the deadline are left
+    out, so only complete categories are returned and each of them has its parent
+    in the result. The result is in depth-first order whatever the strategy.
+    When streaming, the records are in the file in the order they were completed
+    and the result is empty.
+    """
+    frontier = asyncio.PriorityQueue()
+    results = {}
+    _push(ctx, frontier, url, None, 0, ())
 
-    # Fetch subcategories recursively
-    for subcategory_link in soup.select(".CategoryTreeItem a[href][title]"):
-        subcategory_href = subcategory_link.get("href")
-        subcategory_url = unquote(_get_base_url(category_url) + subcategory_href)
-        _fetch_category_data(
-            subcategory_url,
-            data,
-            stats,
-            category_id,  # parent_id
-            depth + 1,  # Increase depth for subcategories
+    workers = [
+        asyncio.create_task(_worker(ctx, frontier, results))
+        for _ in range(ctx.max_concurrency)
+    ]
+    drained = asyncio.create_task(frontier.join())
+    try:
+        timeout = None
+        if ctx.deadline is not None:
+            timeout = max(ctx.deadline - time.monotonic(), 0)
+        done, _ = await asyncio.wait(
+            [drained, *workers], timeout=timeout, return_when=asyncio.FIRST_COMPLETED
         )
 
-    return data, stats
+        # Workers only stop on errors
+        for task in done:
+            if task is not drained:
+                task.result()
+        if not done:
+            ctx.stats["stopped_by"] = ctx.stats["stopped_by"] or "deadline"
+    finally:
+        drained.cancel()
+        for task in workers:
+            task.cancel()
+        await asyncio.gather(drained, *workers, return_exceptions=True)
+        ctx.shutdown()
+        if ctx.checkpoint is not None:
+            ctx.checkpoint.close()
+        if ctx.output is not None:
+            ctx.output.close()
+
+    if ctx.stats["stopped_by"] is not None:
+        logging.warning("Crawl stopped by the %s budget", ctx.stats["stopped_by"])
+
+    if ctx.output is not None:
+        ctx.stats["categories"] = ctx.output.categories
+        ctx.stats["articles"] = ctx.output.articles
+        ctx.stats["sections"] = ctx.output.sections
+        return []
+
+    # Categories cut off by the deadline are not part of the result
+    ctx.stats["categories"] = len(results)
+    ctx.stats["articles"] = sum(len(c["articles"]) for c in results.values())
+    ctx.stats["sections"] = sum(
+        len(article["sections"]) for c in results.values() for article in c["articles"]
+    )
+
+    return [results[path] for path in sorted(results)]
 
 
-def scrape_category(url: str) -> List[Dict[str, Any]]:
+def scrape_category(
+    url: str,
+    max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+    rate: float = http_client.DEFAULT_RATE,
+    burst: int = http_client.DEFAULT_BURST,
+    backend: str = "html",
+    cache_dir: str = None,
+    previous: List[Dict[str, Any]] = None,
+    checkpoint_path: str = None,
+    resume: bool = False,
+    strategy: Union[str, Callable[[str, int], Any]] = "dfs",
+    max_depth: int = None,
+    max_categories: int = None,
+    max_articles: int = None,
+    deadline: float = None,
+    parser: str = DEFAULT_PARSER,
+    partial_parsing: bool = False,
+    output_path: str = None,
+    parse_workers: int = None,
+    metrics_path: str = None,
+    metrics_hook: Callable[[Dict[str, Any]], None] = None,
+    profile_dir: str = None,
+    dead_letter_path: str = None,
+) -> List[Dict[str, Any]]:
     """
     Scrapes the given category URL and returns the data.
+
+    Args:
+        url (str): The URL of the root category.
+        max_concurrency (int): Maximum number of requests in flight per host.
+        rate (float): Requests per second allowed per host (politeness limit).
+        burst (int): Requests allowed back to back per host before throttling.
+        backend (str): "html" to parse the rendered pages, or "api" to use the
+            MediaWiki API (`api.php`), which lists every member of a
+            category and batches the language links of up to 50 pages per request.
+        cache_dir (str): Directory of the on-disk HTTP cache. Cached pages are
+            revalidated with conditional GETs, so unchanged pages are not downloaded again.
+        previous (List[Dict[str, Any]]): The data of a previous run of the same category
+            (e.g. loaded from `data_<lang>.json`) to re-crawl incrementally. The latest
+            revision ID of each article is checked in batches through the API and
+            stored as `revision_id`; articles whose revision did not change keep their
+            previous record instead of being fetched and parsed again. Their language
+            links, which are not part of the revision, are refreshed from the API in
+            the same requests.
+        checkpoint_path (str): JSONL file where every completed category is saved
+            as soon as it is complete.
+        resume (bool): Continue the crawl saved in `checkpoint_path`: completed
+            categories are taken from the checkpoint and only the rest is fetched.
+        strategy (Union[str, Callable[[str, int], Any]]): Order in which categories
+            are taken from the frontier: "dfs", "bfs", or a function of the category
+            URL and depth returning a priority (lowest first).
+        max_depth (int): Maximum depth of the subcategories below the root category.
+        max_categories (int): Maximum number of categories to fetch.
+        max_articles (int): Maximum number of distinct articles to fetch (an
+            article of several categories counts once). Articles are counted when
+            they are scheduled: the category that crosses the budget is trimmed to
+            the articles that fit, and categories started meanwhile only keep the
+            articles already counted.
+        deadline (float): Wall-clock budget of the crawl in seconds. Categories not
+            complete when it runs out are left out of the result.
+        parser (str): BeautifulSoup tree builder: "html.parser", or "lxml" (much
+            faster, needs the `lxml` package) or "html5lib".
+        partial_parsing (bool): Only build the elements the extractors read (title,
+            language links, article content and category listings).
+        output_path (str): JSONL file (compressed with gzip if it ends in `.gz`, or
+            with Zstandard if it ends in `.zst`, see `datasets`) where
+            every category record is written as soon as it is complete, instead of
+            keeping the whole crawl in memory. The returned list is then empty;
+            read the file back with `database.load` or `datasets.read_jsonl`.
+            A path ending in `.sqlite`, `.sqlite3` or `.db` writes the records into
+            an SQLite database (see `sqlite_database`) instead.
+        parse_workers (int): Number of processes parsing the downloaded pages and
+            extracting their data, so parsing runs on several cores while the
+            downloads go on. By default pages are parsed in the download threads.
+            On platforms that start processes with "spawn", the calling script
+            must guard its entry point with `if __name__ == "__main__":`.
+        metrics_path (str): File where the telemetry of the crawl (see `telemetry`)
+            is written in the Prometheus text format when the crawl ends: requests
+            by status, bytes, retries, and histograms of the time spent in each
+            stage (rate-limit waits, DNS, connect, TLS, time to first byte,
+            download, retry waits, parsing and extraction).
+        metrics_hook (Callable[[Dict[str, Any]], None]): Called with the telemetry
+            event of every request, retry and parsed page as it happens.
+        profile_dir (str): Directory where the CPU profiles and the allocation
+            reports of the `fetch`, `parse` and `sections` stages are written when
+            the crawl ends (see `profiling`), e.g. next to `output_path`.
+        dead_letter_path (str): JSONL file where the pages that still failed after
+            all the retries of `http_client`, or whose data could not be extracted,
+            are written when the crawl ends, one `{"url", "kind", "error", "status"}`
+            record per page. These pages are
+            left out of the result (a category with its subcategories) and the
+            crawl goes on without them.
+
+    Raises:
+        ValueError: If the backend, the strategy or the parser is not supported,
+            the parser is not installed, or `parse_workers` is not positive.
     """
+    if backend not in _BACKENDS:
+        raise ValueError(f"Unsupported backend: {backend}")
+    if strategy not in ("dfs", "bfs") and not callable(strategy):
+        raise ValueError(f"Unsupported strategy: {strategy}")
+    if parser not in PARSERS:
+        raise ValueError(f"Unsupported parser: {parser}")
+    if not is_parser_available(parser):
+        raise ValueError(f"Parser not available, install the {parser} package")
+    if parse_workers is not None and parse_workers < 1:
+        raise ValueError(f"Invalid number of parse workers: {parse_workers}")
+
     margin = len(url) + 20
 
     logging.info("%s", "=" * margin)
@@ -202,18 +1022,74 @@ def scrape_category(url: str) -> List[Dict[str, Any]]:
     logging.info(f"  URL: {url} ".center(margin, "="))
     logging.info("%s", "=" * margin)
 
-    data = []
+    http_client.configure(
+        rate=rate, burst=burst, pool_size=max_concurrency, cache_dir=cache_dir
+    )
+
     stats = {
         "categories": 0,
         "articles": 0,
+        "scheduled_articles": 0,
         "sections": 0,
+        "reused_articles": 0,
+        "resumed_categories": 0,
+        "saved_fetches": 0,
+        "dead_letters": 0,
+        "frontier_sequence": 0,
+        "stopped_by": None,
         "start_time": time.time(),
     }
 
-    data, stats = _fetch_category_data(unquote(url), data, stats)
+    ctx = _CrawlContext(
+        stats=stats,
+        max_concurrency=max_concurrency,
+        backend=backend,
+        parser=parser,
+        partial_parsing=partial_parsing,
+        parse_workers=parse_workers,
+        strategy=strategy,
+        max_depth=max_depth,
+        max_categories=max_categories,
+        max_articles=max_articles,
+        deadline=None if deadline is None else time.monotonic() + deadline,
+    )
+    if checkpoint_path is not None:
+        ctx.checkpoint = CrawlCheckpoint(checkpoint_path, unquote(url), resume)
+    if output_path is not None:
+        if is_sqlite_path(output_path):
+            ctx.output = SqliteDatabase(output_path, overwrite=True)
+        else:
+            ctx.output = JsonlWriter(output_path)
+    if previous is not None:
+        ctx.previous = {
+            article["id"]: article
+            for category in previous
+            for article in category["articles"]
+        }
+
+    collect_metrics = metrics_path is not None or metrics_hook is not None
+    if collect_metrics:
+        telemetry.enable(metrics_hook)
+    metrics = telemetry.get()
+    if profile_dir is not None:
+        profiling.enable(profile_dir)
+    try:
+        data = asyncio.run(_crawl(ctx, unquote(url)))
+    finally:
+        if metrics_path is not None:
+            metrics.write(metrics_path)
+        if collect_metrics:
+            telemetry.disable()
+        if profile_dir is not None:
+            profiling.disable()
+        if dead_letter_path is not None:
+            with open_dataset(dead_letter_path, "w") as file:
+                for dead_letter in ctx.dead_letters:
+                    file.write(json.dumps(dead_letter, ensure_ascii=False) + "\n")
 
     # Format the output nicely in the console
-    execution_time = round(time.time() - stats["start_time"], 2)
+    elapsed = time.time() - stats["start_time"]
+    execution_time = round(elapsed, 2)
 
     # Imprimir resultados con formato
     logging.info("%s", "=" * margin)
@@ -223,11 +1099,41 @@ def scrape_category(url: str) -> List[Dict[str, Any]]:
     logging.info("%s %s", "Categories:".ljust(20), stats["categories"])
     logging.info("%s %s", "Articles:".ljust(20), stats["articles"])
     logging.info("%s %s", "Sections:".ljust(20), stats["sections"])
+    logging.info("%s %s", "Saved Fetches:".ljust(20), stats["saved_fetches"])
+    if previous is not None:
+        logging.info("%s %s", "Reused Articles:".ljust(20), stats["reused_articles"])
+    if resume:
+        logging.info(
+            "%s %s", "Resumed Categories:".ljust(20), stats["resumed_categories"]
+        )
+    if stats["dead_letters"]:
+        logging.info("%s %s", "Dead Letters:".ljust(20), stats["dead_letters"])
+    if stats["stopped_by"] is not None:
+        logging.info("%s %s", "Stopped By:".ljust(20), stats["stopped_by"])
     logging.info("%s %ss", "Execution Time:".ljust(20), execution_time)
     logging.info(
         "%s %s articles/second",
         "Throughput:".ljust(20),
-        round(stats["articles"] / execution_time, 2),
+        round(stats["articles"] / elapsed, 2) if elapsed else 0,
     )
+    if metrics is not None:
+        logging.info(
+            "%s %s MB (%s MB decompressed)",
+            "Downloaded:".ljust(20),
+            round(metrics.total("http_response_bytes_total") / 1e6, 2),
+            round(metrics.total("http_response_decoded_bytes_total") / 1e6, 2),
+        )
+        if cache_dir is not None:
+            logging.info(
+                "%s %s",
+                "Cache Hits:".ljust(20),
+                int(metrics.total("http_cache_revalidations_total", result="hit")),
+            )
+        # Summed over the concurrent requests and parsers
+        logging.info("%s", "Time By Stage:")
+        for stage, seconds in sorted(
+            metrics.stage_totals().items(), key=lambda item: -item[1]
+        ):
+            logging.info("%s %ss", f"  {stage}:".ljust(20), round(seconds, 2))
     logging.info("%s", "=" * margin)
     return data